@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import sys
+import json
+import math
+import numpy as np
+import pandas as pd
+from urllib.parse import urlparse, parse_qs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+def synthetic_ohlcv(years, seed=0, end=None):
+    """기하 브라운 운동 기반 가상 일봉 OHLCV 생성 (영업일 기준)"""
+    rng = np.random.default_rng(seed)
+    n = int(252 * years)
+    end = pd.Timestamp(end or pd.Timestamp.today().normalize())
+    index = pd.bdate_range(end=end, periods=n)
+
+    close = 50000 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n)))
+    volume = rng.integers(1_000_000, 30_000_000, n)
+
+    # 원화 호가 단위처럼 정수로 반올림
+    return pd.DataFrame({
+        'open': np.round(open_),
+        'high': np.round(high),
+        'low': np.round(low),
+        'close': np.round(close),
+        'volume': volume
+    }, index=index)
+
+class FakeResponse:
+    """requests.Response 대용 (리플레이용)"""
+
+    def __init__(self, text='', status_code=200, content=None, headers=None, url=''):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.content = content if content is not None else text.encode('utf-8')
+        self.headers = headers or {}
+        self.encoding = 'utf-8'
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+class NaverReplay:
+    """
+    녹화된 sise_day 페이지 마크업을 템플릿으로 가상 시세를 페이지 단위로 재생
+    모든 페이지는 생성 시 미리 렌더링하므로 측정에는 파싱 비용만 포함됨
+    """
+    ROWS_PER_PAGE = 10
+
+    def __init__(self, data):
+        raw = open(os.path.join(FIXTURE_DIR, 'naver_sise_day.html'), 'rb').read().decode('cp949')
+        row_match = re.search(r'<tr onmouseover.*?</tr>\s*', raw, re.S)
+        self.row_template = row_match.group(0)
+        self.head = raw[:row_match.start()]
+        last_row = list(re.finditer(r'<tr onmouseover.*?</tr>\s*', raw, re.S))[-1]
+        self.tail = raw[last_row.end():]
+
+        rows = data.sort_index(ascending=False)
+        self.last_page = max(1, math.ceil(len(rows) / self.ROWS_PER_PAGE))
+        self.pages = {}
+        for page in range(1, self.last_page + 1):
+            chunk = rows.iloc[(page - 1) * self.ROWS_PER_PAGE:page * self.ROWS_PER_PAGE]
+            self.pages[page] = self._render(chunk)
+        self.calls = 0
+
+    def _render(self, chunk):
+        body = []
+        for date, row in chunk.iterrows():
+            values = [f"{int(row['close']):,}", f"{int(row['open']):,}", f"{int(row['high']):,}",
+                      f"{int(row['low']):,}", f"{int(row['volume']):,}"]
+            html = re.sub(r'\d{4}\.\d{2}\.\d{2}', date.strftime('%Y.%m.%d'), self.row_template, count=1)
+            cells = iter(values)
+            # 종가/시가/고가/저가/거래량 칸만 교체 (전일비 칸은 유지)
+            html = re.sub(r'(<span class="tah p11">)[\d,]+(</span>)',
+                          lambda m: m.group(1) + next(cells) + m.group(2), html)
+            body.append(html)
+        tail = re.sub(r'page=688', f'page={self.last_page}', self.tail)
+        return self.head + ''.join(body) + tail
+
+    def __call__(self, url, *args, **kwargs):
+        self.calls += 1
+        query = parse_qs(urlparse(url).query)
+        if 'params' in kwargs and kwargs['params']:
+            query.update({k: [str(v)] for k, v in kwargs['params'].items()})
+        page = int(query.get('page', ['1'])[0])
+        text = self.pages.get(page, self.pages[self.last_page])
+        return FakeResponse(text, content=text.encode('cp949'), url=url,
+                            headers={'Content-Type': 'text/html;charset=EUC-KR'})
+
+class KrxReplay:
+    """KRX getJsonData.cmd 응답 재생 (요청한 기간만 잘라서 반환)"""
+
+    def __init__(self, data):
+        sample = json.load(open(os.path.join(FIXTURE_DIR, 'krx_daily.json'), encoding='utf-8'))
+        self.keys = list(sample['output'][0].keys())
+        rows = data.sort_index(ascending=False)
+        self.dates = rows.index
+        self.records = []
+        for date, row in rows.iterrows():
+            record = dict(sample['output'][0])
+            record.update({
+                'TRD_DD': date.strftime('%Y/%m/%d'),
+                'TDD_CLSPRC': f"{int(row['close']):,}",
+                'TDD_OPNPRC': f"{int(row['open']):,}",
+                'TDD_HGPRC': f"{int(row['high']):,}",
+                'TDD_LWPRC': f"{int(row['low']):,}",
+                'ACC_TRDVOL': f"{int(row['volume']):,}"
+            })
+            self.records.append(record)
+        self.calls = 0
+
+    def __call__(self, url, data=None, *args, **kwargs):
+        self.calls += 1
+        start = pd.Timestamp(data['strtDd'])
+        end = pd.Timestamp(data['endDd'])
+        mask = (self.dates >= start) & (self.dates <= end)
+        output = [r for r, keep in zip(self.records, mask) if keep]
+        return FakeResponse(json.dumps({'output': output}, ensure_ascii=False), url=url,
+                            headers={'Content-Type': 'application/json;charset=UTF-8'})
+
+class ReplaySession:
+    """requests.Session 대용 (GET은 네이버, POST는 KRX 재생)"""
+
+    def __init__(self, naver=None, krx=None):
+        self.naver = naver
+        self.krx = krx
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None):
+        if method.upper() == 'POST':
+            return self.krx(url, data=data)
+        return self.naver(url, params=params)
+
+class FakeCursor:
+    """DB 없이 INSERT 준비 비용만 측정하기 위한 커서"""
+
+    def __init__(self):
+        self.rows = 0
+
+    def execute(self, query, params=None):
+        self.rows += 1
+
+    def executemany(self, query, seq):
+        self.rows += len(list(seq))
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    """mysql.connector 연결 대용"""
+
+    def __init__(self):
+        self._cursor = FakeCursor()
+
+    def cursor(self, *args, **kwargs):
+        return self._cursor
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
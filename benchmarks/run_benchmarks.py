@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""
+성능 벤치마크 실행기
+
+지표 계산, 네이버/KRX 파싱, DB 저장 준비, 차트/테이블 렌더링 구간을
+가상 OHLCV(1/10/30년)와 녹화된 응답 픽스처로 오프라인 측정한다.
+결과는 history.jsonl에 누적하고, 최근 기록 대비 임계값 이상 느려지면 실패 코드로 종료한다.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --filter indicators --repeat 10
+"""
+import os
+
+# GUI 없이 실행 (Qt offscreen + Agg 백엔드)
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import io
+import sys
+import json
+import time
+import logging
+import warnings
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+from unittest import mock
+
+from bench_fixtures import (REPO_ROOT, BENCH_DIR, synthetic_ohlcv, NaverReplay,
+                            KrxReplay, ReplaySession, FakeConnection)
+
+# 측정 출력에 섞이는 폰트/레이아웃 경고 숨김
+warnings.filterwarnings('ignore')
+logging.getLogger('matplotlib.font_manager').setLevel(logging.ERROR)
+
+YEARS = (1, 10, 30)
+DEFAULT_HISTORY = os.path.join(BENCH_DIR, 'history.jsonl')
+
+BENCHMARKS = []
+
+def benchmark(name):
+    """벤치마크 등록 데코레이터 (setup 함수는 측정 대상 callable을 반환)"""
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+_window = None
+
+def get_window():
+    """오프스크린 StockAnalyzer 창 (네트워크/메시지박스 차단)"""
+    global _window
+    if _window is None:
+        os.chdir(REPO_ROOT)  # UI 파일 경로가 상대경로
+        import stock_analyzer
+        from PyQt5.QtWidgets import QApplication, QMessageBox
+
+        def fixed_rate(self):
+            self.fx.set_rates({'USD': 1350.0})
+            self.last_update = datetime.now()
+            return self.usd_to_krw
+
+        stock_analyzer.ExchangeRateManager.update_exchange_rate = fixed_rate
+        for name in ('information', 'warning', 'critical', 'question'):
+            setattr(QMessageBox, name, staticmethod(lambda *a, **k: QMessageBox.Ok))
+
+        app = QApplication.instance() or QApplication(sys.argv)
+        _window = stock_analyzer.StockAnalyzer()
+        _window.resize(1600, 1000)
+        _window._bench_app = app
+        wait_for_render(_window)
+    return _window
+
+def wait_for_render(window, timeout=30):
+    """백그라운드 차트 렌더링 결과가 반영될 때까지 대기 (측정이 렌더링 스레드와 겹치지 않도록)"""
+    deadline = time.perf_counter() + timeout
+    while window.chart_renderer.pending and time.perf_counter() < deadline:
+        window._bench_app.processEvents()
+        time.sleep(0.005)
+
+# ---------------------------------------------------------------- 지표 계산
+
+for _years in YEARS:
+    @benchmark(f'indicators[{_years}y]')
+    def _setup_indicators(years=_years):
+        from stock_indicators import calculate_all
+        data = synthetic_ohlcv(years)
+        return lambda: calculate_all(data.copy())
+
+@benchmark('intraday.on_bar[10000]')
+def _setup_intraday():
+    import numpy as np
+    from stock_intraday import IntradaySession
+    rng = np.random.default_rng(7)
+    close = 70000 + np.cumsum(rng.normal(0, 50, 10000))
+    ts = 1_760_000_000 + np.arange(10000) * 60
+
+    def run():
+        session = IntradaySession('005930')
+        for i in range(len(ts)):
+            c = close[i]
+            session.on_bar(int(ts[i]), c, c + 30, c - 30, c, 1000)
+        assert len(session.bars) == session.bars.capacity
+    return run
+
+for _years in YEARS:
+    @benchmark(f'resample.update[{_years}y]')
+    def _setup_resample(years=_years):
+        from stock_resample import ResamplePyramid
+        data = synthetic_ohlcv(years)
+        pyramid = ResamplePyramid(data)
+
+        def run():
+            # 당일 봉 갱신 -> 마지막 주/월만 다시 집계하고 주봉 지표 계산
+            pyramid.update(data, len(data) - 1)
+            pyramid.frame('W')
+        return run
+
+# ---------------------------------------------------------------- 데이터 수집/파싱
+
+_temp_dir = tempfile.TemporaryDirectory(prefix='stock_bench_')
+
+def make_fetcher(data, cached=False):
+    """녹화 응답을 재생하는 fetcher (cached=True이면 임시 디스크 캐시 사용)"""
+    from stock_data_fetcher import StockDataFetcher
+    from stock_http_cache import HttpCache
+    from stock_rate_limiter import RateLimiter
+    session = ReplaySession(naver=NaverReplay(data), krx=KrxReplay(data))
+    limiter = RateLimiter(enabled=False)  # 재생 세션은 요청 제한 없이 측정
+    if cached:
+        path = os.path.join(_temp_dir.name, f'http_cache_{len(os.listdir(_temp_dir.name))}.sqlite')
+        http = HttpCache(path, mode='normal', session=session, rate_limiter=limiter)
+    else:
+        http = HttpCache(mode='off', session=session, rate_limiter=limiter)
+    return StockDataFetcher(http_cache=http)
+
+for _years in YEARS:
+    for _cached in (False, True):
+        _suffix = '_cached' if _cached else ''
+
+        @benchmark(f'fetch_from_naver{_suffix}[{_years}y]')
+        def _setup_naver(years=_years, cached=_cached):
+            fetcher = make_fetcher(synthetic_ohlcv(years), cached)
+
+            def run():
+                result = fetcher.fetch_from_naver('005930', years)
+                assert result is not None and not result.empty
+            return run
+
+        @benchmark(f'fetch_from_krx{_suffix}[{_years}y]')
+        def _setup_krx(years=_years, cached=_cached):
+            # 어제까지의 기간 -> 캐시에서는 영구 보관 대상
+            data = synthetic_ohlcv(years, end=datetime.now() - timedelta(days=1))
+            fetcher = make_fetcher(data, cached)
+            start, end = data.index[0], data.index[-1]
+
+            def run():
+                result = fetcher.fetch_from_krx('005930', start, end)
+                assert result is not None and not result.empty
+            return run
+
+@benchmark('rate_limiter.acquire[100]')
+def _setup_rate_limiter():
+    from stock_rate_limiter import RateLimiter
+    path = os.path.join(_temp_dir.name, 'rate_limits.sqlite')
+    # 대기가 생기지 않는 속도 -> 요청마다 더해지는 버킷 트랜잭션 비용만 측정
+    limiter = RateLimiter(path, {'bench': {'rate': 1e9, 'min_rate': 1e9, 'max_rate': 1e9, 'burst': 1e9}})
+
+    def run():
+        for _ in range(100):
+            limiter.acquire('bench')
+    return run
+
+def read_html_pages(pages, start_date):
+    """이전 방식 (pd.read_html + dropna + concat + to_datetime) 기준 구현"""
+    import pandas as pd
+    from io import StringIO
+    df_list = []
+    for content in pages:
+        tables = pd.read_html(StringIO(content.decode('cp949')), encoding='cp949')
+        df = tables[0].dropna()
+        df_list.append(df)
+        if not df.empty and pd.to_datetime(df.iloc[-1]['날짜']) < start_date:
+            break
+    all_data = pd.concat(df_list, ignore_index=True)
+    all_data['날짜'] = pd.to_datetime(all_data['날짜'])
+    all_data = all_data.set_index('날짜').sort_index()
+    all_data = all_data.rename(columns={'종가': 'close', '시가': 'open', '고가': 'high',
+                                        '저가': 'low', '거래량': 'volume'})
+    return all_data[all_data.index >= start_date][['open', 'high', 'low', 'close', 'volume']]
+
+def lxml_pages(pages, start_date):
+    """lxml 행 추출기 (stock_naver_parser)"""
+    from stock_naver_parser import SiseDayRows, parse_sise_day
+    rows = SiseDayRows()
+    for content in pages:
+        added, reached_start = parse_sise_day(content, rows, start_date)
+        if reached_start or added == 0:
+            break
+    return rows.to_frame()
+
+for _pages in (1, 25, 100):
+    for _name, _parser in (('read_html', read_html_pages), ('lxml', lxml_pages)):
+        @benchmark(f'naver_parse.{_name}[{_pages}p]')
+        def _setup_parse(pages=_pages, parser=_parser):
+            import pandas as pd
+            replay = NaverReplay(synthetic_ohlcv(pages * 10 / 252 + 0.1))
+            contents = [replay.pages[p].encode('cp949') for p in range(1, pages + 1)]
+            start_date = pd.Timestamp.today().normalize() - pd.Timedelta(days=int(pages * 10 * 365 / 252))
+            # 두 방식의 결과가 같은지 먼저 확인
+            expected = read_html_pages(contents, start_date)
+            result = parser(contents, start_date)
+            assert len(result) == len(expected) and (result['close'].values == expected['close'].values).all()
+            return lambda: parser(contents, start_date)
+
+def register_replay(cache_path, symbols, years):
+    """
+    녹화된 HTTP 캐시(STOCK_HTTP_CACHE_MODE=record로 수집)를 네트워크 없이 재생하는 벤치마크 등록
+    네이버 경로만 대상 (KRX 요청 키는 실행 날짜에 따라 달라짐)
+    """
+    for symbol in symbols:
+        @benchmark(f'replay.naver[{symbol}]')
+        def _setup_replay(symbol=symbol):
+            from stock_data_fetcher import StockDataFetcher
+            from stock_http_cache import HttpCache
+            fetcher = StockDataFetcher(http_cache=HttpCache(cache_path, mode='replay'))
+
+            def run():
+                result = fetcher.fetch_from_naver(symbol, years)
+                assert result is not None and not result.empty
+            return run
+
+# ---------------------------------------------------------------- DB 저장
+
+for _years in YEARS:
+    @benchmark(f'save_to_mysql[{_years}y]')
+    def _setup_save_mysql(years=_years):
+        from stock_data_fetcher import StockDataFetcher
+        data = synthetic_ohlcv(years)
+        fetcher = StockDataFetcher()
+        return lambda: fetcher.save_to_mysql(data, '005930', FakeConnection())
+
+    @benchmark(f'save_to_db[{_years}y]')
+    def _setup_save_db(years=_years):
+        window = get_window()
+        data = synthetic_ohlcv(years)
+
+        def connect():
+            window.conn = FakeConnection()
+            window.cursor = window.conn.cursor()
+            return True
+
+        def run():
+            window.df = data
+            window.current_symbol = '005930'
+            with mock.patch.object(window, 'connect_db', connect):
+                window.save_to_db()
+        return run
+
+# ---------------------------------------------------------------- 렌더링
+
+for _years in YEARS:
+    @benchmark(f'plot_charts[{_years}y]')
+    def _setup_plot(years=_years):
+        window = get_window()
+        window.process_data(synthetic_ohlcv(years), '005930')
+        wait_for_render(window)
+        return lambda: window.plot_charts('005930', background=False)
+
+    @benchmark(f'update_table[{_years}y]')
+    def _setup_table(years=_years):
+        window = get_window()
+        window.process_data(synthetic_ohlcv(years), 'AAPL')
+        wait_for_render(window)
+        return window.update_table
+
+for _years in YEARS:
+    @benchmark(f'chart_artists.draw[{_years}y]')
+    def _setup_chart_artists(years=_years):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from stock_chart_artists import Candlesticks, VolumeBars, BarSeries, date_positions, bar_width
+        data = synthetic_ohlcv(years)
+        data['histogram'] = data['close'].diff()
+        figure = Figure(figsize=(14, 10))
+        canvas = FigureCanvasAgg(figure)
+        ax_price, ax_volume, ax_hist = figure.subplots(3)
+        x = date_positions(data.index)
+        width = bar_width(x)
+        series = [Candlesticks(ax_price, x, data, width, '#ff5252', '#4a90e2'),
+                  VolumeBars(ax_volume, x, data, width, '#ff5252', '#4a90e2'),
+                  BarSeries(ax_hist, x, data['histogram'], 'histogram', width, '#81ecec')]
+        canvas.draw()
+        renderer = canvas.get_renderer()
+
+        def run():
+            # 일봉 그대로 (주봉/월봉 집계 없이) 캔들/거래량/히스토그램만 그리기
+            for item in series:
+                for artist in item.artists():
+                    artist.draw(renderer)
+        return run
+
+for _years in YEARS:
+    @benchmark(f'batch_report.render[{_years}y]')
+    def _setup_batch_report(years=_years):
+        import tempfile
+        from stock_batch_report import BatchReportGenerator, render_report
+        data = synthetic_ohlcv(years)
+        config = BatchReportGenerator({}, tempfile.mkdtemp()).config
+        # 워커 프로세스 하나가 종목 하나를 처리하는 시간 (지표 + 차트 구성 + PNG 저장)
+        return lambda: render_report('005930', data, config)
+
+for _years in YEARS:
+    @benchmark(f'exporter.parquet[{_years}y]')
+    def _setup_exporter(years=_years):
+        import tempfile
+        from stock_exporter import export_prices
+        data = synthetic_ohlcv(years)
+        path = os.path.join(tempfile.mkdtemp(), 'prices.parquet')
+        # 10종목 (종목마다 지표 계산 + 행 그룹 하나 기록)
+        return lambda: export_prices(((f'{i:06d}', data) for i in range(10)), path)
+
+@benchmark('bulk_import.normalize[200000]')
+def _setup_bulk_import():
+    import pandas as pd
+    from stock_bulk_import import normalize_chunk
+    data = synthetic_ohlcv(10).rename_axis('Date').reset_index()
+    data['Date'] = data['Date'].dt.strftime('%Y-%m-%d')
+    # 업체 덤프 형태의 청크 하나 (문자열 날짜, 80종목)
+    chunk = pd.concat([data.assign(Ticker=f'{i:06d}') for i in range(80)], ignore_index=True)
+    return lambda: normalize_chunk(chunk)
+
+@benchmark('lots.replay[50000]')
+def _setup_lots():
+    import random
+    from stock_lots import LotBook
+    rng = random.Random(0)
+    start = datetime(2015, 1, 1)
+    transactions, held = [], {}
+    # 50종목 5만 건 매매 내역 (매도 약 45%)
+    for i in range(50000):
+        symbol = f'{rng.randrange(50):06d}'
+        when = (start + timedelta(minutes=90 * i)).isoformat()
+        if held.get(symbol, 0) > 20 and rng.random() < 0.45:
+            quantity = rng.randint(1, held[symbol])
+            held[symbol] -= quantity
+            kind = 'sell'
+        else:
+            quantity = rng.randint(1, 50)
+            held[symbol] = held.get(symbol, 0) + quantity
+            kind = 'buy'
+        transactions.append({'date': when, 'symbol': symbol, 'type': kind, 'quantity': quantity,
+                             'price': rng.uniform(50, 150)})
+    # 포트폴리오 로드 시 로트 장부 재구성 (FIFO 매칭 + 실현 손익 색인)
+    return lambda: LotBook.from_transactions(transactions, 'fifo', strict=True)
+
+@benchmark('fx.convert[1000000]')
+def _setup_fx_convert():
+    import numpy as np
+    from stock_currency import FxRates
+    fx = FxRates(path=os.path.join(tempfile.mkdtemp(), 'fx_rates.json'))
+    fx.set_rates({'USD': 1350.0, 'JPY': 9.0, 'HKD': 173.0, 'EUR': 1470.0, 'GBP': 1710.0})
+    rng = np.random.default_rng(0)
+    # 통화가 섞인 금액 백만 개를 원화로 (통화 종류마다 환율 한 번 조회)
+    currencies = rng.choice(np.array(['KRW', 'USD', 'JPY', 'HKD', 'EUR', 'GBp'], dtype=object), 1000000)
+    amounts = rng.uniform(1, 1000, 1000000)
+    return lambda: fx.convert(amounts, currencies)
+
+@benchmark('alerts.evaluate[5000x500]')
+def _setup_alerts():
+    from stock_indicators import calculate_all
+    from stock_alert_expr import AlertEvaluator, IndicatorMatrix
+    data = calculate_all(synthetic_ohlcv(1))
+    # 관심 종목 500개, 알림 5000개 (조건식 1000종류 - 기준값만 다른 RSI/가격/크로스 조건)
+    frames = {f'{i:06d}': data.iloc[:len(data) - i % 50] for i in range(500)}
+    templates = ['rsi < {}', 'close > bb_upper * {}', 'cross(ma9, ma22) and rsi < {}',
+                 'change(close, 5) / prev(close, 5) > {}', 'macd > macd_signal and stoch_k < {}']
+    expressions = [t.format(k / 10) for t in templates for k in range(200)] * 5
+    evaluator = AlertEvaluator()
+
+    def run():
+        # 행렬 구성 + 조건식별 한 번씩 전체 종목 평가
+        matrix = IndicatorMatrix.from_frames(frames, lags=evaluator.lags(expressions))
+        return evaluator.evaluate(expressions, matrix)
+    return run
+
+for _years in YEARS:
+    @benchmark(f'alerts.replay[{_years}y]')
+    def _setup_alert_replay(years=_years):
+        from stock_indicators import calculate_all
+        from stock_alert_expr import compile_alert, replay
+        frames = {'005930': calculate_all(synthetic_ohlcv(years))}
+        alert = compile_alert('cross(ma9, ma22) and rsi < 60 or close < bb_lower * 0.98')
+        # 종목 하나의 전체 기간에서 알림 날짜 찾기
+        return lambda: replay(alert, frames)
+
+for _years in YEARS:
+    @benchmark(f'live_quote[{_years}y]')
+    def _setup_live(years=_years):
+        import pandas as pd
+        from stock_indicators import IncrementalIndicators
+        window = get_window()
+        window.process_data(synthetic_ohlcv(years), '005930')
+        wait_for_render(window)
+        window.live_indicators = IncrementalIndicators(window.df, window.indicator_params)
+        window.live_chart.start(window.chart_lines, window.chart_series)
+        window.live_chart._on_frame()  # 전체 그리기 + 배경 캐시
+        last = window.df.iloc[-1]
+        quote = {'date': pd.Timestamp(window.df.index[-1].date()), 'time': pd.Timestamp.now(),
+                 'open': last['open'], 'high': last['high'], 'low': last['low'],
+                 'close': last['close'], 'volume': int(last['volume'])}
+
+        def run():
+            # 시세 반영 + 블리팅 한 프레임
+            window.on_live_quote('005930', quote)
+            window.live_chart._on_frame()
+        return run
+
+# ---------------------------------------------------------------- 실행/기록
+
+def measure(func, repeat):
+    """1회 워밍업 후 repeat회 측정 (초 단위 목록)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def git_revision():
+    """현재 커밋 해시 (git이 없으면 None)"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=REPO_ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+def load_history(path):
+    """기록 파일 로드"""
+    entries = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+    return entries
+
+def baseline_for(history, name, host, window):
+    """같은 머신의 최근 window개 기록 중앙값"""
+    values = [e['results'][name]['median'] for e in history
+              if e.get('host') == host and name in e.get('results', {})]
+    values = values[-window:]
+    return statistics.median(values) if values else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="주식 분석 프로그램 성능 벤치마크")
+    parser.add_argument('--filter', default='', help="이름에 포함된 문자열로 벤치마크 선택")
+    parser.add_argument('--repeat', type=int, default=5, help="측정 반복 횟수")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="결과 누적 파일 (JSON Lines)")
+    parser.add_argument('--threshold', type=float, default=0.25, help="회귀 판정 비율 (0.25 = 25%% 느려짐)")
+    parser.add_argument('--window', type=int, default=5, help="기준값 계산에 쓸 최근 기록 수")
+    parser.add_argument('--no-record', action='store_true', help="결과를 기록하지 않음")
+    parser.add_argument('--list', action='store_true', help="벤치마크 목록만 출력")
+    parser.add_argument('--replay-cache', help="녹화된 HTTP 캐시 파일 (오프라인 재생 벤치마크)")
+    parser.add_argument('--replay-symbols', default='005930', help="재생할 종목 (쉼표 구분)")
+    parser.add_argument('--replay-years', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.replay_cache:
+        register_replay(os.path.abspath(args.replay_cache), args.replay_symbols.split(','), args.replay_years)
+
+    selected = [(n, s) for n, s in BENCHMARKS if args.filter in n]
+    if args.list:
+        for name, _ in selected:
+            print(name)
+        return 0
+
+    history = load_history(args.history)
+    host = platform.node()
+    results = {}
+    regressions = []
+
+    print(f"{'benchmark':<28}{'median(ms)':>12}{'min(ms)':>12}{'baseline':>12}{'change':>10}")
+    for name, setup in selected:
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                func = setup()
+            timings = measure(func, args.repeat)
+        except Exception as e:
+            print(f"{name:<28}  실패: {e}")
+            regressions.append(name)
+            continue
+
+        median = statistics.median(timings)
+        results[name] = {'median': median, 'min': min(timings), 'repeat': args.repeat}
+
+        baseline = baseline_for(history, name, host, args.window)
+        if baseline:
+            change = median / baseline - 1
+            change_text = f"{change * 100:+.1f}%"
+            if change > args.threshold:
+                regressions.append(name)
+                change_text += ' !'
+            baseline_text = f"{baseline * 1000:.2f}"
+        else:
+            change_text = '-'
+            baseline_text = '-'
+        print(f"{name:<28}{median * 1000:>12.2f}{min(timings) * 1000:>12.2f}{baseline_text:>12}{change_text:>10}")
+
+    if results and not args.no_record:
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'host': host,
+            'python': platform.python_version(),
+            'results': results
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    if regressions:
+        print(f"\n성능 회귀 {len(regressions)}건 (임계값 {args.threshold * 100:.0f}%): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+import ast
+import time
+import argparse
+import operator
+import numpy as np
+import pandas as pd
+
+# 조건식에서 쓸 수 있는 컬럼 (calculate_all 결과 + OHLCV), price는 close의 별칭
+ALERT_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'ma9', 'ma22', 'change_pct', 'rsi',
+                 'macd', 'macd_signal', 'macd_histogram', 'bb_upper', 'bb_middle', 'bb_lower',
+                 'stoch_k', 'stoch_d')
+COLUMN_ALIASES = {'price': 'close'}
+
+_COMPARE = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne
+}
+_ARITH = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv
+}
+
+class AlertExpressionError(ValueError):
+    """조건식 문법/이름 오류"""
+
+class IndicatorMatrix:
+    """
+    종목 x 지표 행렬 (최근 lags+1개 봉)
+    values[lag, i, j]: 종목 i, 컬럼 j의 lag봉 전 값 (0이 최신, 데이터가 모자라면 NaN)
+    """
+
+    def __init__(self, symbols, columns, values):
+        self.symbols = list(symbols)
+        self.columns = list(columns)
+        self.values = values
+        self.positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._column_index = {column: j for j, column in enumerate(self.columns)}
+
+    @classmethod
+    def from_frames(cls, frames, columns=ALERT_COLUMNS, lags=1):
+        """종목 -> DataFrame(지표 계산 완료)에서 마지막 lags+1행만 모아 행렬 생성"""
+        symbols = list(frames)
+        values = np.full((lags + 1, len(symbols), len(columns)), np.nan)
+        layouts = {}  # 컬럼 구성이 같은 DataFrame은 위치 계산을 공유
+        for i, symbol in enumerate(symbols):
+            df = frames[symbol]
+            if df.empty:
+                continue
+            key = tuple(df.columns)
+            if key not in layouts:
+                positions = df.columns.get_indexer(columns)
+                present = np.flatnonzero(positions >= 0)
+                layouts[key] = present, positions[present]
+            present, source = layouts[key]
+            if not len(present):
+                continue
+            # 마지막 몇 행만 잘라 변환한 뒤 컬럼 선택 (DataFrame에서 컬럼을 고르는 것보다 빠름)
+            # 최신 봉이 lag 0이 되도록 뒤집어서 기록
+            tail = df.iloc[-(lags + 1):].to_numpy(dtype=np.float64)[:, source]
+            values[:len(tail), i, present] = tail[::-1]
+        return cls(symbols, columns, values)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def get(self, symbol, column, lag=0):
+        return self.values[lag, self.positions[symbol], self._column_index[column]]
+
+    def set(self, symbol, column, value, lag=0):
+        """값 하나 덮어쓰기 (예: 마지막 종가를 실시간 현재가로)"""
+        self.values[lag, self.positions[symbol], self._column_index[column]] = value
+
+    def column(self, name, lag=0):
+        """컬럼 하나의 lag봉 전 값 (종목 수 길이 배열)"""
+        if lag >= len(self.values) or name not in self._column_index:
+            return np.full(len(self.symbols), np.nan)
+        return self.values[lag, :, self._column_index[name]]
+
+class HistoryMatrix:
+    """
+    종목별 전체 기간을 이어 붙인 행렬 (행 하나 = 종목 하나의 날짜 하나)
+    조건식을 모든 날짜에 대해 한 번에 평가할 때 사용 (lag는 같은 종목 안에서만 이동, 앞쪽은 NaN)
+    """
+
+    def __init__(self, symbols, dates, columns, values, row_pos):
+        self.symbols = symbols  # 행별 종목
+        self.dates = dates  # 행별 날짜
+        self.columns = list(columns)
+        self.values = values  # (컬럼, 행)
+        self.row_pos = row_pos  # 종목 안에서의 행 번호
+        self._column_index = {column: j for j, column in enumerate(self.columns)}
+
+    @classmethod
+    def from_frames(cls, frames, columns=ALERT_COLUMNS):
+        """종목 -> DataFrame(지표 계산 완료)을 행 방향으로 이어 붙여 생성"""
+        blocks, symbols, dates, row_pos = [], [], [], []
+        for symbol, df in frames.items():
+            if df.empty:
+                continue
+            positions = df.columns.get_indexer(columns)
+            present = positions >= 0
+            block = np.full((len(columns), len(df)), np.nan)
+            block[present] = df.to_numpy(dtype=np.float64)[:, positions[present]].T
+            blocks.append(block)
+            symbols.append(np.full(len(df), symbol, dtype=object))
+            dates.append(np.asarray(df.index))
+            row_pos.append(np.arange(len(df)))
+        if not blocks:
+            return cls(np.array([], dtype=object), np.array([]), columns,
+                       np.empty((len(columns), 0)), np.array([], dtype=np.int64))
+        return cls(np.concatenate(symbols), np.concatenate(dates), columns,
+                   np.concatenate(blocks, axis=1), np.concatenate(row_pos))
+
+    def __len__(self):
+        return len(self.row_pos)
+
+    def column(self, name, lag=0):
+        """컬럼 하나를 lag봉 뒤로 민 값 (행 수 길이 배열)"""
+        if name not in self._column_index:
+            return np.full(len(self), np.nan)
+        data = self.values[self._column_index[name]]
+        if lag == 0:
+            return data
+        shifted = np.full(len(data), np.nan)
+        shifted[lag:] = data[:-lag]
+        shifted[self.row_pos < lag] = np.nan  # 다른 종목의 값이 넘어오지 않도록
+        return shifted
+
+class _Node:
+    """컴파일된 식 노드 (같은 key의 결과는 한 번의 평가 안에서 재사용)"""
+
+    def __init__(self, key, func, depth=0):
+        self.key = key
+        self.func = func  # func(matrix, lag, cache) -> ndarray
+        self.depth = depth  # 필요한 과거 봉 수
+
+    def __call__(self, matrix, lag, cache):
+        cache_key = (self.key, lag)
+        result = cache.get(cache_key)
+        if result is None:
+            result = self.func(matrix, lag, cache)
+            cache[cache_key] = result
+        return result
+
+def _cross(a, b, matrix, lag, cache, up=True):
+    """a가 b를 상향(up) 또는 하향 돌파 (전 봉과 현재 봉의 차이 부호가 바뀜)"""
+    before = a(matrix, lag + 1, cache) - b(matrix, lag + 1, cache)
+    now = a(matrix, lag, cache) - b(matrix, lag, cache)
+    if up:
+        return (before < 0) & (now > 0)
+    return (before > 0) & (now < 0)
+
+class _Compiler:
+    """ast -> _Node 변환 (허용한 문법만, 각 _<노드> 메서드는 (func, 필요한 과거 봉 수) 반환)"""
+
+    FUNCTIONS = ('cross', 'cross_up', 'cross_down', 'prev', 'change', 'abs', 'min', 'max')
+
+    def __init__(self, columns):
+        self.columns = set(columns)
+
+    def error(self, node, message):
+        raise AlertExpressionError(f"{message} (위치 {getattr(node, 'col_offset', 0) + 1})")
+
+    def compile(self, node):
+        method = getattr(self, f'_{type(node).__name__}', None)
+        if method is None:
+            self.error(node, f"지원하지 않는 문법: {type(node).__name__}")
+        func, depth = method(node)
+        # 같은 부분식은 같은 key (위치 정보 제외)
+        return _Node(ast.dump(node), func, depth)
+
+    def _Expression(self, node):
+        body = self.compile(node.body)
+        return body, body.depth
+
+    def _Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            self.error(node, f"숫자가 아닌 상수: {node.value!r}")
+        value = float(node.value)
+        return (lambda matrix, lag, cache: value), 0
+
+    def _Name(self, node):
+        name = COLUMN_ALIASES.get(node.id, node.id)
+        if name not in self.columns:
+            self.error(node, f"알 수 없는 지표: {node.id}")
+        return (lambda matrix, lag, cache: matrix.column(name, lag)), 0
+
+    def _UnaryOp(self, node):
+        operand = self.compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            return (lambda m, lag, c: ~_truth(operand(m, lag, c))), operand.depth
+        if isinstance(node.op, ast.USub):
+            return (lambda m, lag, c: -operand(m, lag, c)), operand.depth
+        self.error(node, "지원하지 않는 단항 연산자")
+
+    def _BinOp(self, node):
+        op = _ARITH.get(type(node.op))
+        if op is None:
+            self.error(node, "지원하지 않는 연산자 (+, -, *, /만 가능)")
+        left, right = self.compile(node.left), self.compile(node.right)
+
+        def func(matrix, lag, cache):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return op(left(matrix, lag, cache), right(matrix, lag, cache))
+        return func, max(left.depth, right.depth)
+
+    def _BoolOp(self, node):
+        values = [self.compile(value) for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+        def func(matrix, lag, cache):
+            result = _truth(values[0](matrix, lag, cache))
+            for value in values[1:]:
+                result = combine(result, _truth(value(matrix, lag, cache)))
+            return result
+        return func, max(v.depth for v in values)
+
+    def _Compare(self, node):
+        # a < b < c -> (a < b) and (b < c)
+        operands = [self.compile(node.left)] + [self.compile(c) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARE:
+                self.error(node, "지원하지 않는 비교 연산자")
+            ops.append(_COMPARE[type(op)])
+
+        def func(matrix, lag, cache):
+            result = None
+            for op, left, right in zip(ops, operands, operands[1:]):
+                with np.errstate(invalid='ignore'):
+                    part = op(left(matrix, lag, cache), right(matrix, lag, cache))
+                result = part if result is None else result & part
+            return result
+        return func, max(o.depth for o in operands)
+
+    def _Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.FUNCTIONS:
+            self.error(node, f"알 수 없는 함수 (사용 가능: {', '.join(self.FUNCTIONS)})")
+        if node.keywords:
+            self.error(node, "함수 인자는 위치 인자만 사용 가능")
+        name = node.func.id
+        args = node.args
+
+        if name in ('cross', 'cross_up', 'cross_down'):
+            if len(args) != 2:
+                self.error(node, f"{name}(a, b)는 인자 2개 필요")
+            a, b = self.compile(args[0]), self.compile(args[1])
+            up = name != 'cross_down'
+            return (lambda m, lag, c: _cross(a, b, m, lag, c, up)), max(a.depth, b.depth) + 1
+
+        if name in ('prev', 'change'):
+            if not 1 <= len(args) <= 2:
+                self.error(node, f"{name}(x, n=1)은 인자 1~2개 필요")
+            x = self.compile(args[0])
+            n = self._count(args[1]) if len(args) == 2 else 1
+            if name == 'prev':
+                return (lambda m, lag, c: x(m, lag + n, c)), x.depth + n
+
+            def change(matrix, lag, cache):
+                return x(matrix, lag, cache) - x(matrix, lag + n, cache)
+            return change, x.depth + n
+
+        if name == 'abs':
+            if len(args) != 1:
+                self.error(node, "abs(x)는 인자 1개 필요")
+            x = self.compile(args[0])
+            return (lambda m, lag, c: np.abs(x(m, lag, c))), x.depth
+
+        # min/max
+        if len(args) < 2:
+            self.error(node, f"{name}(a, b, ...)는 인자 2개 이상 필요")
+        values = [self.compile(arg) for arg in args]
+        reduce = np.fmin if name == 'min' else np.fmax
+
+        def func(matrix, lag, cache):
+            result = values[0](matrix, lag, cache)
+            for value in values[1:]:
+                result = reduce(result, value(matrix, lag, cache))
+            return result
+        return func, max(v.depth for v in values)
+
+    def _count(self, node):
+        if not isinstance(node, ast.Constant) or isinstance(node.value, bool) \
+                or not isinstance(node.value, int) or node.value < 1:
+            self.error(node, "봉 수는 1 이상의 정수")
+        return node.value
+
+def _truth(values):
+    """비교 결과가 아닌 값(숫자)은 0이 아니고 NaN이 아니면 참"""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values
+    return (values != 0) & ~np.isnan(values)
+
+class CompiledAlert:
+    """파싱/컴파일이 끝난 조건식 (evaluate는 행렬의 모든 종목을 한 번에 계산)"""
+
+    def __init__(self, expression, root):
+        self.expression = expression
+        self.root = root
+        self.lags = root.depth  # 필요한 과거 봉 수
+
+    def evaluate(self, matrix, cache=None):
+        """종목별 충족 여부 (종목 수 길이 bool 배열)"""
+        result = self.root(matrix, 0, {} if cache is None else cache)
+        return np.broadcast_to(_truth(result), (len(matrix),))
+
+def compile_alert(expression, columns=ALERT_COLUMNS):
+    """
+    조건식 문자열 -> CompiledAlert
+    예: "rsi < 30 and close < bb_lower", "cross(ma9, ma22)", "change(close, 5) / prev(close, 5) > 0.1"
+    문법/이름 오류는 AlertExpressionError
+    """
+    expression = expression.strip()
+    if not expression:
+        raise AlertExpressionError("조건식이 비어 있습니다")
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise AlertExpressionError(f"문법 오류: {e.msg} (위치 {e.offset})")
+    return CompiledAlert(expression, _Compiler(columns).compile(tree))
+
+class AlertEvaluator:
+    """
+    여러 조건식을 한 번에 평가
+    같은 조건식은 한 번만 컴파일하고, 한 번의 평가 안에서는 같은 부분식(cross(ma9, ma22) 등) 결과를 공유
+    """
+
+    def __init__(self, columns=ALERT_COLUMNS):
+        self.columns = columns
+        self.compiled = {}  # 조건식 -> CompiledAlert
+
+    def compile(self, expression):
+        alert = self.compiled.get(expression)
+        if alert is None:
+            alert = compile_alert(expression, self.columns)
+            self.compiled[expression] = alert
+        return alert
+
+    def lags(self, expressions):
+        """조건식들에 필요한 과거 봉 수"""
+        return max((self.compile(expression).lags for expression in expressions), default=0)
+
+    def evaluate(self, expressions, matrix):
+        """조건식 -> 종목별 충족 여부 배열"""
+        cache = {}
+        return {expression: self.compile(expression).evaluate(matrix, cache) for expression in set(expressions)}
+
+def replay(expression, frames, columns=ALERT_COLUMNS):
+    """
+    조건식을 종목별 전체 기간에 대해 한 번에 평가해 충족한 날짜를 모두 반환
+    frames: 종목 -> 지표가 계산된 DataFrame, expression: 조건식 문자열 또는 CompiledAlert
+    반환값: DataFrame(symbol, date, close, new)
+            new는 전 봉에는 충족하지 않았던 날 (알림을 매번 다시 켜 두었다면 울렸을 날)
+    """
+    alert = expression if isinstance(expression, CompiledAlert) else compile_alert(expression, columns)
+    matrix = HistoryMatrix.from_frames(frames, columns)
+    hits = alert.evaluate(matrix)
+    before = np.zeros(len(hits), dtype=bool)
+    before[1:] = hits[:-1]
+    before[matrix.row_pos == 0] = False
+    rows = np.flatnonzero(hits)
+    return pd.DataFrame({
+        'symbol': matrix.symbols[rows],
+        'date': matrix.dates[rows],
+        'close': matrix.column('close')[rows],
+        'new': ~before[rows]
+    })
+
+def replay_summary(triggers):
+    """replay 결과의 종목별 요약 (충족한 봉 수, 알림 횟수, 첫/마지막 알림 날짜)"""
+    fired = triggers[triggers['new']]
+    summary = fired.groupby('symbol')['date'].agg(alerts='count', first='min', last='max')
+    summary.insert(0, 'bars', triggers.groupby('symbol').size())
+    return summary.sort_values('alerts', ascending=False)
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="조건식 알림을 과거 전체 기간에 대해 다시 평가")
+    parser.add_argument('expression', help='조건식 (예: "rsi < 30 and close < bb_lower")')
+    parser.add_argument('symbols', nargs='*', help="종목 코드 목록 (생략하면 stocks 테이블 전체)")
+    parser.add_argument('--market', default=None, help="stocks 테이블에서 이 시장만 선택 (예: KOSPI)")
+    parser.add_argument('--years', type=int, default=10, help="기간 (년)")
+    parser.add_argument('--source', choices=['fetch', 'db'], default='db',
+                        help="가격 데이터: stock_prices 테이블 또는 수집(HTTP 캐시 사용)")
+    parser.add_argument('--batch-size', type=int, default=200, help="한 번에 평가하는 종목 수")
+    parser.add_argument('--output', default=None, help="알림 날짜 목록 CSV")
+    args = parser.parse_args()
+
+    from stock_indicators import calculate_all
+    from stock_exporter import iter_price_batches
+
+    try:
+        alert = compile_alert(args.expression)
+    except AlertExpressionError as e:
+        parser.error(str(e))
+
+    connection = None
+    symbols = args.symbols
+    if not symbols or args.source == 'db':
+        from stock_db import connect, load_symbols
+        connection = connect()
+    try:
+        if not symbols:
+            symbols = load_symbols(connection, args.market)
+
+        started = time.perf_counter()
+        results = []
+        frames = {}
+        for symbol, df in iter_price_batches(symbols, args.source, args.years, args.batch_size, connection):
+            frames[symbol] = calculate_all(df)
+            if len(frames) == args.batch_size:
+                results.append(replay(alert, frames))
+                frames = {}
+        results.append(replay(alert, frames))
+    finally:
+        if connection is not None:
+            connection.close()
+
+    triggers = pd.concat(results, ignore_index=True)
+    elapsed = time.perf_counter() - started
+    if args.output:
+        triggers.to_csv(args.output, index=False, date_format='%Y-%m-%d')
+    summary = replay_summary(triggers)
+    if not summary.empty:
+        print(summary.to_string())
+    print(f"{len(symbols)}종목 중 {len(summary)}종목, 알림 {int(triggers['new'].sum())}회 "
+          f"(충족한 봉 {len(triggers)}개, {elapsed:.1f}s)")
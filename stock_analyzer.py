@@ -9,130 +9,74 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 from PyQt5 import uic
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-import matplotlib.dates as mdates
 import matplotlib.font_manager as fm
-import platform
 import yfinance as yf
 import requests
 from bs4 import BeautifulSoup
 import time
 import json
+import shutil
+import threading
 from collections import defaultdict
+from stock_indicators import IncrementalIndicators, DEFAULT_INDICATOR_PARAMS, calculate_all
+from stock_profiler import profiler
+from stock_data_fetcher import StockDataFetcher
+from stock_symbol_resolver import get_symbol_resolver
+from stock_live import QuotePoller, LiveChart, live_artists
+from stock_job_scheduler import FetchScheduler, PRIORITY_INTERACTIVE
+from stock_session_cache import SessionCache
+from stock_resample import ResamplePyramid, choose_level, LEVELS, LEVEL_NAMES, LEVEL_UNITS
+from stock_chart_artists import autoscale_y, date_positions
+from stock_chart_render import ChartRenderer, adopt_figure
+from stock_db import DB_CONFIG
+from stock_chart_figure import apply_chart_style, build_price_chart, build_portfolio_chart, chart_title
+from stock_lots import LotBook
+from stock_currency import BASE_CURRENCY, currency_of, currency_symbol, format_amount, get_fx_rates
+from stock_alert_expr import AlertEvaluator, AlertExpressionError, IndicatorMatrix, replay
 
-# 한글 폰트 설정 함수
-def setup_korean_font():
-    """운영체제별 한글 폰트 자동 설정"""
-    system = platform.system()
-    
-    if system == 'Windows':
-        font_names = ['Malgun Gothic', 'NanumGothic', '맑은 고딕', '나눔고딕']
-    elif system == 'Darwin':
-        font_names = ['AppleGothic', 'Apple SD Gothic Neo', 'NanumGothic', 'Arial Unicode MS']
-    else:
-        font_names = ['NanumGothic', 'UnDotum', 'DejaVu Sans', 'Liberation Sans']
-    
-    for font_name in font_names:
-        try:
-            plt.rcParams['font.family'] = font_name
-            plt.rcParams['axes.unicode_minus'] = False
-            return True
-        except:
-            continue
-    
-    # 폰트를 찾지 못한 경우 기본 폰트 사용
-    plt.rcParams['axes.unicode_minus'] = False
-    return False
-
-# 프로그램 시작 시 한글 폰트 설정
-setup_korean_font()
+# 프로그램 시작 시 한글 폰트와 다크 테마 설정
+# (차트는 렌더링 스레드에서 그리므로 rcParams는 시작 시 한 번만 변경)
+apply_chart_style()
 
 # UI 파일 로드
 form_class = uic.loadUiType("stock_analyzer.ui")[0]
 
 class ExchangeRateManager:
-    """환율 관리 클래스"""
+    """환율 관리 클래스 (stock_currency 환율표 사용, 필요한 통화만 주기적으로 갱신)"""
     
-    def __init__(self):
-        self.usd_to_krw = None
+    def __init__(self, fx=None):
+        self.fx = fx or get_fx_rates()
         self.last_update = None
         self.update_exchange_rate()
     
+    @property
+    def usd_to_krw(self):
+        return self.fx.rate('USD')
+    
     def update_exchange_rate(self):
-        """실시간 환율 업데이트"""
-        try:
-            # Yahoo Finance에서 USD/KRW 환율 가져오기
-            ticker = yf.Ticker("USDKRW=X")
-            data = ticker.history(period="1d")
-            if not data.empty:
-                self.usd_to_krw = data['Close'].iloc[-1]
-                self.last_update = datetime.now()
-                return self.usd_to_krw
-        except:
-            pass
-        
-        # 백업: 고정 환율 사용
-        if self.usd_to_krw is None:
-            self.usd_to_krw = 1350.0  # 기본값
-        
+        """실시간 환율 업데이트 (오래된 통화만 한 번에 조회, 실패하면 이전 값/기본값 유지)"""
+        if self.fx.refresh():
+            self.last_update = datetime.now()
         return self.usd_to_krw
     
-    def convert_to_krw(self, usd_amount):
-        """달러를 원화로 변환"""
-        if self.usd_to_krw is None:
-            self.update_exchange_rate()
-        return usd_amount * self.usd_to_krw
-    
-    def get_rate_info(self):
-        """환율 정보 문자열 반환"""
-        if self.last_update:
-            time_str = self.last_update.strftime("%H:%M")
-            return f"1 USD = {self.usd_to_krw:,.0f} KRW ({time_str} 기준)"
-        return f"1 USD = {self.usd_to_krw:,.0f} KRW"
-
-class TechnicalIndicators:
-    """기술적 지표 계산 클래스"""
+    def convert_to_krw(self, amount, currency='USD'):
+        """외화 금액(또는 금액 배열)을 원화로 변환"""
+        return self.fx.convert(amount, currency)
     
-    @staticmethod
-    def calculate_rsi(data, period=14):
-        """RSI (상대강도지수) 계산"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-    
-    @staticmethod
-    def calculate_macd(data, fast=12, slow=26, signal=9):
-        """MACD 계산"""
-        ema_fast = data.ewm(span=fast).mean()
-        ema_slow = data.ewm(span=slow).mean()
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal).mean()
-        histogram = macd_line - signal_line
-        return macd_line, signal_line, histogram
-    
-    @staticmethod
-    def calculate_bollinger_bands(data, period=20, std_dev=2):
-        """볼린저 밴드 계산"""
-        middle_band = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
-        upper_band = middle_band + (std * std_dev)
-        lower_band = middle_band - (std * std_dev)
-        return upper_band, middle_band, lower_band
-    
-    @staticmethod
-    def calculate_stochastic(high, low, close, period=14, smooth_k=3, smooth_d=3):
-        """스토캐스틱 계산"""
-        lowest_low = low.rolling(window=period).min()
-        highest_high = high.rolling(window=period).max()
-        k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-        k_percent = k_percent.rolling(window=smooth_k).mean()
-        d_percent = k_percent.rolling(window=smooth_d).mean()
-        return k_percent, d_percent
+    def get_rate_info(self, currencies=None):
+        """환율 정보 문자열 반환 (생략하면 추적 중인 모든 통화)"""
+        return " | ".join(self.fx.info(currencies))
+
+# 기존 알림 종류 -> 조건식
+LEGACY_ALERT_EXPRESSIONS = {
+    'golden_cross': 'cross(ma9, ma22)',
+    'dead_cross': 'cross_down(ma9, ma22)'
+}
+
+# 알림 이력 확인에 쓰는 기간 (년)
+REPLAY_YEARS = 10
 
 class AlertManager(QObject):
     """알림 관리 클래스"""
@@ -141,6 +85,7 @@ class AlertManager(QObject):
     def __init__(self):
         super().__init__()
         self.alerts = []
+        self.evaluator = AlertEvaluator()  # 조건식 컴파일 캐시
         self.load_alerts()
     
     def add_alert(self, symbol, alert_type, condition, value):
@@ -163,41 +108,78 @@ class AlertManager(QObject):
             del self.alerts[index]
             self.save_alerts()
     
+    def alert_expression(self, alert):
+        """알림 조건식 (기존 가격/크로스 알림도 같은 조건식으로 변환)"""
+        if alert['type'] == 'expr':
+            return alert['condition']
+        if alert['type'] == 'price':
+            return f"close {'>=' if alert['condition'] == '이상' else '<='} {float(alert['value'])!r}"
+        return LEGACY_ALERT_EXPRESSIONS.get(alert['type'])
+    
+    def watched_symbols(self):
+        """활성 알림이 있는 종목"""
+        return {alert['symbol'] for alert in self.alerts if alert['active']}
+    
     def check_alerts(self, symbol, current_price, indicators):
-        """알림 조건 확인"""
+        """알림 조건 확인 (indicators: 지표가 계산된 DataFrame, 마지막 종가는 current_price로 대체)"""
+        self.check_watchlist({symbol: indicators}, {symbol: current_price})
+    
+    def check_watchlist(self, frames, prices=None):
+        """
+        여러 종목의 알림을 한 번에 확인
+        frames: 종목 -> 지표가 계산된 DataFrame, prices: 종목 -> 현재가 (없으면 마지막 종가)
+        조건식마다 한 번씩 모든 종목에 대해 벡터 연산으로 평가
+        """
+        pending = []
         for alert in self.alerts:
-            if alert['symbol'] == symbol and alert['active']:
-                triggered = False
-                message = ""
-                
-                if alert['type'] == 'price':
-                    if alert['condition'] == '이상' and current_price >= alert['value']:
-                        triggered = True
-                        message = f"{symbol} 현재가({current_price:,.0f})가 목표가({alert['value']:,.0f}) 도달"
-                    elif alert['condition'] == '이하' and current_price <= alert['value']:
-                        triggered = True
-                        message = f"{symbol} 현재가({current_price:,.0f})가 목표가({alert['value']:,.0f}) 도달"
-                
-                elif alert['type'] == 'golden_cross' and 'ma9' in indicators and 'ma22' in indicators:
-                    if len(indicators['ma9']) >= 2:
-                        prev_diff = indicators['ma9'].iloc[-2] - indicators['ma22'].iloc[-2]
-                        curr_diff = indicators['ma9'].iloc[-1] - indicators['ma22'].iloc[-1]
-                        if prev_diff < 0 and curr_diff > 0:
-                            triggered = True
-                            message = f"{symbol} 골든크로스 발생 (9일선이 22일선 상향 돌파)"
-                
-                elif alert['type'] == 'dead_cross' and 'ma9' in indicators and 'ma22' in indicators:
-                    if len(indicators['ma9']) >= 2:
-                        prev_diff = indicators['ma9'].iloc[-2] - indicators['ma22'].iloc[-2]
-                        curr_diff = indicators['ma9'].iloc[-1] - indicators['ma22'].iloc[-1]
-                        if prev_diff > 0 and curr_diff < 0:
-                            triggered = True
-                            message = f"{symbol} 데드크로스 발생 (9일선이 22일선 하향 돌파)"
-                
-                if triggered:
-                    alert['active'] = False  # 한 번만 알림
-                    self.alert_triggered.emit(symbol, message)
-                    self.save_alerts()
+            if not alert['active'] or alert['symbol'] not in frames:
+                continue
+            expression = self.alert_expression(alert)
+            if expression is None:
+                continue
+            try:
+                self.evaluator.compile(expression)
+            except AlertExpressionError as e:
+                print(f"알림 조건식 오류 ({alert['symbol']} {expression}): {e}")
+                continue
+            pending.append((alert, expression))
+        if not pending:
+            return
+        
+        expressions = {expression for _, expression in pending}
+        matrix = IndicatorMatrix.from_frames(frames, lags=self.evaluator.lags(expressions))
+        for symbol, price in (prices or {}).items():
+            if symbol in matrix.positions:
+                matrix.set(symbol, 'close', price)
+        results = self.evaluator.evaluate(expressions, matrix)
+        
+        triggered = []
+        for alert, expression in pending:
+            symbol = alert['symbol']
+            if not results[expression][matrix.positions[symbol]]:
+                continue
+            alert['active'] = False  # 한 번만 알림
+            triggered.append((symbol, self.alert_message(alert, matrix.get(symbol, 'close'))))
+        
+        if triggered:
+            self.save_alerts()
+            for symbol, message in triggered:
+                self.alert_triggered.emit(symbol, message)
+    
+    def replay_alert(self, alert, frames):
+        """알림을 과거 전체 기간에 대해 평가 (replay 결과 DataFrame)"""
+        return replay(self.evaluator.compile(self.alert_expression(alert)), frames)
+    
+    def alert_message(self, alert, current_price):
+        """알림 메시지"""
+        symbol = alert['symbol']
+        if alert['type'] == 'price':
+            return f"{symbol} 현재가({current_price:,.0f})가 목표가({alert['value']:,.0f}) 도달"
+        if alert['type'] == 'golden_cross':
+            return f"{symbol} 골든크로스 발생 (9일선이 22일선 상향 돌파)"
+        if alert['type'] == 'dead_cross':
+            return f"{symbol} 데드크로스 발생 (9일선이 22일선 하향 돌파)"
+        return f"{symbol} 조건 충족: {alert['condition']}"
     
     def save_alerts(self):
         """알림 설정 저장"""
@@ -216,11 +198,12 @@ class AlertManager(QObject):
             self.alerts = []
 
 class Portfolio:
-    """포트폴리오 관리 클래스"""
+    """포트폴리오 관리 클래스 (보유 수량/원가는 로트 장부 기준)"""
     
-    def __init__(self):
+    def __init__(self, lot_method=None):
         self.holdings = {}
         self.transactions = []
+        self.lot_method = lot_method  # 생략하면 STOCK_LOT_METHOD (기본 FIFO)
         self.load_portfolio()
     
     def add_stock(self, symbol, quantity, price, date=None):
@@ -228,102 +211,115 @@ class Portfolio:
         if date is None:
             date = datetime.now()
         
-        if symbol not in self.holdings:
-            self.holdings[symbol] = {
-                'quantity': 0,
-                'avg_price': 0,
-                'total_cost': 0
-            }
-        
-        holding = self.holdings[symbol]
-        total_cost = holding['total_cost'] + (quantity * price)
-        total_quantity = holding['quantity'] + quantity
-        
-        holding['quantity'] = total_quantity
-        holding['avg_price'] = total_cost / total_quantity
-        holding['total_cost'] = total_cost
+        lot_id = self.lots.buy(symbol, quantity, price, date)
+        self.sync_holding(symbol)
         
         transaction = {
             'date': date.isoformat(),
             'symbol': symbol,
             'type': 'buy',
             'quantity': quantity,
-            'price': price
+            'price': price,
+            'lot_id': lot_id
         }
         self.transactions.append(transaction)
         
         self.save_portfolio()
     
-    def sell_stock(self, symbol, quantity, price, date=None):
-        """주식 매도"""
+    def sell_stock(self, symbol, quantity, price, date=None, lot_ids=None):
+        """주식 매도 (로트 매칭 후 실현 손익 기록, lot_ids를 주면 해당 로트부터 매도)"""
         if date is None:
             date = datetime.now()
         
-        if symbol in self.holdings and self.holdings[symbol]['quantity'] >= quantity:
-            holding = self.holdings[symbol]
-            holding['quantity'] -= quantity
-            holding['total_cost'] = holding['quantity'] * holding['avg_price']
-            
-            if holding['quantity'] == 0:
-                del self.holdings[symbol]
-            
-            transaction = {
-                'date': date.isoformat(),
-                'symbol': symbol,
-                'type': 'sell',
+        try:
+            records = self.lots.sell(symbol, quantity, price, date, lot_ids=lot_ids)
+        except ValueError as e:
+            print(f"매도 오류: {e}")
+            return False
+        self.sync_holding(symbol)
+        
+        transaction = {
+            'date': date.isoformat(),
+            'symbol': symbol,
+            'type': 'sell',
+            'quantity': quantity,
+            'price': price,
+            'method': 'specific' if lot_ids else self.lots.method,
+            'realized': sum(record['pnl'] for record in records)
+        }
+        if lot_ids:
+            transaction['lot_ids'] = lot_ids
+        self.transactions.append(transaction)
+        
+        self.save_portfolio()
+        return True
+    
+    def sync_holding(self, symbol):
+        """로트 장부의 보유 수량/원가를 holdings에 반영"""
+        quantity, total_cost, avg_price = self.lots.position(symbol)
+        if quantity == 0:
+            self.holdings.pop(symbol, None)
+        else:
+            self.holdings[symbol] = {
                 'quantity': quantity,
-                'price': price
+                'avg_price': avg_price,
+                'total_cost': total_cost
             }
-            self.transactions.append(transaction)
-            
-            self.save_portfolio()
-            return True
-        return False
+    
+    def realized_pnl(self, symbol=None, start=None, end=None):
+        """실현 손익 (종목 통화, 매도일 구간, 종목 생략하면 전체 종목 합)"""
+        return self.lots.realized_pnl(symbol, start, end)
     
     def calculate_returns(self, current_prices, exchange_manager):
-        """수익률 계산 (환율 적용)"""
-        results = {}
-        total_cost_krw = 0
-        total_value_krw = 0
+        """수익률 계산 (종목별 통화의 환율을 적용해 보유 종목 전체를 한 번에 원화 환산)"""
+        symbols = [symbol for symbol in self.holdings if symbol in current_prices]
+        currencies = np.array([currency_of(symbol) for symbol in symbols], dtype=object)
+        exchange_manager.fx.track(set(currencies), background=True)
+        
+        quantity = np.array([self.holdings[symbol]['quantity'] for symbol in symbols], dtype=np.float64)
+        total_cost = np.array([self.holdings[symbol]['total_cost'] for symbol in symbols], dtype=np.float64)
+        current_price = np.array([current_prices[symbol] for symbol in symbols], dtype=np.float64)
+        current_value = quantity * current_price
+        profit = current_value - total_cost
+        profit_rate = np.divide(profit, total_cost, out=np.zeros(len(symbols)), where=total_cost > 0) * 100
+        
+        # 환율 적용 (통화 종류마다 환율을 한 번만 조회)
+        factors = exchange_manager.fx.factors(currencies)
+        current_value_krw = current_value * factors
+        total_cost_krw = float((total_cost * factors).sum())
+        total_value_krw = float(current_value_krw.sum())
         
-        for symbol, holding in self.holdings.items():
-            if symbol in current_prices:
-                current_price = current_prices[symbol]
-                current_value = holding['quantity'] * current_price
-                profit = current_value - holding['total_cost']
-                profit_rate = (profit / holding['total_cost']) * 100 if holding['total_cost'] > 0 else 0
-                
-                # 환율 적용
-                is_us_stock = not symbol.isdigit()
-                if is_us_stock:
-                    current_value_krw = exchange_manager.convert_to_krw(current_value)
-                    total_cost_krw += exchange_manager.convert_to_krw(holding['total_cost'])
-                    total_value_krw += current_value_krw
-                else:
-                    current_value_krw = current_value
-                    total_cost_krw += holding['total_cost']
-                    total_value_krw += current_value
-                
-                results[symbol] = {
-                    'quantity': holding['quantity'],
-                    'avg_price': holding['avg_price'],
-                    'current_price': current_price,
-                    'total_cost': holding['total_cost'],
-                    'current_value': current_value,
-                    'current_value_krw': current_value_krw,
-                    'profit': profit,
-                    'profit_rate': profit_rate,
-                    'is_us_stock': is_us_stock
-                }
+        results = {}
+        for i, symbol in enumerate(symbols):
+            holding = self.holdings[symbol]
+            results[symbol] = {
+                'quantity': holding['quantity'],
+                'avg_price': holding['avg_price'],
+                'current_price': current_prices[symbol],
+                'total_cost': holding['total_cost'],
+                'current_value': current_value[i],
+                'current_value_krw': current_value_krw[i],
+                'profit': profit[i],
+                'profit_rate': profit_rate[i],
+                'realized': self.lots.realized_pnl(symbol),
+                'currency': currencies[i]
+            }
         
         total_profit_krw = total_value_krw - total_cost_krw
         total_profit_rate = (total_profit_krw / total_cost_krw) * 100 if total_cost_krw > 0 else 0
         
+        # 실현 손익 (이미 다 판 종목 포함, 현재 환율로 환산)
+        realized_symbols = list(self.lots.realized)
+        realized = np.array([self.lots.realized_pnl(symbol) for symbol in realized_symbols], dtype=np.float64)
+        realized_currencies = np.array([currency_of(symbol) for symbol in realized_symbols], dtype=object)
+        total_realized_krw = float((realized * exchange_manager.fx.factors(realized_currencies)).sum())
+        
         return results, {
             'total_cost_krw': total_cost_krw,
             'total_value_krw': total_value_krw,
             'total_profit_krw': total_profit_krw,
-            'total_profit_rate': total_profit_rate
+            'total_profit_rate': total_profit_rate,
+            'total_realized_krw': total_realized_krw
         }
     
     def save_portfolio(self):
@@ -339,7 +335,7 @@ class Portfolio:
             print(f"포트폴리오 저장 오류: {e}")
     
     def load_portfolio(self):
-        """포트폴리오 로드"""
+        """포트폴리오 로드 (거래 내역으로 로트 장부 재구성)"""
         try:
             with open('portfolio.json', 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -348,70 +344,72 @@ class Portfolio:
         except:
             self.holdings = {}
             self.transactions = []
-
-class StockDataFetcher:
-    """실시간 주가 데이터를 가져오는 클래스"""
-    
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-    
-    def fetch_from_yahoo(self, symbol, period='1y'):
-        """Yahoo Finance에서 데이터 가져오기"""
+        
         try:
-            if symbol.isdigit():  # 한국 종목코드인 경우
-                ticker_symbol = f"{symbol}.KS"
-                ticker = yf.Ticker(ticker_symbol)
-                hist = ticker.history(period=period)
-                if hist.empty:
-                    ticker_symbol = f"{symbol}.KQ"
-                    ticker = yf.Ticker(ticker_symbol)
-                    hist = ticker.history(period=period)
-            else:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=period)
-            
-            if not hist.empty:
-                hist = hist.rename(columns={
-                    'Open': 'open',
-                    'High': 'high',
-                    'Low': 'low',
-                    'Close': 'close',
-                    'Volume': 'volume'
-                })
-                return hist[['open', 'high', 'low', 'close', 'volume']]
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"Yahoo Finance 오류: {e}")
-            return None
-
-class DataFetchThread(QThread):
-    """데이터 수집을 위한 별도 스레드"""
-    finished = pyqtSignal(object)
-    progress = pyqtSignal(str)
-    error = pyqtSignal(str)
-    
-    def __init__(self, symbol, years):
-        super().__init__()
-        self.symbol = symbol
-        self.years = years
-        self.fetcher = StockDataFetcher()
+            migrated = self.migrate_transactions()
+        except ValueError as e:
+            # 변환 결과가 맞지 않으면 파일은 그대로 두고 화면에만 반영
+            print(f"포트폴리오 변환 검증 오류: {e}")
+            migrated = False
+        self.lots = LotBook.from_transactions(self.transactions, self.lot_method)
+        for symbol in set(self.holdings) | set(self.lots.positions):
+            self.sync_holding(symbol)
+        if migrated:
+            # 이전 형식 파일은 덮어쓰기 전에 보관
+            try:
+                shutil.copyfile('portfolio.json', 'portfolio.json.bak')
+            except OSError as e:
+                print(f"포트폴리오 백업 오류: {e}")
+                return
+            self.save_portfolio()
     
-    def run(self):
-        try:
-            self.progress.emit("Yahoo Finance에서 데이터 수집 중...")
-            data = self.fetcher.fetch_from_yahoo(self.symbol, f"{self.years}y")
-            
-            if data is not None and not data.empty:
-                self.finished.emit(data)
-            else:
-                self.error.emit("데이터를 가져올 수 없습니다.")
-                
-        except Exception as e:
-            self.error.emit(str(e))
+    def migrate_transactions(self):
+        """
+        이전 형식 거래 내역 보완 (변경했으면 True)
+        - 로트 번호가 없는 매수에 순서대로 번호 부여
+        - 거래 내역보다 많이 보유한 수량은 평균 단가의 기초 잔고 매수로 맨 앞에 추가
+        - 매칭 방식이 없는 매도(평균 단가 방식 시절)는 그때의 평균 단가로 매칭 ('average')
+          -> 실현 손익의 원가와 남은 로트 원가의 합이 실제 매수 금액과 같음 (check_balance로 확인)
+        """
+        migrated = False
+        next_id = max((t['lot_id'] for t in self.transactions
+                       if t['type'] == 'buy' and isinstance(t.get('lot_id'), int)), default=0) + 1
+        for transaction in self.transactions:
+            if transaction['type'] == 'buy' and 'lot_id' not in transaction:
+                transaction['lot_id'] = next_id
+                next_id += 1
+                migrated = True
+        
+        net = defaultdict(int)
+        for transaction in self.transactions:
+            net[transaction['symbol']] += transaction['quantity'] * (1 if transaction['type'] == 'buy' else -1)
+        first_date = self.transactions[0]['date'] if self.transactions else datetime.now().isoformat()
+        opening = []
+        for symbol, holding in self.holdings.items():
+            surplus = holding['quantity'] - net[symbol]
+            if surplus > 0:
+                opening.append({
+                    'date': first_date,
+                    'symbol': symbol,
+                    'type': 'buy',
+                    'quantity': surplus,
+                    'price': holding['avg_price'],
+                    'lot_id': next_id,
+                    'note': '기초 잔고'
+                })
+                next_id += 1
+        if opening:
+            self.transactions[:0] = opening
+            migrated = True
+        
+        for transaction in self.transactions:
+            if transaction['type'] == 'sell' and 'method' not in transaction:
+                transaction['method'] = 'average'
+                migrated = True
+        
+        if migrated:
+            LotBook.from_transactions(self.transactions, self.lot_method).check_balance()
+        return migrated
 
 class StockAnalyzer(QMainWindow, form_class):
     def __init__(self):
@@ -583,14 +581,8 @@ class StockAnalyzer(QMainWindow, form_class):
             }
         """)
         
-        # MySQL 연결 설정 (인증 플러그인 오류 해결)
-        self.db_config = {
-            'host': 'localhost',
-            'user': 'root',
-            'password': 'your_password',
-            'database': 'stock_db',
-            'auth_plugin': 'mysql_native_password'  # 인증 플러그인 명시
-        }
+        # MySQL 연결 설정 (인증 플러그인 오류 해결, STOCK_DB_* 환경변수로 변경 가능)
+        self.db_config = dict(DB_CONFIG)
         
         # 관리자 객체 초기화
         self.alert_manager = AlertManager()
@@ -598,6 +590,18 @@ class StockAnalyzer(QMainWindow, form_class):
         self.exchange_manager = ExchangeRateManager()
         self.current_prices = {}
         self.currency_symbols = {}  # 통화 기호 저장
+        self.scheduler = FetchScheduler(max_workers=4)  # 데이터 수집 작업 (중복 요청 병합, 우선순위)
+        self.indicator_params = dict(DEFAULT_INDICATOR_PARAMS)  # 지표 설정값 (최적화 결과 적용 가능)
+        self.session_cache = SessionCache(params=self.indicator_params)  # 분석한 종목 캐시 (메모리 예산 내 LRU)
+        self.pyramid = None  # 현재 종목의 주봉/월봉 피라미드
+        self.chart_lines = {}  # 화면에 표시된 차트의 선 (실시간/꼬리 갱신 대상)
+        self.chart_series = {}  # 화면에 표시된 차트의 캔들/막대 묶음
+        self.chart_fills = {}  # 화면에 표시된 차트의 채운 영역 (볼린저 밴드, RSI 기준 구간)
+        self.chart_renderer = ChartRenderer()  # 차트 렌더링 스레드 (최신 요청 결과만 화면에 반영)
+        self.deferred_runs = {}  # 차트 렌더링을 기다리는 계측 실행 ID -> 상태바 메시지
+        
+        # 종목코드 접미사 캐시 초기화 (stocks.market 기준, DB 연결 대기로 창이 멈추지 않도록 작업 스레드에서)
+        threading.Thread(target=self.seed_symbol_resolver, daemon=True).start()
         
         # UI 요소 초기화
         self.init_ui()
@@ -618,11 +622,33 @@ class StockAnalyzer(QMainWindow, form_class):
         # 년도 선택 콤보박스 초기화
         self.cmbYears.addItems(['1년', '2년', '3년', '5년', '10년'])
         
+        # 봉 주기 선택 (자동: 기간이 길면 주봉/월봉으로 그림)
+        self.cmbTimeframe = QComboBox()
+        self.cmbTimeframe.addItems(['자동'] + [LEVEL_NAMES[level] for level in LEVELS])
+        self.cmbTimeframe.setToolTip("자동이면 긴 기간은 주봉/월봉으로 집계해 그립니다")
+        index = self.horizontalLayout.indexOf(self.cmbYears) + 1
+        self.horizontalLayout.insertWidget(index, QLabel("봉:"))
+        self.horizontalLayout.insertWidget(index + 1, self.cmbTimeframe)
+        
         # 메인 차트 Figure 설정
         self.figure = Figure(figsize=(14, 10), facecolor='#0a0e27')
         self.canvas = FigureCanvas(self.figure)
         self.chartLayout.addWidget(self.canvas)
         
+        # 실시간 차트 (초당 최대 4회 블리팅)
+        self.live_chart = LiveChart(self.canvas, fps=4)
+        
+        # 캔들/거래량 표시 (기술적 지표 체크박스 앞)
+        self.chkCandle = QCheckBox("캔들")
+        self.chkVolume = QCheckBox("거래량")
+        index = self.horizontalLayout.indexOf(self.chkRSI)
+        self.horizontalLayout.insertWidget(index, self.chkCandle)
+        self.horizontalLayout.insertWidget(index + 1, self.chkVolume)
+        self.quote_poller = None
+        self.chkLive = QCheckBox("실시간")
+        self.chkLive.setToolTip("현재 종목의 시세를 주기적으로 받아 마지막 봉과 지표를 갱신합니다")
+        self.horizontalLayout.insertWidget(self.horizontalLayout.indexOf(self.chkStochastic) + 1, self.chkLive)
+        
         # 포트폴리오 차트 설정
         self.portfolio_figure = Figure(figsize=(8, 6), facecolor='#0a0e27')
         self.portfolio_canvas = FigureCanvas(self.portfolio_figure)
@@ -639,6 +665,11 @@ class StockAnalyzer(QMainWindow, form_class):
         # 알림 테이블
         self.alertTable.setColumnCount(5)
         self.alertTable.setHorizontalHeaderLabels(['종목', '유형', '조건', '값', '상태'])
+        self.btnReplayAlert = QPushButton("이력 확인")
+        self.btnReplayAlert.setToolTip(f"선택한 알림이 최근 {REPLAY_YEARS}년 동안 울렸을 날짜를 확인합니다")
+        self.btnReplayAlert.setMinimumSize(120, 40)
+        alert_buttons = self.btnRemoveAlert.parentWidget().layout()
+        alert_buttons.insertWidget(alert_buttons.indexOf(self.btnRemoveAlert) + 1, self.btnReplayAlert)
         
         # 포트폴리오 테이블
         self.portfolioTable.setColumnCount(8)
@@ -656,13 +687,47 @@ class StockAnalyzer(QMainWindow, form_class):
         self.statusBar().addPermanentWidget(self.exchange_label)
         
         # 알림 타입 콤보박스
-        self.cmbAlertType.addItems(['가격 알림', '골든크로스', '데드크로스'])
+        self.cmbAlertType.addItems(['가격 알림', '골든크로스', '데드크로스', '조건식'])
+        
+        # 진단 탭 (구간별 소요 시간)
+        self.tabDiagnostics = QWidget()
+        diag_layout = QVBoxLayout(self.tabDiagnostics)
+        diag_top = QHBoxLayout()
+        diag_top.addWidget(QLabel("실행:"))
+        self.cmbProfileRun = QComboBox()
+        self.cmbProfileRun.setMinimumWidth(300)
+        diag_top.addWidget(self.cmbProfileRun)
+        diag_top.addStretch()
+        self.btnExportTrace = QPushButton("트레이스 내보내기")
+        self.btnClearProfile = QPushButton("기록 초기화")
+        diag_top.addWidget(self.btnExportTrace)
+        diag_top.addWidget(self.btnClearProfile)
+        diag_layout.addLayout(diag_top)
+        
+        self.diagnosticsTable = QTableWidget()
+        self.diagnosticsTable.setColumnCount(5)
+        self.diagnosticsTable.setHorizontalHeaderLabels(['구간', '분류', '시작(ms)', '소요(ms)', '스레드'])
+        self.diagnosticsTable.horizontalHeader().setStretchLastSection(True)
+        diag_layout.addWidget(self.diagnosticsTable)
+        
+        # 세션 캐시 항목별 크기
+        self.lblSessionCache = QLabel("")
+        diag_layout.addWidget(self.lblSessionCache)
+        self.sessionCacheTable = QTableWidget()
+        self.sessionCacheTable.setColumnCount(7)
+        self.sessionCacheTable.setHorizontalHeaderLabels(['종목', '기간', '행', '계산된 지표', '크기(KB)', '사용', '경과(초)'])
+        self.sessionCacheTable.horizontalHeader().setStretchLastSection(True)
+        self.sessionCacheTable.setMaximumHeight(200)
+        diag_layout.addWidget(self.sessionCacheTable)
+        self.tabWidget.addTab(self.tabDiagnostics, "진단")
         
         # 기술적 지표 체크박스
         self.chkRSI.setChecked(True)
         self.chkMACD.setChecked(True)
         self.chkBollinger.setChecked(True)
         self.chkStochastic.setChecked(True)
+        self.chkCandle.setChecked(True)
+        self.chkVolume.setChecked(True)
         
         # 버튼 색상 설정
         self.btnAnalyze.setStyleSheet("""
@@ -695,15 +760,23 @@ class StockAnalyzer(QMainWindow, form_class):
         self.btnSaveData.clicked.connect(self.save_to_db)
         self.btnAddAlert.clicked.connect(self.add_alert)
         self.btnRemoveAlert.clicked.connect(self.remove_alert)
+        self.btnReplayAlert.clicked.connect(self.replay_alert)
         self.btnAddPortfolio.clicked.connect(self.add_to_portfolio)
         self.btnSellPortfolio.clicked.connect(self.sell_from_portfolio)
         self.btnRefreshPortfolio.clicked.connect(self.refresh_portfolio)
+        self.btnExportTrace.clicked.connect(self.export_profile_trace)
+        self.btnClearProfile.clicked.connect(self.clear_profile)
+        self.cmbProfileRun.currentIndexChanged.connect(self.show_profile_run)
         
         # 체크박스 시그널 연결 (실시간 차트 업데이트)
         self.chkRSI.stateChanged.connect(self.update_chart)
         self.chkMACD.stateChanged.connect(self.update_chart)
         self.chkBollinger.stateChanged.connect(self.update_chart)
         self.chkStochastic.stateChanged.connect(self.update_chart)
+        self.chkCandle.stateChanged.connect(self.update_chart)
+        self.chkVolume.stateChanged.connect(self.update_chart)
+        self.chkLive.toggled.connect(self.toggle_live_mode)
+        self.cmbTimeframe.currentIndexChanged.connect(self.update_chart)
         
         # 알림 시그널
         self.alert_manager.alert_triggered.connect(self.show_alert_notification)
@@ -718,29 +791,21 @@ class StockAnalyzer(QMainWindow, form_class):
         self.exchange_manager.update_exchange_rate()
         self.exchange_label.setText(self.exchange_manager.get_rate_info())
     
-    def is_us_stock(self, symbol):
-        """미국 주식 여부 확인"""
-        return not symbol.isdigit()
+    def is_foreign_stock(self, symbol):
+        """원화가 아닌 통화로 거래되는 종목인지 확인"""
+        return currency_of(symbol) != BASE_CURRENCY
     
     def get_currency_symbol(self, symbol):
-        """통화 기호 반환"""
-        if self.is_us_stock(symbol):
-            return '$', 'USD'
-        else:
-            return '₩', 'KRW'
+        """통화 기호와 코드 반환"""
+        currency_code = currency_of(symbol)
+        return currency_symbol(currency_code), currency_code
     
     def format_price(self, price, symbol, convert_to_krw=False):
-        """가격 포맷팅"""
-        currency, currency_code = self.get_currency_symbol(symbol)
-        
-        if currency == '$':
-            if convert_to_krw:
-                krw_price = self.exchange_manager.convert_to_krw(price)
-                return f"₩{krw_price:,.0f}"
-            else:
-                return f"{currency}{price:,.2f}"
-        else:
-            return f"{currency}{price:,.0f}"
+        """가격 포맷팅 (통화별 기호/자릿수)"""
+        currency_code = currency_of(symbol)
+        if convert_to_krw and currency_code != BASE_CURRENCY:
+            return format_amount(self.exchange_manager.convert_to_krw(price, currency_code), BASE_CURRENCY)
+        return format_amount(price, currency_code)
     
     def connect_db(self):
         """MySQL 데이터베이스 연결"""
@@ -760,6 +825,20 @@ class StockAnalyzer(QMainWindow, form_class):
                 QMessageBox.critical(self, "DB 연결 오류", f"데이터베이스 연결 실패: {err}")
             return False
     
+    def seed_symbol_resolver(self):
+        """stocks 테이블의 시장 구분으로 접미사 캐시 초기화 (작업 스레드, DB 연결 실패 시 건너뜀)"""
+        try:
+            conn = mysql.connector.connect(connection_timeout=2, **self.db_config)
+        except Exception:
+            return
+        
+        try:
+            get_symbol_resolver().seed_from_db(conn)
+        except Exception as e:
+            print(f"접미사 캐시 초기화 오류: {e}")
+        finally:
+            conn.close()
+    
     def create_tables_if_not_exists(self):
         """필요한 테이블이 없으면 생성"""
         try:
@@ -791,6 +870,22 @@ class StockAnalyzer(QMainWindow, form_class):
                 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
             """)
             
+            # stock_prices_intraday 테이블 (분봉, ts는 UTC)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_prices_intraday (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    symbol VARCHAR(20) NOT NULL,
+                    bar_interval VARCHAR(4) NOT NULL,
+                    ts DATETIME NOT NULL,
+                    open_price DECIMAL(10, 2),
+                    high_price DECIMAL(10, 2),
+                    low_price DECIMAL(10, 2),
+                    close_price DECIMAL(10, 2) NOT NULL,
+                    volume BIGINT,
+                    UNIQUE KEY unique_symbol_interval_ts (symbol, bar_interval, ts)
+                ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+            """)
+            
             self.conn.commit()
         except Exception as e:
             print(f"테이블 생성 오류: {e}")
@@ -805,216 +900,547 @@ class StockAnalyzer(QMainWindow, form_class):
         years_text = self.cmbYears.currentText()
         years = int(years_text.replace('년', ''))
         
-        # UI 비활성화
-        self.btnAnalyze.setEnabled(False)
+        # 진행 중인 이전 분석은 새 요청으로 대체 (결과 무시)
+        if self.scheduler.is_pending('analysis'):
+            profiler.end_run(self.analysis_run)
+        
+        # 구간 계측 시작
+        self.analysis_run = profiler.begin_run(f"분석 {symbol}")
+        
+        # 이미 분석한 종목이면 캐시로 즉시 표시하고, 오래된 경우에만 백그라운드에서 재검증
+        entry = self.session_cache.get((symbol, years))
+        if entry is not None:
+            self.progress_bar.setVisible(False)
+            with profiler.use_run(self.analysis_run), profiler.span('show_cached'):
+                self.show_cached_analysis(entry, symbol, years)
+            
+            if not self.session_cache.is_stale(entry):
+                self.finish_profile_run(self.analysis_run, "캐시에서 표시")
+                return
+            
+            self.statusBar().showMessage("캐시에서 표시 - 최신 데이터 확인 중...")
+            self.scheduler.submit(
+                symbol, years,
+                on_finished=lambda data, run_id=self.analysis_run: self.on_revalidated(data, symbol, years, run_id),
+                on_error=lambda error_msg, run_id=self.analysis_run: self.on_revalidate_error(error_msg, run_id),
+                priority=PRIORITY_INTERACTIVE,
+                group='analysis',
+                run_id=self.analysis_run
+            )
+            return
+        
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)
         
-        # 데이터 수집 스레드 시작
-        self.data_thread = DataFetchThread(symbol, years)
-        self.data_thread.finished.connect(lambda data: self.on_data_fetched(data, symbol))
-        self.data_thread.progress.connect(self.statusBar().showMessage)
-        self.data_thread.error.connect(self.on_fetch_error)
-        self.data_thread.start()
+        # 데이터 수집 요청 (대화형 분석은 백그라운드 갱신보다 먼저 실행)
+        self.scheduler.submit(
+            symbol, years,
+            on_finished=lambda data: self.on_data_fetched(data, symbol, years),
+            on_error=self.on_fetch_error,
+            on_progress=self.statusBar().showMessage,
+            priority=PRIORITY_INTERACTIVE,
+            group='analysis',
+            run_id=self.analysis_run
+        )
     
-    def on_data_fetched(self, data, symbol):
+    def on_data_fetched(self, data, symbol, years=None):
         """데이터 수집 완료 처리"""
         self.progress_bar.setVisible(False)
-        self.btnAnalyze.setEnabled(True)
         
         if data is not None:
             self.statusBar().showMessage("데이터 수집 완료")
-            self.process_data(data, symbol)
+            run_id = getattr(self, 'analysis_run', None)
+            with profiler.use_run(run_id), profiler.span('on_data_fetched'):
+                self.process_data(data, symbol)
+                self.current_key = (symbol, years)
+                if years is not None:
+                    entry = self.session_cache.put(self.current_key, data, self.df)
+                    entry.pyramid = self.pyramid
+                self.after_analysis(symbol)
             
-            # 현재가 업데이트
-            self.current_prices[symbol] = data['close'].iloc[-1]
+            self.finish_profile_run(run_id)
             
-            # 알림 확인
-            indicators = {
-                'ma9': self.df['ma9'],
-                'ma22': self.df['ma22']
-            }
-            self.alert_manager.check_alerts(symbol, self.current_prices[symbol], indicators)
+            # 실시간 모드이면 새로 분석한 종목으로 전환
+            if self.chkLive.isChecked():
+                self.start_live_mode()
+    
+    def after_analysis(self, symbol):
+        """분석 결과 표시 후 현재가 갱신 및 알림 확인"""
+        # 현재가 업데이트 (외화 종목이면 해당 통화 환율도 갱신 대상에 추가)
+        self.current_prices[symbol] = self.df['close'].iloc[-1]
+        self.exchange_manager.fx.track([currency_of(symbol)], background=True)
+        
+        # 알림 확인
+        with profiler.span('check_alerts'):
+            self.alert_manager.check_alerts(symbol, self.current_prices[symbol], self.df)
+    
+    def show_cached_analysis(self, entry, symbol, years):
+        """캐시된 분석 결과 즉시 표시 (계산되지 않은 지표만 계산)"""
+        with profiler.span('session_cache.frame', rows=len(entry), cached_indicators=len(entry.indicators)):
+            self.df = self.session_cache.frame(entry)
+        self.current_symbol = symbol
+        self.current_key = (symbol, years)
+        self.pyramid = entry.pyramid
+        
+        self.render_analysis(symbol)
+        entry.pyramid = self.pyramid  # 이번에 만든 피라미드는 캐시 항목과 함께 보관
+        self.after_analysis(symbol)
+        
+        if self.chkLive.isChecked():
+            self.start_live_mode()
+    
+    def on_revalidated(self, data, symbol, years, run_id):
+        """
+        백그라운드 재검증 결과 반영 (바뀐 꼬리 구간만 차트/테이블에 적용)
+        run_id: 재검증을 요청한 분석의 계측 실행 (그 사이 시작된 다른 분석과 구분)
+        """
+        key = (symbol, years)
+        entry = self.session_cache.get(key)
+        
+        # 그 사이 다른 종목으로 이동했으면 캐시만 갱신
+        if entry is None or getattr(self, 'current_key', None) != key:
+            self.session_cache.put(key, data)
+            profiler.end_run(run_id)
+            return
+        
+        start = entry.changed_from(data)
+        if start is None:
+            self.session_cache.touch(entry)
+            self.finish_profile_run(run_id, "최신 데이터와 동일")
+            return
+        
+        with profiler.use_run(run_id), profiler.span('apply_tail', rows=len(data) - start):
+            pyramid = self.pyramid
+            self.compute_analysis(data, symbol)
+            
+            # 주봉/월봉은 바뀐 날짜가 속한 구간부터만 다시 집계
+            chart_start = start
+            if pyramid is not None:
+                with profiler.span('pyramid.update'):
+                    changes = pyramid.update(data, start)
+                self.pyramid = pyramid
+                chart_start = changes.get(self.chart_level, start)
+            
+            if start > 0:
+                # 겹치는 날짜가 있으면 기존 선/막대/행에 반영 (새 거래일로 기간 창이 밀렸으면 x 위치도 갱신)
+                with profiler.span('update_chart_tail', 'render'):
+                    self.update_chart_tail(symbol, chart_start)
+                with profiler.span('update_table'):
+                    self.update_table(changed_from=start)
+            else:
+                with profiler.span('plot_charts'):
+                    self.plot_charts(symbol)
+                with profiler.span('update_table'):
+                    self.update_table()
+            self.show_statistics()
+            self.show_technical_indicators()
+            
+            entry = self.session_cache.put(key, data, self.df)
+            entry.pyramid = self.pyramid
+            self.after_analysis(symbol)
+            if self.quote_poller is not None:
+                self.live_indicators = IncrementalIndicators(self.df, self.indicator_params)
+        
+        self.finish_profile_run(run_id, f"최신 데이터 반영 ({len(data) - start}행)")
+    
+    def on_revalidate_error(self, error_msg, run_id):
+        """재검증 실패 (캐시된 결과는 그대로 표시)"""
+        if run_id:
+            profiler.end_run(run_id)
+            self.update_diagnostics()
+        self.statusBar().showMessage(f"최신 데이터 확인 실패 - 캐시된 결과 표시 중 ({error_msg})")
     
     def on_fetch_error(self, error_msg):
         """데이터 수집 오류 처리"""
         self.progress_bar.setVisible(False)
-        self.btnAnalyze.setEnabled(True)
         self.statusBar().showMessage("데이터 수집 실패")
+        if getattr(self, 'analysis_run', None):
+            profiler.end_run(self.analysis_run)
+            self.update_diagnostics()
         QMessageBox.critical(self, "오류", f"데이터 수집 실패: {error_msg}")
     
     def process_data(self, data, symbol):
         """데이터 처리 및 표시"""
+        self.compute_analysis(data, symbol)
+        self.render_analysis(symbol)
+    
+    def compute_analysis(self, data, symbol):
+        """이동평균/기술적 지표 계산 (self.df 교체, 최적화/알림과 같은 calculate_all 사용)"""
         self.df = data.copy()
         self.current_symbol = symbol
+        self.pyramid = None  # 새 일봉이면 주봉/월봉은 필요할 때 다시 집계
         
-        # 이동평균 계산
-        self.df['ma9'] = self.df['close'].rolling(window=9).mean()
-        self.df['ma22'] = self.df['close'].rolling(window=22).mean()
-        
-        # 변동률 계산
-        self.df['change_pct'] = self.df['close'].pct_change() * 100
-        
-        # 기술적 지표 계산
-        self.calculate_technical_indicators()
-        
+        with profiler.span('calculate_technical_indicators'):
+            calculate_all(self.df, self.indicator_params)
+    
+    def render_analysis(self, symbol):
+        """분석 결과 표시 (차트, 테이블, 통계, 지표)"""
         # 차트 그리기
-        self.plot_charts(symbol)
+        with profiler.span('plot_charts'):
+            self.plot_charts(symbol)
         
         # 테이블 업데이트
-        self.update_table()
+        with profiler.span('update_table'):
+            self.update_table()
         
         # 통계 정보 표시
-        self.show_statistics()
+        with profiler.span('show_statistics'):
+            self.show_statistics()
         
         # 기술적 지표 표시
-        self.show_technical_indicators()
-    
-    def calculate_technical_indicators(self):
-        """기술적 지표 계산"""
-        # RSI
-        self.df['rsi'] = TechnicalIndicators.calculate_rsi(self.df['close'])
-        
-        # MACD
-        macd, signal, histogram = TechnicalIndicators.calculate_macd(self.df['close'])
-        self.df['macd'] = macd
-        self.df['macd_signal'] = signal
-        self.df['macd_histogram'] = histogram
-        
-        # 볼린저 밴드
-        upper, middle, lower = TechnicalIndicators.calculate_bollinger_bands(self.df['close'])
-        self.df['bb_upper'] = upper
-        self.df['bb_middle'] = middle
-        self.df['bb_lower'] = lower
-        
-        # 스토캐스틱 (high, low 데이터가 있는 경우)
-        if 'high' in self.df.columns and 'low' in self.df.columns:
-            k, d = TechnicalIndicators.calculate_stochastic(
-                self.df['high'], self.df['low'], self.df['close']
-            )
-            self.df['stoch_k'] = k
-            self.df['stoch_d'] = d
+        with profiler.span('show_technical_indicators'):
+            self.show_technical_indicators()
+    
+    def finish_profile_run(self, run_id, message="분석 완료"):
+        """계측 실행 종료 후 상태바/진단 탭 갱신"""
+        if run_id is None:
+            return
+        if run_id in self.chart_renderer.pending_runs():
+            # 차트 렌더링이 끝난 뒤 요약 (렌더링 스레드 구간 포함)
+            self.deferred_runs[run_id] = message
+            return
+        profiler.end_run(run_id)
+        labels = {
+            'fetch': '수집',
+            'calculate_technical_indicators': '지표',
+            'plot_charts': '차트',
+            'render_main': '렌더링',
+            'tight_layout': '레이아웃',
+            'update_table': '테이블',
+            'calculate_returns': '수익률',
+            'update_portfolio_chart': '차트',
+            'render_portfolio': '렌더링'
+        }
+        summary = profiler.format_summary(run_id, names=list(labels.keys()), labels=labels)
+        self.statusBar().showMessage(f"{message} - {summary}")
+        self.update_diagnostics()
+    
+    def flush_profile_runs(self):
+        """차트 렌더링을 기다리던 계측 실행 중 더 기다릴 결과가 없는 실행 마무리"""
+        pending = self.chart_renderer.pending_runs()
+        for run_id, message in list(self.deferred_runs.items()):
+            if run_id not in pending:
+                del self.deferred_runs[run_id]
+                self.finish_profile_run(run_id, message)
+    
+    def update_diagnostics(self):
+        """진단 탭 실행 목록 갱신 (최신 실행 선택)"""
+        self.cmbProfileRun.blockSignals(True)
+        self.cmbProfileRun.clear()
+        for run in reversed(profiler.runs):
+            total = ''
+            if run['end'] is not None:
+                total = f" - {(run['end'] - run['start']) * 1000:,.0f}ms"
+            self.cmbProfileRun.addItem(f"#{run['id']} {run['name']}{total}", run['id'])
+        self.cmbProfileRun.blockSignals(False)
+        self.show_profile_run()
+        self.update_session_cache_view()
+    
+    def update_session_cache_view(self):
+        """세션 캐시 항목별 크기 표시"""
+        cache = self.session_cache
+        self.lblSessionCache.setText(
+            f"세션 캐시: {len(cache.entries)}개 종목, {cache.total_bytes() / 1024 / 1024:,.1f}MB / "
+            f"{cache.budget / 1024 / 1024:,.0f}MB (제거 {cache.evictions}회)"
+        )
+        stats = cache.stats()
+        self.sessionCacheTable.setRowCount(len(stats))
+        for i, item in enumerate(stats):
+            values = [item['symbol'], f"{item['years']}년", f"{item['rows']:,}", str(item['indicators']),
+                      f"{item['bytes'] / 1024:,.1f}", str(item['hits']), f"{item['age']:,.0f}"]
+            for j, value in enumerate(values):
+                self.sessionCacheTable.setItem(i, j, QTableWidgetItem(value))
+        self.sessionCacheTable.resizeColumnsToContents()
+    
+    def show_profile_run(self):
+        """선택한 실행의 구간별 소요 시간 표시"""
+        run_id = self.cmbProfileRun.currentData()
+        run = profiler.get_run(run_id) if run_id is not None else None
+        if run is None:
+            self.diagnosticsTable.setRowCount(0)
+            return
+        
+        events = profiler.run_events(run_id)
+        self.diagnosticsTable.setRowCount(len(events))
+        for i, event in enumerate(events):
+            offset = (event['start'] - run['start']) * 1000
+            duration = event['dur'] * 1000
+            self.diagnosticsTable.setItem(i, 0, QTableWidgetItem(event['name']))
+            self.diagnosticsTable.setItem(i, 1, QTableWidgetItem(event['cat']))
+            self.diagnosticsTable.setItem(i, 2, QTableWidgetItem(f"{offset:,.1f}"))
+            duration_item = QTableWidgetItem(f"{duration:,.1f}")
+            if duration >= 500:
+                duration_item.setForeground(QColor('#ff6b6b'))
+            self.diagnosticsTable.setItem(i, 3, duration_item)
+            self.diagnosticsTable.setItem(i, 4, QTableWidgetItem(event['thread']))
+        self.diagnosticsTable.resizeColumnsToContents()
+    
+    def export_profile_trace(self):
+        """계측 기록을 Chrome Trace JSON으로 저장"""
+        path, _ = QFileDialog.getSaveFileName(self, "트레이스 저장",
+                                              f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                                              "JSON (*.json)")
+        if not path:
+            return
+        try:
+            profiler.export_chrome_trace(path)
+            QMessageBox.information(self, "내보내기 완료", f"chrome://tracing 또는 Perfetto에서 열 수 있습니다.\n{path}")
+        except Exception as e:
+            QMessageBox.critical(self, "내보내기 오류", f"트레이스 저장 실패: {e}")
+    
+    def clear_profile(self):
+        """계측 기록 초기화"""
+        profiler.clear()
+        self.update_diagnostics()
     
     def update_chart(self):
         """체크박스 변경 시 차트 업데이트"""
         if hasattr(self, 'current_symbol') and hasattr(self, 'df'):
             self.plot_charts(self.current_symbol)
     
-    def plot_charts(self, symbol):
-        """차트 그리기"""
-        self.figure.clear()
-        
-        # 다크 테마 설정
-        plt.style.use('dark_background')
-        self.figure.patch.set_facecolor('#0a0e27')
-        
-        # 서브플롯 설정
-        num_indicators = sum([self.chkRSI.isChecked(), self.chkMACD.isChecked(), 
-                            self.chkStochastic.isChecked() and 'stoch_k' in self.df.columns])
-        
-        if num_indicators > 0:
-            height_ratios = [3] + [1] * num_indicators
-            gs = self.figure.add_gridspec(num_indicators + 1, 1, height_ratios=height_ratios, hspace=0.3)
-            ax1 = self.figure.add_subplot(gs[0])
-            indicator_idx = 1
+    def toggle_live_mode(self, checked):
+        """실시간 체크박스 변경"""
+        if checked:
+            if not hasattr(self, 'df') or not hasattr(self, 'current_symbol'):
+                QMessageBox.warning(self, "실시간", "먼저 종목을 분석해주세요.")
+                self.chkLive.setChecked(False)
+                return
+            self.start_live_mode()
         else:
-            ax1 = self.figure.add_subplot(111)
-        
-        # 축 배경색 설정
-        ax1.set_facecolor('#0a0e27')
+            self.stop_live_mode()
+    
+    def start_live_mode(self):
+        """현재 종목의 시세 조회 시작 (이미 실행 중이면 새 종목으로 재시작)"""
+        self.stop_live_mode(redraw=False)
+        
+        symbol = self.current_symbol
+        self.live_indicators = IncrementalIndicators(self.df, self.indicator_params)
+        self.live_chart.start(self.chart_lines, self.chart_series)
+        
+        self.quote_poller = QuotePoller(symbol)
+        self.quote_poller.quote.connect(self.on_live_quote)
+        self.quote_poller.error.connect(lambda msg: self.statusBar().showMessage(f"실시간 시세 오류: {msg}"))
+        self.quote_poller.start()
+        self.statusBar().showMessage(f"{symbol} 실시간 시세 수신 중...")
+    
+    def stop_live_mode(self, redraw=True):
+        """시세 조회 중단"""
+        if self.quote_poller is not None:
+            self.quote_poller.stop()
+            self.quote_poller.wait(2000)
+            self.quote_poller = None
+        self.live_chart.stop(redraw=redraw)
+    
+    def on_live_quote(self, symbol, quote):
+        """실시간 시세 반영 (당일 봉과 지표의 마지막 값만 갱신)"""
+        if symbol != getattr(self, 'current_symbol', None) or not hasattr(self, 'df'):
+            return
         
-        # 통화 기호 가져오기
-        currency, currency_code = self.get_currency_symbol(symbol)
+        last = self.df.index[-1]
+        day = quote['date']
+        if last.tzinfo is not None:
+            day = day.tz_localize(last.tzinfo)
+        if day.date() < last.date():
+            return
         
-        # 메인 차트 (주가, 이동평균선, 볼린저 밴드)
-        ax1.plot(self.df.index, self.df['close'], label='종가', linewidth=2.5, color='#ffffff')
-        ax1.plot(self.df.index, self.df['ma9'], label='9일 평균', alpha=0.9, color='#ff6b6b', linewidth=2)
-        ax1.plot(self.df.index, self.df['ma22'], label='22일 평균', alpha=0.9, color='#4ecdc4', linewidth=2)
+        columns = ['open', 'high', 'low', 'close', 'volume']
+        with profiler.span('live_update', 'render', symbol=symbol):
+            if day.date() > last.date():
+                # 새 거래일 -> 전날 값을 확정하고 행 추가 후 전체 다시 그리기
+                self.live_indicators.commit(float(self.df['close'].iloc[-1]))
+                row = pd.DataFrame({c: [quote[c]] for c in columns},
+                                   index=pd.DatetimeIndex([day], name=self.df.index.name))
+                self.df = pd.concat([self.df, row])
+                self.live_indicators.update_last(self.df)
+                if self.pyramid is not None:
+                    self.pyramid.update(self.df, len(self.df) - 1)
+                self.plot_charts(symbol)
+            else:
+                self.df.iloc[-1, [self.df.columns.get_loc(c) for c in columns]] = [quote[c] for c in columns]
+                values = self.live_indicators.update_last(self.df)
+                if self.chart_level != 'D':
+                    # 주봉/월봉 차트는 마지막 구간만 다시 집계해 꼬리 갱신
+                    changes = self.get_pyramid().update(self.df, len(self.df) - 1)
+                    self.update_chart_tail(symbol, changes[self.chart_level])
+                elif self.chart_renderer.is_pending('main'):
+                    # 그리는 중인 차트는 아직 화면에 없으므로 최신 값으로 다시 요청
+                    self.plot_charts(symbol)
+                else:
+                    values.update({c: quote[c] for c in columns})
+                    self.live_chart.update_last(values)
+            
+            self.current_prices[symbol] = quote['close']
+            self.show_technical_indicators()
+            self.alert_manager.check_alerts(symbol, quote['close'], self.df)
         
-        if self.chkBollinger.isChecked():
-            ax1.plot(self.df.index, self.df['bb_upper'], '--', alpha=0.6, color='#95e1d3', label='볼린저 상단', linewidth=1.5)
-            ax1.plot(self.df.index, self.df['bb_lower'], '--', alpha=0.6, color='#f38181', label='볼린저 하단', linewidth=1.5)
-            ax1.fill_between(self.df.index, self.df['bb_upper'], self.df['bb_lower'], alpha=0.05, color='#dfe6e9')
+        self.statusBar().showMessage(
+            f"{symbol} 실시간 {quote['time'].strftime('%H:%M')} - {self.format_price(quote['close'], symbol)}"
+        )
+    
+    def closeEvent(self, event):
+        """종료 시 실시간 조회/수집 작업 정리"""
+        self.stop_live_mode(redraw=False)
+        self.scheduler.shutdown()
+        self.chart_renderer.shutdown()
+        super().closeEvent(event)
+    
+    def selected_chart_level(self):
+        """봉 주기 선택값 (자동이면 현재 기간의 일봉 수로 결정)"""
+        index = self.cmbTimeframe.currentIndex()
+        if index <= 0:
+            return choose_level(len(self.df))
+        return LEVELS[index - 1]
+    
+    def get_pyramid(self):
+        """현재 종목의 주봉/월봉 피라미드 (종목별로 한 번만 집계)"""
+        if self.pyramid is None:
+            with profiler.span('pyramid.build', rows=len(self.df)):
+                self.pyramid = ResamplePyramid(self.df, self.indicator_params)
+        return self.pyramid
+    
+    def chart_frame(self):
+        """차트에 그릴 프레임 (일봉이면 self.df, 아니면 주기별 봉과 지표)"""
+        if self.chart_level == 'D':
+            return self.df
+        return self.get_pyramid().frame(self.chart_level)
+    
+    def plot_charts(self, symbol, background=True):
+        """
+        차트 그리기 (기간이 길면 주봉/월봉으로 집계한 봉과 그 주기의 지표 사용)
+        background=True이면 Figure 구성과 래스터화는 렌더링 스레드에서 하고, 끝나면 화면만 교체
+        """
+        self.chart_level = self.selected_chart_level()
+        df = self.chart_frame().copy()  # 렌더링 중 실시간 시세로 바뀌지 않도록 복사
+        
+        # 위젯 상태는 GUI 스레드에서 미리 읽어 둠
+        options = {
+            'unit': LEVEL_UNITS[self.chart_level],
+            'candle': self.chkCandle.isChecked(),
+            'volume': self.chkVolume.isChecked(),
+            'rsi': self.chkRSI.isChecked(),
+            'macd': self.chkMACD.isChecked(),
+            'bollinger': self.chkBollinger.isChecked(),
+            'stochastic': self.chkStochastic.isChecked(),
+            'currency': self.get_currency_symbol(symbol)[0],
+            'title': self.chart_title_text(symbol),
+            'live': self.live_chart.running
+        }
+        self.submit_render('main', self.canvas, lambda figure: self.build_charts(figure, df, options),
+                           self.on_charts_rendered, background)
+    
+    @staticmethod
+    def build_charts(figure, df, options):
+        """
+        가격/지표 차트 구성 (렌더링 스레드에서 호출되므로 위젯에 접근하지 않음)
+        반환값: 실시간/꼬리 갱신에 쓰는 선, 캔들/막대 묶음, 채운 영역, 제목
+        """
+        result = build_price_chart(figure, df, options)
+        lines, series = result['lines'], result['series']
+        
+        # 실시간 모드이면 갱신 대상을 배경에서 빼고 그림 (렌더링 후 배경 캐시)
+        if options['live']:
+            for artist in live_artists(lines, series):
+                artist.set_animated(True)
+        
+        return result
+    
+    def on_charts_rendered(self, job):
+        """렌더링 스레드에서 그린 메인 차트를 화면에 반영"""
+        if job.error is not None:
+            self.statusBar().showMessage(f"차트 그리기 오류: {job.error}")
+            self.flush_profile_runs()
+            return
         
-        # 제목과 라벨
-        title_text = f'{symbol} 주가 차트 ({currency_code})'
-        if self.is_us_stock(symbol):
-            krw_price = self.exchange_manager.convert_to_krw(self.df['close'].iloc[-1])
+        live = self.live_chart.running
+        self.live_chart.stop(redraw=False)
+        adopted = adopt_figure(self.canvas, job)
+        self.figure = job.figure
+        self.chart_lines = job.result['lines']
+        self.chart_series = job.result['series']
+        self.chart_fills = job.result['fills']
+        self.chart_title = job.result['title']
+        
+        if live:
+            # 렌더링 스레드가 캐시한 배경을 그대로 사용 (다시 그린 경우는 draw에서 캐시)
+            self.live_chart.start(self.chart_lines, self.chart_series, redraw=False,
+                                  background=job.background if adopted else None)
+        elif job.background is not None:
+            # 렌더링 중 실시간 모드가 꺼졌으면 갱신 대상을 일반 그리기로 복귀
+            for artist in live_artists(self.chart_lines, self.chart_series):
+                artist.set_animated(False)
+        self.flush_profile_runs()
+    
+    def submit_render(self, target, canvas, build, on_done, background=True):
+        """차트 렌더링 요청 (background=False이면 현재 스레드에서 바로 그려 반영)"""
+        run_id = profiler.current_run()
+        if background:
+            self.chart_renderer.submit(target, canvas, build, on_done, run_id)
+            self.flush_profile_runs()  # 대체된 이전 요청을 기다리던 실행 마무리
+        else:
+            on_done(self.chart_renderer.render(target, canvas, build, run_id))
+    
+    def chart_title_text(self, symbol):
+        """가격 차트 제목 (미국 주식은 현재가와 원화 환산가 포함)"""
+        currency, currency_code = self.get_currency_symbol(symbol)
+        title_text = chart_title(symbol, getattr(self, 'chart_level', 'D'), currency_code)
+        if self.is_foreign_stock(symbol):
+            krw_price = self.exchange_manager.convert_to_krw(self.df['close'].iloc[-1], currency_code)
             title_text += f' - 현재가: {self.format_price(self.df["close"].iloc[-1], symbol)} (₩{krw_price:,.0f})'
+        return title_text
+    
+    def update_chart_tail(self, symbol, start):
+        """
+        바뀐 꼬리 구간을 기존 차트에 반영 (선/막대를 새로 만들지 않음)
+        start: 차트에 그린 봉(일봉/주봉/월봉) 기준 위치
+        기간 창이 밀려 봉 날짜가 바뀌었으면 x 위치까지 전체 값을 다시 넣고 x축 범위도 갱신
+        """
+        if self.chart_renderer.is_pending('main'):
+            # 아직 화면에 없는 차트를 그리는 중이면 최신 값으로 다시 요청
+            self.plot_charts(symbol)
+            return
         
-        ax1.set_title(title_text, fontsize=18, fontweight='bold', color='#ffffff', pad=20)
-        ax1.set_ylabel(f'가격 ({currency})', color='#ffffff', fontsize=14)
-        ax1.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
-        ax1.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
-        ax1.tick_params(colors='#e0e0e0', labelsize=12)
-        
-        # 축 테두리 색상
-        for spine in ax1.spines.values():
-            spine.set_edgecolor('#2d3561')
-            spine.set_linewidth(2)
-        
-        # RSI 차트
-        if self.chkRSI.isChecked():
-            ax_rsi = self.figure.add_subplot(gs[indicator_idx])
-            ax_rsi.set_facecolor('#0a0e27')
-            ax_rsi.plot(self.df.index, self.df['rsi'], color='#a29bfe', linewidth=2)
-            ax_rsi.axhline(y=70, color='#ff6b6b', linestyle='--', alpha=0.6, linewidth=1.5)
-            ax_rsi.axhline(y=30, color='#6bcf7f', linestyle='--', alpha=0.6, linewidth=1.5)
-            ax_rsi.fill_between(self.df.index, 30, 70, alpha=0.05, color='#636e72')
-            ax_rsi.set_ylabel('RSI', color='#ffffff', fontsize=12)
-            ax_rsi.set_ylim(0, 100)
-            ax_rsi.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
-            ax_rsi.tick_params(colors='#e0e0e0', labelsize=11)
-            for spine in ax_rsi.spines.values():
-                spine.set_edgecolor('#2d3561')
-                spine.set_linewidth(2)
-            indicator_idx += 1
-        
-        # MACD 차트
-        if self.chkMACD.isChecked():
-            ax_macd = self.figure.add_subplot(gs[indicator_idx])
-            ax_macd.set_facecolor('#0a0e27')
-            ax_macd.plot(self.df.index, self.df['macd'], label='MACD', color='#74b9ff', linewidth=2)
-            ax_macd.plot(self.df.index, self.df['macd_signal'], label='Signal', color='#fd79a8', linewidth=2)
-            ax_macd.bar(self.df.index, self.df['macd_histogram'], label='Histogram', alpha=0.4, color='#81ecec')
-            ax_macd.set_ylabel('MACD', color='#ffffff', fontsize=12)
-            ax_macd.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
-            ax_macd.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
-            ax_macd.tick_params(colors='#e0e0e0', labelsize=11)
-            for spine in ax_macd.spines.values():
-                spine.set_edgecolor('#2d3561')
-                spine.set_linewidth(2)
-            indicator_idx += 1
-        
-        # 스토캐스틱 차트
-        if self.chkStochastic.isChecked() and 'stoch_k' in self.df.columns:
-            ax_stoch = self.figure.add_subplot(gs[indicator_idx])
-            ax_stoch.set_facecolor('#0a0e27')
-            ax_stoch.plot(self.df.index, self.df['stoch_k'], label='%K', color='#55efc4', linewidth=2)
-            ax_stoch.plot(self.df.index, self.df['stoch_d'], label='%D', color='#ff7675', linewidth=2)
-            ax_stoch.axhline(y=80, color='#ff6b6b', linestyle='--', alpha=0.6, linewidth=1.5)
-            ax_stoch.axhline(y=20, color='#6bcf7f', linestyle='--', alpha=0.6, linewidth=1.5)
-            ax_stoch.set_ylabel('Stochastic', color='#ffffff', fontsize=12)
-            ax_stoch.set_ylim(0, 100)
-            ax_stoch.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
-            ax_stoch.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
-            ax_stoch.tick_params(colors='#e0e0e0', labelsize=11)
-            for spine in ax_stoch.spines.values():
-                spine.set_edgecolor('#2d3561')
-                spine.set_linewidth(2)
-        
-        # x축 날짜 포맷
-        for ax in self.figure.get_axes():
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-            ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, color='#e0e0e0')
-        
-        # 마지막 차트만 x축 레이블 표시
-        for ax in self.figure.get_axes()[:-1]:
-            ax.set_xticklabels([])
-        
-        self.figure.tight_layout()
-        self.canvas.draw()
+        df = self.chart_frame()
+        shown = self.chart_lines['close'].get_xdata()
+        shifted = len(shown) != len(df) or shown[0] != df.index[0]
+        rescale = set()  # 새 값이 현재 y축 범위를 벗어난 축
+        
+        def check_range(ax, values):
+            low, high = ax.get_ylim()
+            values = values[~np.isnan(values)]
+            if values.size and (values.min() < low or values.max() > high):
+                rescale.add(ax)
+        
+        if shifted:
+            x = date_positions(df.index)
+            for column, line in self.chart_lines.items():
+                line.set_data(df.index, df[column].to_numpy(dtype=float))
+            for series in self.chart_series.values():
+                series.reset(x, df)
+            rescale.update(self.figure.get_axes())
+        else:
+            for column, line in self.chart_lines.items():
+                y = np.asarray(line.get_ydata(), dtype=float).copy()
+                y[start:] = df[column].to_numpy(dtype=float)[start:]
+                line.set_ydata(y)
+                check_range(line.axes, y[start:])
+            
+            for series in self.chart_series.values():
+                if series.set_values(df, start):
+                    rescale.add(series.axes)
+        
+        if 'bollinger' in self.chart_fills:
+            self.chart_fills['bollinger'].set_data(df.index, df['bb_upper'], df['bb_lower'])
+        if shifted and 'rsi' in self.chart_fills:
+            self.chart_fills['rsi'].set_data(df.index, 30, 70)
+        
+        # 범위를 벗어난 축만 y축 범위 재계산 (RSI/스토캐스틱처럼 고정된 축은 그대로, 창이 밀렸으면 x축도)
+        for ax in rescale:
+            autoscale_y(ax, self.chart_series.values())
+            if shifted:
+                ax.autoscale_view(scaley=False)
+        
+        self.chart_title.set_text(self.chart_title_text(symbol))
+        self.canvas.draw_idle()
     
     def show_technical_indicators(self):
         """기술적 지표 값 표시"""
@@ -1041,19 +1467,28 @@ class StockAnalyzer(QMainWindow, form_class):
             self.indicatorTable.setItem(i, 0, QTableWidgetItem(name))
             self.indicatorTable.setItem(i, 1, QTableWidgetItem(value))
     
-    def update_table(self):
-        """테이블 위젯 업데이트"""
+    def update_table(self, changed_from=None):
+        """
+        테이블 위젯 업데이트 (changed_from: 이 위치 이후 행만 다시 쓰기)
+        표시 중인 첫 날짜가 달라졌으면(새 거래일 추가로 행이 밀림) 전체를 다시 씀
+        """
         recent_data = self.df.tail(30)
-        self.tableWidget.setRowCount(len(recent_data))
+        first = 0
+        shown = self.tableWidget.item(0, 0)
+        if (changed_from is not None and self.tableWidget.rowCount() == len(recent_data)
+                and shown is not None and shown.text() == recent_data.index[0].strftime('%Y-%m-%d')):
+            first = max(0, changed_from - (len(self.df) - len(recent_data)))
+        else:
+            self.tableWidget.setRowCount(len(recent_data))
         
-        for i, (date, row) in enumerate(recent_data.iterrows()):
+        for i, (date, row) in enumerate(recent_data.iloc[first:].iterrows(), start=first):
             # 날짜
             self.tableWidget.setItem(i, 0, QTableWidgetItem(date.strftime('%Y-%m-%d')))
             
             # 종가 (환율 정보 포함)
             price_text = self.format_price(row['close'], self.current_symbol)
-            if self.is_us_stock(self.current_symbol):
-                krw_price = self.exchange_manager.convert_to_krw(row['close'])
+            if self.is_foreign_stock(self.current_symbol):
+                krw_price = self.exchange_manager.convert_to_krw(row['close'], currency_of(self.current_symbol))
                 price_text += f"\n(₩{krw_price:,.0f})"
             self.tableWidget.setItem(i, 1, QTableWidgetItem(price_text))
             
@@ -1091,8 +1526,8 @@ class StockAnalyzer(QMainWindow, form_class):
         
         # 환율 정보 추가
         stats_text = f"현재가: {self.format_price(current_price, self.current_symbol)}"
-        if self.is_us_stock(self.current_symbol):
-            krw_price = self.exchange_manager.convert_to_krw(current_price)
+        if self.is_foreign_stock(self.current_symbol):
+            krw_price = self.exchange_manager.convert_to_krw(current_price, currency_of(self.current_symbol))
             stats_text += f" (₩{krw_price:,.0f})"
         
         stats_text += f"\n시작가: {self.format_price(start_price, self.current_symbol)}"
@@ -1114,8 +1549,8 @@ class StockAnalyzer(QMainWindow, form_class):
         stats_text += f"\n거래일 수: {len(self.df)}일"
         
         # 환율 정보
-        if self.is_us_stock(self.current_symbol):
-            stats_text += f"\n\n{self.exchange_manager.get_rate_info()}"
+        if self.is_foreign_stock(self.current_symbol):
+            stats_text += f"\n\n{self.exchange_manager.get_rate_info([currency_of(self.current_symbol)])}"
         
         self.textEditStats.setPlainText(stats_text)
     
@@ -1147,6 +1582,22 @@ class StockAnalyzer(QMainWindow, form_class):
             
         elif alert_type == '데드크로스':
             self.alert_manager.add_alert(symbol, 'dead_cross', '', 0)
+            
+        elif alert_type == '조건식':
+            expression, ok = QInputDialog.getText(
+                self, "조건식 알림",
+                "조건식을 입력하세요:\n"
+                "예) rsi < 30 and close < bb_lower, cross(ma9, ma22), change(close, 5) / prev(close, 5) > 0.1"
+            )
+            if not ok:
+                return
+            try:
+                expression = self.alert_manager.evaluator.compile(expression.strip()).expression
+            except AlertExpressionError as e:
+                QMessageBox.warning(self, "조건식 오류", str(e))
+                return
+            
+            self.alert_manager.add_alert(symbol, 'expr', expression, 0)
         
         self.update_alert_table()
         QMessageBox.information(self, "알림 추가", "알림이 추가되었습니다.")
@@ -1158,6 +1609,47 @@ class StockAnalyzer(QMainWindow, form_class):
             self.alert_manager.remove_alert(current_row)
             self.update_alert_table()
     
+    def replay_alert(self):
+        """선택한 알림을 과거 데이터로 다시 평가"""
+        current_row = self.alertTable.currentRow()
+        if current_row < 0:
+            QMessageBox.warning(self, "선택 오류", "이력을 확인할 알림을 선택해주세요.")
+            return
+        alert = self.alert_manager.alerts[current_row]
+        symbol = alert['symbol']
+        self.statusBar().showMessage(f"{symbol} 알림 이력 확인 중...")
+        self.scheduler.submit(
+            symbol, REPLAY_YEARS,
+            on_finished=lambda data: self.show_alert_replay(alert, data),
+            on_error=lambda msg: self.statusBar().showMessage(f"{symbol} 데이터 수집 실패: {msg}"),
+            priority=PRIORITY_INTERACTIVE,
+            group='alert_replay'
+        )
+    
+    def show_alert_replay(self, alert, data):
+        """알림 이력 결과 표시"""
+        symbol = alert['symbol']
+        if data is None or data.empty:
+            self.statusBar().showMessage(f"{symbol} 데이터가 없습니다")
+            return
+        with profiler.span('alert_replay', rows=len(data)):
+            frame = calculate_all(data.copy(), self.indicator_params)
+            triggers = self.alert_manager.replay_alert(alert, {symbol: frame})
+        fired = triggers[triggers['new']]
+        
+        condition = self.alert_manager.alert_expression(alert)
+        text = (f"조건: {condition}\n"
+                f"기간: {frame.index[0]:%Y-%m-%d} ~ {frame.index[-1]:%Y-%m-%d} ({len(frame)}봉)\n"
+                f"알림 {len(fired)}회 (조건을 충족한 봉 {len(triggers)}개)")
+        if not fired.empty:
+            recent = fired.tail(10).iloc[::-1]
+            text += "\n\n최근 알림:\n" + "\n".join(
+                f"{date:%Y-%m-%d}  {self.format_price(close, symbol)}"
+                for date, close in zip(recent['date'], recent['close'])
+            )
+        self.statusBar().showMessage(f"{symbol} 알림 이력 확인 완료")
+        QMessageBox.information(self, f"알림 이력 - {symbol}", text)
+    
     def update_alert_table(self):
         """알림 테이블 업데이트"""
         self.alertTable.setRowCount(len(self.alert_manager.alerts))
@@ -1168,7 +1660,8 @@ class StockAnalyzer(QMainWindow, form_class):
             type_text = {
                 'price': '가격',
                 'golden_cross': '골든크로스',
-                'dead_cross': '데드크로스'
+                'dead_cross': '데드크로스',
+                'expr': '조건식'
             }.get(alert['type'], alert['type'])
             self.alertTable.setItem(i, 1, QTableWidgetItem(type_text))
             
@@ -1212,9 +1705,7 @@ class StockAnalyzer(QMainWindow, form_class):
         
         # 현재가 업데이트
         if symbol not in self.current_prices:
-            thread = DataFetchThread(symbol, 1)
-            thread.finished.connect(lambda data: self.update_current_price(symbol, data))
-            thread.start()
+            self.scheduler.submit(symbol, 1, lambda data: self.update_current_price(symbol, data))
         
         self.update_portfolio_view()
         QMessageBox.information(self, "매수 완료", f"{symbol} {quantity}주를 {self.format_price(price, symbol)}에 매수했습니다.")
@@ -1245,7 +1736,11 @@ class StockAnalyzer(QMainWindow, form_class):
         
         if self.portfolio.sell_stock(symbol, quantity, price):
             self.update_portfolio_view()
-            QMessageBox.information(self, "매도 완료", f"{symbol} {quantity}주를 {self.format_price(price, symbol)}에 매도했습니다.")
+            realized = self.portfolio.transactions[-1]['realized']
+            realized_text = self.format_price(abs(realized), symbol)
+            QMessageBox.information(self, "매도 완료",
+                                    f"{symbol} {quantity}주를 {self.format_price(price, symbol)}에 매도했습니다.\n"
+                                    f"실현 손익: {'-' if realized < 0 else ''}{realized_text}")
     
     def update_current_price(self, symbol, data):
         """현재가 업데이트"""
@@ -1257,11 +1752,42 @@ class StockAnalyzer(QMainWindow, form_class):
         """포트폴리오 새로고침"""
         self.statusBar().showMessage("포트폴리오 업데이트 중...")
         
-        # 모든 보유 종목의 현재가 업데이트
+        # 끝나지 않은 이전 새로고침은 새 요청으로 대체
+        if getattr(self, 'pending_refresh', None):
+            profiler.end_run(self.portfolio_run)
+        
+        # 구간 계측 시작
+        self.portfolio_run = profiler.begin_run("포트폴리오 새로고침")
+        self.pending_refresh = set(self.portfolio.holdings.keys())
+        self.refresh_frames = {}  # 알림 확인용 (활성 알림이 있는 종목만)
+        
+        # 모든 보유 종목의 현재가 업데이트 (같은 종목의 이전 새로고침 요청은 대체)
         for symbol in self.portfolio.holdings.keys():
-            thread = DataFetchThread(symbol, 1)
-            thread.finished.connect(lambda data, s=symbol: self.update_current_price(s, data))
-            thread.start()
+            self.scheduler.submit(
+                symbol, 1,
+                on_finished=lambda data, s=symbol: self.on_refresh_price(s, data),
+                on_error=lambda msg, s=symbol: self.on_refresh_price(s, None),
+                group=f"price:{symbol}",
+                run_id=self.portfolio_run
+            )
+    
+    def on_refresh_price(self, symbol, data):
+        """포트폴리오 새로고침 중 종목별 현재가 수신"""
+        with profiler.use_run(self.portfolio_run):
+            self.update_current_price(symbol, data)
+        if data is not None and not data.empty and symbol in self.alert_manager.watched_symbols():
+            self.refresh_frames[symbol] = data
+        
+        self.pending_refresh.discard(symbol)
+        if not self.pending_refresh:
+            # 보유 종목 알림은 모두 받은 뒤 한 번에 확인
+            if self.refresh_frames:
+                with profiler.use_run(self.portfolio_run), profiler.span('check_alerts', 'portfolio'):
+                    frames = {s: calculate_all(df.copy(), self.indicator_params)
+                              for s, df in self.refresh_frames.items()}
+                    self.alert_manager.check_watchlist(frames)
+                self.refresh_frames = {}
+            self.finish_profile_run(self.portfolio_run, "포트폴리오 업데이트 완료")
     
     def update_portfolio_view(self):
         """포트폴리오 뷰 업데이트"""
@@ -1272,7 +1798,8 @@ class StockAnalyzer(QMainWindow, form_class):
             return
         
         # 수익률 계산
-        results, total = self.portfolio.calculate_returns(self.current_prices, self.exchange_manager)
+        with profiler.span('calculate_returns', 'portfolio'):
+            results, total = self.portfolio.calculate_returns(self.current_prices, self.exchange_manager)
         
         # 테이블 업데이트
         self.portfolioTable.setRowCount(len(results))
@@ -1308,49 +1835,28 @@ class StockAnalyzer(QMainWindow, form_class):
         profit_color = '#ff6b6b' if total['total_profit_krw'] > 0 else '#4ecdc4'
         self.labelTotalProfit.setText(
             f"총 손익: ₩{total['total_profit_krw']:,.0f} ({total['total_profit_rate']:.2f}%)"
+            f"  |  실현 손익: ₩{total['total_realized_krw']:,.0f}"
         )
         self.labelTotalProfit.setStyleSheet(f"color: {profit_color}; font-weight: bold; font-size: 14px;")
         
         # 자산 배분 차트 업데이트
-        self.update_portfolio_chart(results)
-    
-    def update_portfolio_chart(self, results):
-        """포트폴리오 차트 업데이트"""
-        self.portfolio_figure.clear()
-        ax = self.portfolio_figure.add_subplot(111)
-        ax.set_facecolor('#0a0e27')
-        
-        if results:
-            labels = []
-            sizes = []
-            colors = ['#ff6b6b', '#4ecdc4', '#a29bfe', '#fd79a8', '#fdcb6e', '#6c5ce7', '#00b894', '#e17055', '#74b9ff', '#00d4ff']
-            
-            for i, (symbol, data) in enumerate(results.items()):
-                labels.append(f"{symbol}\n{data['profit_rate']:.1f}%")
-                sizes.append(data['current_value_krw'])  # 원화 기준
-            
-            wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors[:len(results)], 
-                                             autopct='%1.1f%%', startangle=90, 
-                                             textprops={'color': '#ffffff'})
-            
-            # 글자 스타일
-            for text in texts:
-                text.set_fontsize(12)
-                text.set_color('#ffffff')
-                text.set_weight('bold')
-            for autotext in autotexts:
-                autotext.set_fontsize(11)
-                autotext.set_color('#000000')
-                autotext.set_weight('bold')
-            
-            ax.set_title('포트폴리오 자산 배분 (원화 기준)', fontsize=16, fontweight='bold', color='#ffffff', pad=20)
+        with profiler.span('update_portfolio_chart', 'render'):
+            self.update_portfolio_chart(results)
+    
+    def update_portfolio_chart(self, results, background=True):
+        """포트폴리오 차트 업데이트 (렌더링 스레드에서 그린 뒤 화면만 교체)"""
+        self.submit_render('portfolio', self.portfolio_canvas,
+                           lambda figure: build_portfolio_chart(figure, results),
+                           self.on_portfolio_rendered, background)
+    
+    def on_portfolio_rendered(self, job):
+        """렌더링 스레드에서 그린 포트폴리오 차트를 화면에 반영"""
+        if job.error is not None:
+            self.statusBar().showMessage(f"포트폴리오 차트 오류: {job.error}")
         else:
-            ax.text(0.5, 0.5, '포트폴리오가 비어있습니다', 
-                   horizontalalignment='center', verticalalignment='center',
-                   transform=ax.transAxes, fontsize=14, color='#ffffff')
-        
-        self.portfolio_figure.tight_layout()
-        self.portfolio_canvas.draw()
+            adopt_figure(self.portfolio_canvas, job)
+            self.portfolio_figure = job.figure
+        self.flush_profile_runs()
     
     def save_to_db(self):
         """데이터베이스에 저장"""
@@ -1364,10 +1870,12 @@ class StockAnalyzer(QMainWindow, form_class):
         try:
             symbol = self.current_symbol
             
-            # 종목 정보 저장
+            # 종목 정보 저장 (확인된 시장 구분이 있으면 함께 기록)
+            market = get_symbol_resolver().get_market(symbol)
             self.cursor.execute("""
-                INSERT IGNORE INTO stocks (symbol, name) VALUES (%s, %s)
-            """, (symbol, symbol))
+                INSERT INTO stocks (symbol, name, market) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE market = COALESCE(market, VALUES(market))
+            """, (symbol, symbol, market))
             
             # 기존 데이터 삭제
             self.cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (symbol,))
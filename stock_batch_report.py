@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from stock_indicators import calculate_all
+from stock_resample import ResamplePyramid, choose_level, LEVELS, LEVEL_UNITS, OHLCV_COLUMNS
+from stock_chart_figure import CHART_PANELS, apply_chart_style, build_price_chart, chart_title
+from stock_optimizer import SharedPriceStore
+from stock_currency import currency_symbol, get_symbol_currencies
+
+# 공유 메모리에 올리는 행 (날짜는 epoch 초)
+REPORT_FIELDS = ('timestamp',) + tuple(OHLCV_COLUMNS)
+REPORT_FORMATS = ('png', 'pdf')
+
+def currency_of(symbol):
+    """통화 기호/코드 (GUI와 같은 기준: stock_currency의 종목 통화)"""
+    code = get_symbol_currencies().get(symbol)
+    return currency_symbol(code), code
+
+def prepare_frames(price_data):
+    """공유 메모리 적재용 프레임 (현지 날짜 기준 epoch 초 + OHLCV)"""
+    frames = {}
+    for symbol, df in price_data.items():
+        if df is None or df.empty:
+            continue
+        index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        frame = df[OHLCV_COLUMNS].set_axis(index)
+        frame = frame.assign(volume=frame['volume'].fillna(0),
+                             timestamp=index.values.astype('datetime64[s]').astype(np.int64))
+        frames[symbol] = frame
+    return frames
+
+def render_report(symbol, df, config):
+    """
+    종목 하나의 차트 리포트 파일 생성 (GUI 가격 차트와 같은 구성)
+    반환값: 요약 행 (최근 종가, 변동률, RSI, 파일 경로 등)
+    """
+    daily = calculate_all(df.copy(), config['params'])
+    level = config['level'] if config['level'] in LEVELS else choose_level(len(daily))
+    chart_df = daily if level == 'D' else ResamplePyramid(df, config['params']).frame(level)
+
+    currency, currency_code = currency_of(symbol)
+    options = {panel: panel in config['panels'] for panel in CHART_PANELS}
+    options.update(unit=LEVEL_UNITS[level], currency=currency,
+                   title=chart_title(symbol, level, currency_code))
+
+    figure = Figure(figsize=config['size'], dpi=config['dpi'], facecolor='#0a0e27')
+    FigureCanvasAgg(figure)
+    build_price_chart(figure, chart_df, options)
+    path = os.path.join(config['output'], f"{symbol}.{config['format']}")
+    figure.savefig(path, format=config['format'], facecolor=figure.get_facecolor())
+
+    last = daily.iloc[-1]
+    return {
+        'symbol': symbol,
+        'date': daily.index[-1].strftime('%Y-%m-%d'),
+        'close': float(last['close']),
+        'change_pct': float(last['change_pct']),
+        'rsi': float(last['rsi']),
+        'rows': len(daily),
+        'level': level,
+        'path': path
+    }
+
+# 워커 프로세스 전역 상태
+_worker_shm = None
+_worker_prices = None
+_worker_offsets = None
+_worker_config = None
+
+def _init_worker(shm_name, total, offsets, config):
+    """워커 시작 시 공유 메모리 연결과 차트 스타일 적용 (한 번만)"""
+    global _worker_shm, _worker_prices, _worker_offsets, _worker_config
+    _worker_shm, _worker_prices = SharedPriceStore.attach(shm_name, total, REPORT_FIELDS)
+    _worker_offsets = offsets
+    _worker_config = config
+    apply_chart_style()
+
+def _worker_frame(symbol):
+    """공유 메모리의 종목 구간 -> OHLCV DataFrame"""
+    start, end = _worker_offsets[symbol]
+    values = _worker_prices[:, start:end]
+    index = pd.DatetimeIndex(values[0].astype(np.int64).astype('datetime64[s]'), name='date')
+    return pd.DataFrame(values[1:].T.copy(), index=index, columns=OHLCV_COLUMNS)
+
+def _render_symbol(symbol):
+    """워커: 종목 하나 렌더링 (실패해도 다른 종목은 계속 진행)"""
+    started = time.perf_counter()
+    try:
+        row = render_report(symbol, _worker_frame(symbol), _worker_config)
+    except Exception as e:
+        row = {'symbol': symbol, 'error': str(e)}
+    row['seconds'] = time.perf_counter() - started
+    return row
+
+class BatchReportGenerator:
+    """종목별 차트 리포트 일괄 생성기 (프로세스 풀 + 공유 메모리 가격 캐시)"""
+
+    def __init__(self, price_data, output_dir='reports', fmt='png', level='auto', panels=CHART_PANELS,
+                 size=(14, 10), dpi=100, params=None, workers=None):
+        self.frames = prepare_frames(price_data)
+        self.workers = workers or os.cpu_count() or 1
+        self.config = {
+            'output': output_dir,
+            'format': fmt,
+            'level': level,
+            'panels': tuple(panels),
+            'size': tuple(size),
+            'dpi': dpi,
+            'params': params
+        }
+
+    def run(self, progress=None):
+        """
+        모든 종목 리포트 생성 후 요약 DataFrame 반환 (output_dir/summary.csv로도 저장)
+        progress(done, total, row): 종목 하나가 끝날 때마다 호출
+        """
+        symbols = list(self.frames)
+        if not symbols:
+            return pd.DataFrame()
+        os.makedirs(self.config['output'], exist_ok=True)
+
+        # 가격은 공유 메모리에 한 번만 올리고 워커는 연결만 함 (작업마다 DataFrame을 pickle하지 않음)
+        store = SharedPriceStore(self.frames, REPORT_FIELDS)
+        rows = []
+        try:
+            workers = min(self.workers, len(symbols))
+            chunk_size = max(1, len(symbols) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=store.descriptor() + (self.config,)) as executor:
+                for row in executor.map(_render_symbol, symbols, chunksize=chunk_size):
+                    rows.append(row)
+                    if progress is not None:
+                        progress(len(rows), len(symbols), row)
+        finally:
+            store.close()
+
+        summary = pd.DataFrame(rows)
+        summary.to_csv(os.path.join(self.config['output'], 'summary.csv'), index=False, encoding='utf-8-sig')
+        return summary
+
+def load_price_data(symbols, years=1, workers=8):
+    """
+    여러 종목의 가격 데이터 동시 수집
+    HTTP 응답 캐시(http_cache.sqlite)를 함께 쓰므로 같은 날 다시 실행하면 지난 구간은 캐시에서 읽음
+    """
+    from stock_data_fetcher import StockDataFetcher
+    fetcher = StockDataFetcher()
+
+    def fetch(symbol):
+        try:
+            return symbol, fetcher.get_stock_data(symbol, years)
+        except Exception as e:
+            print(f"{symbol} 수집 오류: {e}")
+            return symbol, None
+
+    price_data = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for symbol, data in executor.map(fetch, symbols):
+            if data is not None and not data.empty:
+                price_data[symbol] = data
+    return price_data
+
+def load_price_data_from_db(connection, symbols, years=1):
+    """stock_prices 테이블에서 여러 종목 가격을 한 번에 조회"""
+    from stock_db import load_prices
+    start_date = (datetime.now() - timedelta(days=365 * years)).date()
+    return load_prices(connection, symbols, start_date)
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="종목별 차트 리포트 일괄 생성")
+    parser.add_argument('symbols', nargs='*', help="종목 코드 목록 (생략하면 stocks 테이블 전체)")
+    parser.add_argument('--market', default=None, help="stocks 테이블에서 이 시장만 선택 (예: KOSPI)")
+    parser.add_argument('--years', type=int, default=1, help="차트 기간 (년)")
+    parser.add_argument('--source', choices=['fetch', 'db'], default='fetch',
+                        help="가격 데이터: 수집(HTTP 캐시 사용) 또는 stock_prices 테이블")
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='png')
+    parser.add_argument('--output', default='reports', help="리포트 저장 폴더")
+    parser.add_argument('--level', choices=('auto',) + LEVELS, default='auto', help="봉 주기 (auto: 기간에 따라 자동)")
+    parser.add_argument('--panels', default=','.join(CHART_PANELS), help="표시 항목 (쉼표 구분)")
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help="렌더링 프로세스 수")
+    parser.add_argument('--fetch-workers', type=int, default=8, help="동시 수집 수")
+    args = parser.parse_args()
+
+    connection = None
+    symbols = args.symbols
+    if not symbols or args.source == 'db':
+        from stock_db import connect, load_symbols
+        connection = connect()
+    try:
+        if not symbols:
+            symbols = load_symbols(connection, args.market)
+
+        started = time.perf_counter()
+        if args.source == 'db':
+            price_data = load_price_data_from_db(connection, symbols, args.years)
+        else:
+            price_data = load_price_data(symbols, args.years, args.fetch_workers)
+    finally:
+        if connection is not None:
+            connection.close()
+    fetched = time.perf_counter()
+    print(f"가격 데이터 {len(price_data)}/{len(symbols)}종목 ({fetched - started:.1f}s)")
+
+    panels = [p.strip() for p in args.panels.split(',') if p.strip()]
+    generator = BatchReportGenerator(price_data, args.output, args.format, args.level, panels,
+                                     dpi=args.dpi, workers=args.workers)
+    summary = generator.run(progress=lambda done, total, row: print(
+        f"[{done}/{total}] {row['symbol']} {row.get('error') or row.get('path')}"))
+
+    elapsed = time.perf_counter() - fetched
+    failed = summary[summary['error'].notna()] if 'error' in summary.columns else summary.iloc[0:0]
+    print(f"리포트 {len(summary) - len(failed)}개 생성 ({elapsed:.1f}s, 초당 {len(summary) / max(elapsed, 1e-9):.1f}개)"
+          f" - {os.path.join(args.output, 'summary.csv')}")
+    if not failed.empty:
+        print(f"실패 {len(failed)}개: {', '.join(failed['symbol'])}")
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 업체 덤프 컬럼명 -> 표준 컬럼명 (소문자/공백 제거 후 비교)
+COLUMN_ALIASES = {
+    'symbol': ('symbol', 'ticker', 'code', 'stock_code', '종목코드', '단축코드'),
+    'date': ('date', 'trade_date', 'datetime', 'timestamp', '일자', '날짜'),
+    'open': ('open', 'open_price', '시가'),
+    'high': ('high', 'high_price', '고가'),
+    'low': ('low', 'low_price', '저가'),
+    'close': ('close', 'close_price', '종가'),
+    'volume': ('volume', 'vol', '거래량'),
+    'market': ('market', '시장구분'),
+    'name': ('name', 'stock_name', '종목명')
+}
+IMPORT_COLUMNS = ['symbol', 'date', 'open', 'high', 'low', 'close', 'volume']
+IMPORT_METHODS = ('upsert', 'load')
+
+# stock_prices 가격 컬럼은 DECIMAL(10, 2)
+MAX_PRICE = 1e8
+
+class ImportCheckpoint:
+    """
+    파일별 적재 진행 기록 (완료한 청크 수)
+    파일 크기/수정 시각이 바뀌면 처음부터 다시 적재
+    """
+
+    def __init__(self, path='bulk_import_checkpoint.json'):
+        self.path = path
+        self.files = {}
+        self.load()
+
+    @staticmethod
+    def _signature(file_path):
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    def get(self, file_path):
+        """완료한 청크 수와 누적 결과 (기록이 없거나 파일이 바뀌었으면 None)"""
+        entry = self.files.get(os.path.abspath(file_path))
+        if entry is None or entry['signature'] != self._signature(file_path):
+            return None
+        return entry
+
+    def update(self, file_path, chunks, stats, done=False):
+        self.files[os.path.abspath(file_path)] = {
+            'signature': self._signature(file_path),
+            'chunks': chunks,
+            'stats': stats,
+            'done': done
+        }
+        self.save()
+
+    def save(self):
+        """기록 저장 (임시 파일에 쓴 뒤 교체하므로 중단되어도 이전 기록 유지)"""
+        try:
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(self.files, f, ensure_ascii=False, indent=2)
+            os.replace(temp, self.path)
+        except Exception as e:
+            print(f"적재 기록 저장 오류: {e}")
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f)
+        except:
+            self.files = {}
+
+def _column_key(name):
+    return str(name).strip().lower().replace(' ', '_')
+
+def rename_columns(df):
+    """업체별 컬럼명을 표준 컬럼명으로 변경 (알 수 없는 컬럼은 버림)"""
+    lookup = {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+    mapping = {}
+    for name in df.columns:
+        column = lookup.get(_column_key(name))
+        if column is not None and column not in mapping.values():
+            mapping[name] = column
+    return df[list(mapping)].rename(columns=mapping)
+
+def iter_chunks(path, chunk_rows=200000):
+    """CSV(.gz 포함)/Parquet 파일을 chunk_rows 행씩 읽음 (종목코드는 문자열로 읽어 앞자리 0 유지)"""
+    if path.endswith('.parquet') or path.endswith('.pq'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    text_columns = {alias for column in ('symbol', 'market', 'name') for alias in COLUMN_ALIASES[column]}
+    header = pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns
+    yield from pd.read_csv(path, chunksize=chunk_rows, encoding='utf-8-sig',
+                           dtype={name: str for name in header if _column_key(name) in text_columns})
+
+def normalize_chunk(df, symbol=None):
+    """
+    청크 검증 및 형 변환
+    반환값: (적재할 DataFrame, 사유별 제외 행 수)
+    - 시가/고가/저가가 없으면 종가로 채움, 거래량이 없으면 0
+    - 날짜/종가가 없거나 가격이 음수/범위 초과, 고가 < 저가인 행은 제외
+    - 같은 종목/날짜가 여러 번 나오면 마지막 행 사용
+    """
+    df = rename_columns(df)
+    if 'symbol' not in df.columns:
+        if symbol is None:
+            raise ValueError("종목코드 컬럼이 없습니다 (symbol 지정 필요)")
+        df = df.assign(symbol=symbol)
+    if 'close' not in df.columns or 'date' not in df.columns:
+        raise ValueError("date/close 컬럼이 없습니다")
+
+    out = pd.DataFrame({'symbol': df['symbol'].astype('string').str.strip().str.upper()})
+    if pd.api.types.is_numeric_dtype(df['symbol']):
+        out['symbol'] = out['symbol'].str.replace(r'\.0$', '', regex=True).str.zfill(6)  # 숫자로 저장된 국내 종목코드
+    out['date'] = pd.to_datetime(df['date'], errors='coerce').dt.normalize()
+    close = pd.to_numeric(df['close'], errors='coerce')
+    for column in ('open', 'high', 'low'):
+        values = pd.to_numeric(df[column], errors='coerce') if column in df.columns else close
+        out[column] = values.fillna(close)
+    out['close'] = close
+    volume = pd.to_numeric(df['volume'], errors='coerce') if 'volume' in df.columns else 0
+    out['volume'] = volume
+    for column in ('market', 'name'):
+        if column in df.columns:
+            out[column] = df[column].astype('string').str.strip()
+
+    prices = out[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+    checks = {
+        'symbol': (out['symbol'] == '').fillna(True).to_numpy(dtype=bool),
+        'date': out['date'].isna().to_numpy(),
+        'close': np.isnan(prices[:, 3]),
+        'price_range': ((prices <= 0) | (prices >= MAX_PRICE)).any(axis=1),
+        'high_low': prices[:, 1] < prices[:, 2]
+    }
+    invalid = np.zeros(len(out), dtype=bool)
+    rejected = {}
+    for reason, mask in checks.items():
+        mask = mask & ~invalid  # 행 하나는 첫 번째 사유로만 집계
+        if mask.any():
+            rejected[reason] = int(mask.sum())
+            invalid |= mask
+    out = out[~invalid]
+
+    out = out.assign(volume=out['volume'].fillna(0).clip(lower=0).astype(np.int64))
+    out[['open', 'high', 'low', 'close']] = out[['open', 'high', 'low', 'close']].round(2)
+    duplicates = out.duplicated(['symbol', 'date'], keep='last')
+    if duplicates.any():
+        rejected['duplicate'] = int(duplicates.sum())
+        out = out[~duplicates.to_numpy()]
+    return out, rejected
+
+class BulkImporter:
+    """
+    가격 덤프(CSV/Parquet) 대량 적재기
+    - 청크 단위로 검증하고 청크마다 커밋 + 진행 기록 (중단 후 다시 실행하면 이어서 적재)
+    - upsert: 여러 행 INSERT ... ON DUPLICATE KEY UPDATE / load: LOAD DATA LOCAL INFILE (서버 local_infile 필요)
+    - stocks 테이블에 없는 종목은 자동으로 추가
+    """
+
+    def __init__(self, connection, method='upsert', chunk_rows=200000, rows_per_statement=2000,
+                 checkpoint=None, market=None):
+        self.connection = connection
+        self.method = method
+        self.chunk_rows = chunk_rows
+        self.rows_per_statement = rows_per_statement
+        self.checkpoint = checkpoint
+        self.market = market  # 덤프에 시장 구분이 없을 때 새 종목에 기록할 값
+        self.known_symbols = None
+
+    def _load_known_symbols(self):
+        from stock_db import load_symbols
+        self.known_symbols = set(load_symbols(self.connection))
+
+    def ensure_stocks(self, cursor, chunk):
+        """청크에 처음 나온 종목을 stocks 테이블에 추가 (stock_prices 외래키), 추가한 종목 반환"""
+        if self.known_symbols is None:
+            self._load_known_symbols()
+        new = chunk.drop_duplicates('symbol')
+        new = new[~new['symbol'].isin(self.known_symbols)]
+        if new.empty:
+            return []
+        names = new['name'] if 'name' in new.columns else new['symbol']
+        markets = new['market'] if 'market' in new.columns else pd.Series(self.market, index=new.index)
+        rows = [(symbol, name if pd.notna(name) else symbol, market if pd.notna(market) else None)
+                for symbol, name, market in zip(new['symbol'], names, markets)]
+        cursor.executemany("""
+            INSERT INTO stocks (symbol, name, market) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE market = COALESCE(market, VALUES(market))
+        """, rows)
+        return new['symbol'].tolist()
+
+    @staticmethod
+    def _rows(chunk):
+        dates = chunk['date'].dt.date
+        return list(zip(chunk['symbol'].tolist(), dates.tolist(), chunk['open'].tolist(), chunk['high'].tolist(),
+                        chunk['low'].tolist(), chunk['close'].tolist(), chunk['volume'].tolist()))
+
+    def _upsert(self, cursor, chunk):
+        """rows_per_statement 행씩 한 문장으로 적재 (행마다 왕복하지 않음)"""
+        rows = self._rows(chunk)
+        for i in range(0, len(rows), self.rows_per_statement):
+            batch = rows[i:i + self.rows_per_statement]
+            values = ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+            cursor.execute(f"""
+                INSERT INTO stock_prices
+                (symbol, date, open_price, high_price, low_price, close_price, volume)
+                VALUES {values}
+                ON DUPLICATE KEY UPDATE
+                    open_price = VALUES(open_price),
+                    high_price = VALUES(high_price),
+                    low_price = VALUES(low_price),
+                    close_price = VALUES(close_price),
+                    volume = VALUES(volume)
+            """, [value for row in batch for value in row])
+
+    def _load_data(self, cursor, chunk):
+        """청크를 임시 TSV로 쓰고 LOAD DATA LOCAL INFILE (같은 종목/날짜는 교체)"""
+        handle, path = tempfile.mkstemp(suffix='.tsv')
+        try:
+            with os.fdopen(handle, 'w', encoding='utf-8', newline='') as f:
+                chunk[IMPORT_COLUMNS].to_csv(f, sep='\t', header=False, index=False,
+                                             date_format='%Y-%m-%d', lineterminator='\n')
+            cursor.execute("""
+                LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE stock_prices
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n'
+                (symbol, date, open_price, high_price, low_price, close_price, volume)
+            """, (path,))
+        finally:
+            os.remove(path)
+
+    def write_chunk(self, chunk):
+        """검증된 청크 하나 적재 후 커밋"""
+        cursor = self.connection.cursor()
+        try:
+            added = self.ensure_stocks(cursor, chunk)
+            if self.method == 'load':
+                self._load_data(cursor, chunk)
+            else:
+                self._upsert(cursor, chunk)
+            self.connection.commit()
+            self.known_symbols.update(added)  # 롤백되면 다음 시도에서 다시 추가
+            return len(added)
+        except Exception:
+            self.connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def import_file(self, path, symbol=None, progress=None):
+        """
+        파일 하나 적재 (진행 기록이 있으면 완료한 청크는 건너뜀)
+        symbol: 종목코드 컬럼이 없는 파일의 종목 (생략하면 파일 이름)
+        progress(path, stats): 청크마다 호출
+        반환값: stats (read/imported/rejected/stocks_added/seconds)
+        """
+        if symbol is None:
+            symbol = os.path.basename(path).split('.')[0]
+        entry = self.checkpoint.get(path) if self.checkpoint is not None else None
+        if entry is not None and entry['done']:
+            return dict(entry['stats'], skipped=True)
+
+        done_chunks = chunks = entry['chunks'] if entry is not None else 0
+        stats = dict(entry['stats']) if entry is not None else {
+            'read': 0, 'imported': 0, 'rejected': {}, 'stocks_added': 0, 'seconds': 0.0}
+        started = time.perf_counter() - stats['seconds']
+        for number, raw in enumerate(iter_chunks(path, self.chunk_rows)):
+            if number < done_chunks:
+                continue
+            chunk, rejected = normalize_chunk(raw, symbol)
+            if not chunk.empty:
+                stats['stocks_added'] += self.write_chunk(chunk)
+            stats['read'] += len(raw)
+            stats['imported'] += len(chunk)
+            for reason, count in rejected.items():
+                stats['rejected'][reason] = stats['rejected'].get(reason, 0) + count
+            stats['seconds'] = time.perf_counter() - started
+            chunks = number + 1
+            if self.checkpoint is not None:
+                self.checkpoint.update(path, chunks, stats)
+            if progress is not None:
+                progress(path, stats)
+        if self.checkpoint is not None:
+            self.checkpoint.update(path, chunks, stats, done=True)
+        return stats
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가격 덤프(CSV/Parquet) 대량 적재 (stock_prices)")
+    parser.add_argument('files', nargs='+', help="CSV(.csv, .csv.gz) 또는 Parquet 파일")
+    parser.add_argument('--method', choices=IMPORT_METHODS, default='upsert',
+                        help="upsert: 여러 행 INSERT / load: LOAD DATA LOCAL INFILE")
+    parser.add_argument('--symbol', default=None, help="종목코드 컬럼이 없는 파일의 종목 (기본: 파일 이름)")
+    parser.add_argument('--market', default=None, help="새로 추가되는 종목의 시장 구분")
+    parser.add_argument('--chunk-rows', type=int, default=200000, help="청크 크기 (행)")
+    parser.add_argument('--checkpoint', default='bulk_import_checkpoint.json', help="진행 기록 파일")
+    parser.add_argument('--restart', action='store_true', help="진행 기록을 무시하고 처음부터 적재")
+    args = parser.parse_args()
+
+    from stock_db import connect
+    connection = connect(allow_local_infile=True) if args.method == 'load' else connect()
+    checkpoint = ImportCheckpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.files = {}
+
+    def report(path, stats):
+        rate = stats['imported'] / max(stats['seconds'], 1e-9)
+        print(f"{os.path.basename(path)}: {stats['read']:,}행 읽음, {stats['imported']:,}행 적재 "
+              f"({stats['seconds']:.1f}s, 초당 {rate:,.0f}행)")
+
+    total_rows = 0
+    total_seconds = 0.0
+    try:
+        importer = BulkImporter(connection, args.method, args.chunk_rows, checkpoint=checkpoint, market=args.market)
+        for path in args.files:
+            stats = importer.import_file(path, args.symbol, progress=report)
+            if stats.get('skipped'):
+                print(f"{os.path.basename(path)}: 이미 적재 완료 (건너뜀)")
+                continue
+            total_rows += stats['imported']
+            total_seconds += stats['seconds']
+            rejected = ', '.join(f"{reason} {count:,}" for reason, count in stats['rejected'].items())
+            print(f"{os.path.basename(path)} 완료: 신규 종목 {stats['stocks_added']}개"
+                  + (f", 제외 {rejected}" if rejected else ""))
+    finally:
+        connection.close()
+    print(f"총 {total_rows:,}행 적재 ({total_seconds:.1f}s, 초당 {total_rows / max(total_seconds, 1e-9):,.0f}행)")
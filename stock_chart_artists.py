@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba
+
+# 봉 간격이 이 픽셀보다 좁으면 막대를 하나씩 그리지 않고 외곽선 다각형으로 그림
+DENSE_PIXELS_PER_BAR = 2
+
+# 바뀐 봉이 이보다 적으면 경로 꼭짓점만 직접 고치고, 많으면 전체 꼭짓점을 한 번에 교체
+_INPLACE_LIMIT = 16
+
+def date_positions(index):
+    """DatetimeIndex -> matplotlib 날짜 좌표 (일 단위 float, 벡터 연산)"""
+    return mdates.date2num(index.values)
+
+def bar_width(x, ratio=0.7):
+    """봉 간격의 ratio 배 (주봉/월봉은 간격이 넓으므로 폭도 같이 넓어짐)"""
+    if len(x) < 2:
+        return ratio
+    return float(np.median(np.diff(x))) * ratio
+
+def rect_vertices(x, bottom, top, width):
+    """막대 꼭짓점 배열 (n x 4 x 2: 좌하, 좌상, 우상, 우하)"""
+    half = width / 2
+    verts = np.empty((len(x), 4, 2), dtype=np.float64)
+    verts[:, 0, 0] = verts[:, 1, 0] = x - half
+    verts[:, 2, 0] = verts[:, 3, 0] = x + half
+    verts[:, 0, 1] = verts[:, 3, 1] = bottom
+    verts[:, 1, 1] = verts[:, 2, 1] = top
+    return verts
+
+def pixel_buckets(n, pixels):
+    """
+    봉 n개를 픽셀 폭에 맞춰 묶은 구간 시작 위치
+    구간 수가 화면 폭으로 제한되므로 고밀도 모드의 꼭짓점 수는 봉 수와 무관
+    """
+    count = max(1, min(n, int(pixels / DENSE_PIXELS_PER_BAR)))
+    return np.unique(np.linspace(0, n, count, endpoint=False).astype(np.int64))
+
+def step_outline(left, right, values):
+    """구간 윗변을 이은 다각형 하나 (0에서 시작해 0으로 끝남)"""
+    verts = np.empty((2 * len(left) + 2, 2), dtype=np.float64)
+    verts[1:-1:2, 0] = left
+    verts[2:-1:2, 0] = right
+    verts[1:-1, 1] = np.repeat(values, 2)
+    verts[0] = (left[0], 0)
+    verts[-1] = (right[-1], 0)
+    return verts
+
+def band_outline(x, low, high):
+    """저가~고가 범위를 감싸는 다각형 하나"""
+    valid = ~(np.isnan(low) | np.isnan(high))
+    x, low, high = x[valid], low[valid], high[valid]
+    return np.concatenate([np.column_stack([x, high]), np.column_stack([x[::-1], low[::-1]])])
+
+def _out_of_range(ax, values):
+    """값이 현재 y축 범위를 벗어나는지 (NaN 제외)"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return False
+    low, high = ax.get_ylim()
+    return bool(values.min() < low or values.max() > high)
+
+def autoscale_y(ax, series=()):
+    """
+    y축 범위 재계산
+    Axes.relim()은 컬렉션을 무시하므로 같은 축의 막대/캔들 범위를 따로 반영
+    """
+    ax.relim(visible_only=True)
+    for item in series:
+        if item.axes is ax:
+            item.update_datalim()
+    ax.autoscale_view(scalex=False)
+
+class _Series:
+    """
+    PolyCollection 하나로 그리는 봉 묶음의 공통 부분
+    일반 모드는 봉마다 사각형 하나(꼭짓점 배열 보관), 고밀도 모드는 외곽선 다각형 몇 개
+    """
+
+    def __init__(self, ax, x, width, label=None):
+        self.axes = ax
+        self.x = np.asarray(x, dtype=np.float64)
+        self.width = width
+        self.dense = len(self.x) > ax.bbox.width / DENSE_PIXELS_PER_BAR
+        self.verts = None
+        self.colors = None
+        self.collection = PolyCollection([], edgecolors='none', label=label)
+
+    def artists(self):
+        return [self.collection]
+
+    def update_datalim(self):
+        self.axes.update_datalim(self.collection.get_datalim(self.axes.transData).get_points())
+
+    def reset(self, x, df):
+        """
+        봉 위치가 바뀌었을 때(기간 창이 하루 밀린 재검증 등) 컬렉션은 그대로 두고 꼭짓점만 다시 만듦
+        x: 새 봉 위치, df: 같은 길이의 새 프레임
+        """
+        self.x = np.asarray(x, dtype=np.float64)
+        self.dense = len(self.x) > self.axes.bbox.width / DENSE_PIXELS_PER_BAR
+        self.verts = None
+        self.colors = None
+        self._load(df)
+        self._render(0)
+
+    def _buckets(self):
+        """고밀도 모드 구간 (시작 위치, 구간 왼쪽/오른쪽/가운데 x)"""
+        starts = pixel_buckets(len(self.x), self.axes.bbox.width)
+        ends = np.r_[starts[1:], len(self.x)] - 1
+        half = self.width / 2
+        return starts, self.x[starts] - half, self.x[ends] + half, (self.x[starts] + self.x[ends]) / 2
+
+    def _set_polygons(self, polygons, colors):
+        """고밀도 모드: 다각형 몇 개로 전체를 다시 그림 (O(n) 벡터 연산)"""
+        self.collection.set_verts(polygons)
+        self.collection.set_facecolor(colors)
+
+    def _set_rects(self, rows):
+        """일반 모드: self.verts/self.colors에서 바뀐 rows만 반영"""
+        paths = self.collection.get_paths()
+        if len(paths) != len(self.verts) or len(rows) > _INPLACE_LIMIT:
+            self.collection.set_verts(self.verts)
+        else:
+            # 닫힌 경로는 꼭짓점 5개 (마지막 = 첫 꼭짓점)
+            for i in rows:
+                vertices = paths[i].vertices
+                vertices[:4] = self.verts[i]
+                vertices[4] = self.verts[i, 0]
+        self.collection.set_facecolor(self.colors)
+        self.collection.stale = True
+
+    @staticmethod
+    def _set_y(verts, rows, bottom, top):
+        verts[rows, 0, 1] = verts[rows, 3, 1] = bottom
+        verts[rows, 1, 1] = verts[rows, 2, 1] = top
+
+class BarSeries(_Series):
+    """
+    막대 그래프 (MACD 히스토그램 등)
+    막대마다 Rectangle을 만드는 ax.bar 대신 PolyCollection 하나로 그림
+    """
+
+    def __init__(self, ax, x, values, column, width, color, neg_color=None, alpha=1.0, label=None):
+        super().__init__(ax, x, width, label)
+        self.column = column
+        self.up_color = to_rgba(color, alpha)
+        self.down_color = to_rgba(neg_color or color, alpha)
+        self.values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+        self.collection.sticky_edges.y.append(0)  # 0 아래로 여백을 두지 않음
+        self._render(0)
+        ax.add_collection(self.collection)
+
+    def _load(self, df):
+        self.values = np.nan_to_num(df[self.column].to_numpy(dtype=np.float64))
+
+    def _up(self):
+        return self.values >= 0
+
+    def _render(self, start):
+        up = self._up()
+        if self.dense:
+            # 구간마다 0에서 가장 먼 값 (거래량은 모두 양수, 히스토그램 하락 막대는 음수)
+            starts, left, right, _ = self._buckets()
+            up_values = np.maximum.reduceat(np.where(up, self.values, 0), starts)
+            down = np.where(up, 0, self.values)
+            down_high = np.maximum.reduceat(down, starts)
+            down_values = np.where(down_high > 0, down_high, np.minimum.reduceat(down, starts))
+            self._set_polygons([step_outline(left, right, down_values), step_outline(left, right, up_values)],
+                               [self.down_color, self.up_color])
+            return
+
+        if self.verts is None:
+            self.verts = rect_vertices(self.x, 0.0, 0.0, self.width)
+            self.colors = np.empty((len(self.x), 4))
+        rows = np.arange(start, len(self.x))
+        self._set_y(self.verts, rows, 0.0, self.values[start:])
+        self.colors[start:] = np.where(up[start:, None], self.up_color, self.down_color)
+        self._set_rects(rows)
+
+    def set_values(self, df, start=0):
+        """df의 start 이후 값 반영, y축 범위를 벗어나면 True"""
+        self.values[start:] = np.nan_to_num(df[self.column].to_numpy(dtype=np.float64)[start:])
+        self._render(start)
+        return _out_of_range(self.axes, self.values[start:])
+
+    def update_last(self, values):
+        """마지막 막대 갱신 (실시간), y축 범위를 벗어나면 True"""
+        value = values.get(self.column)
+        if value is None or np.isnan(value):
+            return False
+        self.values[-1] = value
+        self._render(len(self.x) - 1)
+        return _out_of_range(self.axes, self.values[-1:])
+
+class VolumeBars(BarSeries):
+    """거래량 막대 (상승/하락 봉에 따라 색 구분)"""
+
+    def __init__(self, ax, x, df, width, up_color, down_color, alpha=0.6, label=None):
+        self.up = (df['close'] >= df['open']).to_numpy(copy=True)
+        super().__init__(ax, x, df['volume'].to_numpy(dtype=np.float64), 'volume',
+                         width, up_color, down_color, alpha, label)
+
+    def _load(self, df):
+        self.up = (df['close'] >= df['open']).to_numpy(copy=True)
+        super()._load(df)
+
+    def _up(self):
+        return self.up
+
+    def set_values(self, df, start=0):
+        self.up[start:] = (df['close'] >= df['open']).to_numpy()[start:]
+        return super().set_values(df, start)
+
+    def update_last(self, values):
+        if values.get('open') is not None and values.get('close') is not None:
+            self.up[-1] = values['close'] >= values['open']
+        return super().update_last(values)
+
+class Candlesticks(_Series):
+    """
+    캔들 차트 (PolyCollection 하나: 꼬리와 몸통 모두 사각형)
+    고밀도 모드에서는 저가~고가 범위를 다각형 하나로 그림
+    """
+
+    def __init__(self, ax, x, df, width, up_color, down_color, band_color='#dfe6e9', label=None):
+        super().__init__(ax, x, width, label)
+        self.up_color = to_rgba(up_color)
+        self.down_color = to_rgba(down_color)
+        self.band_color = to_rgba(band_color, 0.35)
+        self._load(df)
+        self._render(0)
+        ax.add_collection(self.collection)
+
+    def _load(self, df):
+        self.ohlc = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64, copy=True)
+
+        # 꼬리 폭: 몸통의 1/7, 최소 1픽셀
+        span = self.x[-1] - self.x[0] + self.width if len(self.x) else 1.0
+        self.wick_width = max(self.width / 7, span / max(self.axes.bbox.width, 1.0))
+
+    def _render(self, start):
+        open_, high, low, close = self.ohlc.T
+        if self.dense:
+            starts, _, _, middle = self._buckets()
+            self._set_polygons([band_outline(middle, np.fmin.reduceat(low, starts), np.fmax.reduceat(high, starts))],
+                               [self.band_color])
+            return
+
+        n = len(self.x)
+        if self.verts is None:
+            # 앞쪽 n개는 꼬리, 뒤쪽 n개는 몸통 (몸통이 위에 그려짐)
+            self.verts = np.concatenate([rect_vertices(self.x, 0.0, 0.0, self.wick_width),
+                                         rect_vertices(self.x, 0.0, 0.0, self.width)])
+            self.colors = np.empty((2 * n, 4))
+        rows = np.arange(start, n)
+        self._set_y(self.verts, rows, low[start:], high[start:])
+        self._set_y(self.verts, rows + n, np.minimum(open_, close)[start:], np.maximum(open_, close)[start:])
+        colors = np.where((close >= open_)[start:, None], self.up_color, self.down_color)
+        self.colors[rows] = colors
+        self.colors[rows + n] = colors
+        self._set_rects(np.concatenate([rows, rows + n]))
+
+    def set_values(self, df, start=0):
+        """df의 start 이후 봉 반영, y축 범위를 벗어나면 True"""
+        self.ohlc[start:] = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)[start:]
+        self._render(start)
+        return _out_of_range(self.axes, self.ohlc[start:, 1:3])
+
+    def update_last(self, values):
+        """당일 봉 갱신 (실시간), y축 범위를 벗어나면 True"""
+        if any(values.get(c) is None for c in ('open', 'high', 'low', 'close')):
+            return False
+        self.ohlc[-1] = [values['open'], values['high'], values['low'], values['close']]
+        self._render(len(self.x) - 1)
+        return _out_of_range(self.axes, self.ohlc[-1:, 1:3])
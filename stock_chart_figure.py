@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import platform
+import matplotlib
+import matplotlib.style
+import matplotlib.dates as mdates
+import matplotlib.ticker as mticker
+from matplotlib.artist import setp
+from stock_profiler import profiler
+from stock_resample import LEVEL_NAMES
+from stock_chart_artists import Candlesticks, VolumeBars, BarSeries, date_positions, bar_width
+
+# GUI 차트와 배치 리포트가 같은 모양으로 그리도록 차트 구성을 Qt와 분리
+
+# 가격 차트 표시 항목 (GUI 체크박스와 같은 이름, 기본값은 모두 표시)
+CHART_PANELS = ('candle', 'volume', 'rsi', 'macd', 'bollinger', 'stochastic')
+
+def setup_korean_font():
+    """운영체제별 한글 폰트 자동 설정"""
+    system = platform.system()
+
+    if system == 'Windows':
+        font_names = ['Malgun Gothic', 'NanumGothic', '맑은 고딕', '나눔고딕']
+    elif system == 'Darwin':
+        font_names = ['AppleGothic', 'Apple SD Gothic Neo', 'NanumGothic', 'Arial Unicode MS']
+    else:
+        font_names = ['NanumGothic', 'UnDotum', 'DejaVu Sans', 'Liberation Sans']
+
+    for font_name in font_names:
+        try:
+            matplotlib.rcParams['font.family'] = font_name
+            matplotlib.rcParams['axes.unicode_minus'] = False
+            return True
+        except:
+            continue
+
+    # 폰트를 찾지 못한 경우 기본 폰트 사용
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    return False
+
+def apply_chart_style():
+    """한글 폰트와 다크 테마 적용 (프로세스 시작 시 한 번)"""
+    setup_korean_font()
+    matplotlib.style.use('dark_background')
+
+def chart_title(symbol, level='D', currency_code='KRW'):
+    """가격 차트 기본 제목"""
+    chart_name = '주가' if level == 'D' else LEVEL_NAMES[level]
+    return f'{symbol} {chart_name} 차트 ({currency_code})'
+
+def build_price_chart(figure, df, options):
+    """
+    가격/지표 차트 구성 (위젯에 접근하지 않으므로 렌더링 스레드/워커 프로세스에서 호출 가능)
+    options: CHART_PANELS 항목별 표시 여부와 unit(이동평균 단위), currency(통화 기호), title
+    반환값: 실시간/꼬리 갱신에 쓰는 선, 캔들/막대 묶음, 채운 영역, 제목
+    """
+    unit = options['unit']
+    figure.patch.set_facecolor('#0a0e27')
+
+    # 서브플롯 설정
+    show_volume = options['volume'] and 'volume' in df.columns
+    num_indicators = sum([show_volume, options['rsi'], options['macd'], 
+                        options['stochastic'] and 'stoch_k' in df.columns])
+
+    if num_indicators > 0:
+        height_ratios = [3] + [1] * num_indicators
+        gs = figure.add_gridspec(num_indicators + 1, 1, height_ratios=height_ratios, hspace=0.3)
+        ax1 = figure.add_subplot(gs[0])
+        indicator_idx = 1
+    else:
+        ax1 = figure.add_subplot(111)
+
+    # 축 배경색 설정
+    ax1.set_facecolor('#0a0e27')
+
+    # 실시간 모드/재검증 시 마지막 값만 갱신할 선과 캔들/막대 묶음
+    lines = {}
+    series = {}
+    fills = {}
+
+    # 캔들/막대는 봉마다 artist를 만들지 않고 컬렉션 하나로 그림
+    x = date_positions(df.index)
+    width = bar_width(x)
+
+    # 메인 차트 (캔들 또는 종가, 이동평균선, 볼린저 밴드)
+    show_close = True
+    if options['candle'] and {'open', 'high', 'low'} <= set(df.columns):
+        candles = Candlesticks(ax1, x, df, width, '#ff5252', '#4a90e2', label='캔들')
+        series['candles'] = candles
+        show_close = candles.dense  # 봉이 너무 촘촘하면 고가~저가 범위 위에 종가선 표시
+    lines['close'] = ax1.plot(df.index, df['close'], label='종가' if show_close else '_종가',
+                              linewidth=2.5, color='#ffffff', visible=show_close)[0]
+    lines['ma9'] = ax1.plot(df.index, df['ma9'], label=f'9{unit} 평균', alpha=0.9, color='#ff6b6b', linewidth=2)[0]
+    lines['ma22'] = ax1.plot(df.index, df['ma22'], label=f'22{unit} 평균', alpha=0.9, color='#4ecdc4', linewidth=2)[0]
+
+    if options['bollinger']:
+        lines['bb_upper'] = ax1.plot(df.index, df['bb_upper'], '--', alpha=0.6, color='#95e1d3', label='볼린저 상단', linewidth=1.5)[0]
+        lines['bb_lower'] = ax1.plot(df.index, df['bb_lower'], '--', alpha=0.6, color='#f38181', label='볼린저 하단', linewidth=1.5)[0]
+        fills['bollinger'] = ax1.fill_between(df.index, df['bb_upper'], df['bb_lower'], alpha=0.05, color='#dfe6e9')
+
+    # 제목과 라벨
+    title = ax1.set_title(options['title'], fontsize=18, fontweight='bold', color='#ffffff', pad=20)
+    ax1.set_ylabel(f"가격 ({options['currency']})", color='#ffffff', fontsize=14)
+    ax1.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
+    ax1.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
+    ax1.tick_params(colors='#e0e0e0', labelsize=12)
+
+    # 축 테두리 색상
+    for spine in ax1.spines.values():
+        spine.set_edgecolor('#2d3561')
+        spine.set_linewidth(2)
+
+    # 거래량 차트
+    if show_volume:
+        ax_vol = figure.add_subplot(gs[indicator_idx])
+        ax_vol.set_facecolor('#0a0e27')
+        series['volume'] = VolumeBars(ax_vol, x, df, width, '#ff5252', '#4a90e2')
+        ax_vol.autoscale_view()
+        ax_vol.yaxis.set_major_formatter(mticker.EngFormatter())
+        ax_vol.set_ylabel('거래량', color='#ffffff', fontsize=12)
+        ax_vol.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
+        ax_vol.tick_params(colors='#e0e0e0', labelsize=11)
+        for spine in ax_vol.spines.values():
+            spine.set_edgecolor('#2d3561')
+            spine.set_linewidth(2)
+        indicator_idx += 1
+
+    # RSI 차트
+    if options['rsi']:
+        ax_rsi = figure.add_subplot(gs[indicator_idx])
+        ax_rsi.set_facecolor('#0a0e27')
+        lines['rsi'] = ax_rsi.plot(df.index, df['rsi'], color='#a29bfe', linewidth=2)[0]
+        ax_rsi.axhline(y=70, color='#ff6b6b', linestyle='--', alpha=0.6, linewidth=1.5)
+        ax_rsi.axhline(y=30, color='#6bcf7f', linestyle='--', alpha=0.6, linewidth=1.5)
+        fills['rsi'] = ax_rsi.fill_between(df.index, 30, 70, alpha=0.05, color='#636e72')
+        ax_rsi.set_ylabel('RSI', color='#ffffff', fontsize=12)
+        ax_rsi.set_ylim(0, 100)
+        ax_rsi.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
+        ax_rsi.tick_params(colors='#e0e0e0', labelsize=11)
+        for spine in ax_rsi.spines.values():
+            spine.set_edgecolor('#2d3561')
+            spine.set_linewidth(2)
+        indicator_idx += 1
+
+    # MACD 차트
+    if options['macd']:
+        ax_macd = figure.add_subplot(gs[indicator_idx])
+        ax_macd.set_facecolor('#0a0e27')
+        lines['macd'] = ax_macd.plot(df.index, df['macd'], label='MACD', color='#74b9ff', linewidth=2)[0]
+        lines['macd_signal'] = ax_macd.plot(df.index, df['macd_signal'], label='Signal', color='#fd79a8', linewidth=2)[0]
+        series['macd_histogram'] = BarSeries(ax_macd, x, df['macd_histogram'], 'macd_histogram',
+                                             width, '#81ecec', alpha=0.4, label='Histogram')
+        ax_macd.autoscale_view()
+        ax_macd.set_ylabel('MACD', color='#ffffff', fontsize=12)
+        ax_macd.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
+        ax_macd.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
+        ax_macd.tick_params(colors='#e0e0e0', labelsize=11)
+        for spine in ax_macd.spines.values():
+            spine.set_edgecolor('#2d3561')
+            spine.set_linewidth(2)
+        indicator_idx += 1
+
+    # 스토캐스틱 차트
+    if options['stochastic'] and 'stoch_k' in df.columns:
+        ax_stoch = figure.add_subplot(gs[indicator_idx])
+        ax_stoch.set_facecolor('#0a0e27')
+        lines['stoch_k'] = ax_stoch.plot(df.index, df['stoch_k'], label='%K', color='#55efc4', linewidth=2)[0]
+        lines['stoch_d'] = ax_stoch.plot(df.index, df['stoch_d'], label='%D', color='#ff7675', linewidth=2)[0]
+        ax_stoch.axhline(y=80, color='#ff6b6b', linestyle='--', alpha=0.6, linewidth=1.5)
+        ax_stoch.axhline(y=20, color='#6bcf7f', linestyle='--', alpha=0.6, linewidth=1.5)
+        ax_stoch.set_ylabel('Stochastic', color='#ffffff', fontsize=12)
+        ax_stoch.set_ylim(0, 100)
+        ax_stoch.legend(loc='upper left', framealpha=0.9, facecolor='#151a3a', edgecolor='#2d3561')
+        ax_stoch.grid(True, alpha=0.2, color='#2d3561', linestyle='-', linewidth=0.5)
+        ax_stoch.tick_params(colors='#e0e0e0', labelsize=11)
+        for spine in ax_stoch.spines.values():
+            spine.set_edgecolor('#2d3561')
+            spine.set_linewidth(2)
+
+    # x축 날짜 포맷
+    for ax in figure.get_axes():
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=3))
+        setp(ax.xaxis.get_majorticklabels(), rotation=45, color='#e0e0e0')
+
+    # 마지막 차트만 x축 레이블 표시
+    for ax in figure.get_axes()[:-1]:
+        ax.set_xticklabels([])
+
+    with profiler.span('tight_layout', 'render'):
+        figure.tight_layout()
+
+    return {'lines': lines, 'series': series, 'fills': fills, 'title': title}
+
+def build_portfolio_chart(figure, results):
+    """포트폴리오 자산 배분 파이 차트 구성"""
+    ax = figure.add_subplot(111)
+    ax.set_facecolor('#0a0e27')
+
+    if results:
+        labels = []
+        sizes = []
+        colors = ['#ff6b6b', '#4ecdc4', '#a29bfe', '#fd79a8', '#fdcb6e', '#6c5ce7', '#00b894', '#e17055', '#74b9ff', '#00d4ff']
+
+        for i, (symbol, data) in enumerate(results.items()):
+            labels.append(f"{symbol}\n{data['profit_rate']:.1f}%")
+            sizes.append(data['current_value_krw'])  # 원화 기준
+
+        wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors[:len(results)], 
+                                         autopct='%1.1f%%', startangle=90, 
+                                         textprops={'color': '#ffffff'})
+
+        # 글자 스타일
+        for text in texts:
+            text.set_fontsize(12)
+            text.set_color('#ffffff')
+            text.set_weight('bold')
+        for autotext in autotexts:
+            autotext.set_fontsize(11)
+            autotext.set_color('#000000')
+            autotext.set_weight('bold')
+
+        ax.set_title('포트폴리오 자산 배분 (원화 기준)', fontsize=16, fontweight='bold', color='#ffffff', pad=20)
+    else:
+        ax.text(0.5, 0.5, '포트폴리오가 비어있습니다', 
+               horizontalalignment='center', verticalalignment='center',
+               transform=ax.transAxes, fontsize=14, color='#ffffff')
+
+    figure.tight_layout()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from stock_profiler import profiler
+
+class RenderJob:
+    """차트 렌더링 요청 하나 (화면 캔버스와 같은 크기/해상도의 새 Figure에 그림)"""
+
+    def __init__(self, target, canvas, build, on_done=None, run_id=None):
+        figure = canvas.figure
+        self.target = target  # 'main', 'portfolio' 등 (target별로 마지막 요청만 유효)
+        self.size = tuple(figure.get_size_inches())
+        self.dpi = figure.dpi
+        self.base_dpi = figure.dpi / canvas.device_pixel_ratio  # 화면 배율 1 기준 해상도
+        self.facecolor = figure.get_facecolor()
+        self.build = build  # build(figure) -> 결과 (렌더링 스레드에서 호출되므로 위젯에 접근하지 않음)
+        self.on_done = on_done
+        self.run_id = run_id  # 계측 실행 ID (요청한 쪽 기준)
+        self.figure = None
+        self.result = None
+        self.background = None  # 실시간 갱신 대상(animated)을 뺀 배경 (없으면 None)
+        self.error = None
+
+def render_job(job):
+    """새 Figure에 차트를 구성하고 Agg로 래스터화 (위젯을 건드리지 않으므로 어느 스레드에서나 호출 가능)"""
+    try:
+        with profiler.use_run(job.run_id), profiler.span(f'render_{job.target}', 'render'):
+            # 배율 1 기준 해상도로 만든 뒤 화면 해상도로 바꿔, 고해상도 화면 배율 계산 기준을 화면 캔버스와 맞춤
+            figure = Figure(figsize=job.size, dpi=job.base_dpi, facecolor=job.facecolor)
+            canvas = FigureCanvasAgg(figure)
+            figure.set_dpi(job.dpi)
+            job.result = job.build(figure)
+            with profiler.span('canvas.draw', 'render'):
+                canvas.draw()
+                # 실시간 갱신 대상은 배경에서 빠져 있으므로 배경을 캐시한 뒤 위에 그림
+                animated = figure.findobj(lambda artist: artist.get_animated())
+                if animated:
+                    job.background = canvas.copy_from_bbox(figure.bbox)
+                    for artist in animated:
+                        artist.axes.draw_artist(artist)
+            job.figure = figure
+    except Exception as e:
+        job.error = str(e)
+    return job
+
+def adopt_figure(canvas, job):
+    """
+    렌더링이 끝난 Figure를 화면 캔버스에 연결하고 래스터 결과를 그대로 표시 (다시 그리지 않음)
+    렌더링 중 위젯 크기/해상도가 바뀌었으면 새 크기로 다시 그리고 False 반환
+    """
+    old = canvas.figure
+    figure = job.figure
+    rendered = figure.canvas
+    same_size = figure.dpi == old.dpi and tuple(figure.get_size_inches()) == tuple(old.get_size_inches())
+    # 렌더링 스레드의 픽셀은 연결을 바꾸기 전에 복사 (공개 API인 copy_from_bbox/restore_region만 사용)
+    pixels = rendered.copy_from_bbox(figure.bbox) if same_size else None
+    canvas.figure = figure
+    figure.set_canvas(canvas)
+
+    if pixels is None:
+        figure.set_dpi(old.dpi)
+        figure.set_size_inches(old.get_size_inches(), forward=False)
+        canvas.draw_idle()
+        return False
+
+    # 화면 캔버스 렌더러에 그대로 복원 후 다시 칠하기만 함 (Figure는 다시 그리지 않음)
+    canvas.restore_region(pixels)
+    canvas.update()
+    return True
+
+class _RenderWorker(QThread):
+    """렌더링 전용 스레드 (target별로 마지막 요청만 대기열에 유지)"""
+    rendered = pyqtSignal(object)  # job
+
+    def __init__(self):
+        super().__init__()
+        self.jobs = {}  # target -> 아직 시작하지 않은 마지막 요청
+        self.skipped = 0  # 시작 전에 새 요청으로 대체된 수
+        self._cond = threading.Condition()
+        self._stop = False
+
+    def put(self, job):
+        with self._cond:
+            if job.target in self.jobs:
+                self.skipped += 1
+            self.jobs[job.target] = job
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self.jobs.clear()
+            self._cond.notify()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while not self.jobs and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                target = next(iter(self.jobs))
+                job = self.jobs.pop(target)
+            self.rendered.emit(render_job(job))
+
+class ChartRenderer(QObject):
+    """
+    차트 렌더링 스케줄러
+    - Figure 구성, tight_layout, Agg 래스터화를 전용 스레드에서 수행하고 GUI 스레드는 결과만 화면에 복사
+    - 같은 target의 새 요청은 이전 요청을 대체 (늦게 끝난 이전 결과는 버림)
+    콜백은 모두 GUI 스레드에서 호출됨
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pending = {}  # target -> 결과를 기다리는 마지막 요청
+        self.stats = {'submitted': 0, 'rendered': 0, 'dropped': 0}
+        self.worker = _RenderWorker()
+        self.worker.rendered.connect(self._on_rendered)
+        self.worker.start()
+
+    def submit(self, target, canvas, build, on_done, run_id=None):
+        """
+        백그라운드 렌더링 요청 (RenderJob 반환)
+        canvas: 결과를 표시할 화면 캔버스 (현재 크기/해상도로 렌더링)
+        on_done(job): 최신 요청의 렌더링이 끝나면 호출 (job.error가 있으면 실패)
+        """
+        self.stats['submitted'] += 1
+        job = RenderJob(target, canvas, build, on_done, run_id)
+        self.pending[target] = job
+        self.worker.put(job)
+        return job
+
+    def render(self, target, canvas, build, run_id=None):
+        """현재 스레드에서 바로 렌더링 (대기 중인 같은 target 요청은 버림)"""
+        self.pending.pop(target, None)
+        return render_job(RenderJob(target, canvas, build, run_id=run_id))
+
+    def is_pending(self, target):
+        """target의 렌더링 결과를 기다리는 중인지"""
+        return target in self.pending
+
+    def pending_runs(self):
+        """렌더링 결과를 기다리는 계측 실행 ID"""
+        return {job.run_id for job in self.pending.values() if job.run_id is not None}
+
+    def shutdown(self, wait_ms=2000):
+        """대기 중인 요청을 버리고 렌더링 스레드 종료"""
+        self.pending.clear()
+        self.worker.stop()
+        self.worker.wait(wait_ms)
+
+    def _on_rendered(self, job):
+        if self.pending.get(job.target) is not job:
+            self.stats['dropped'] += 1  # 그 사이 새 요청이 들어온 결과
+            return
+        del self.pending[job.target]
+        self.stats['rendered'] += 1
+        job.on_done(job)
@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+# 평가 기준 통화
+BASE_CURRENCY = 'KRW'
+
+# 통화 코드 -> (표시 기호, 소수 자릿수)
+CURRENCIES = {
+    'KRW': ('₩', 0),
+    'USD': ('$', 2),
+    'JPY': ('¥', 0),
+    'HKD': ('HK$', 2),
+    'EUR': ('€', 2),
+    'GBP': ('£', 2),
+    'GBp': ('GBp ', 2),
+    'CNY': ('CN¥', 2),
+    'TWD': ('NT$', 0),
+    'CAD': ('C$', 2),
+    'AUD': ('A$', 2),
+    'CHF': ('CHF ', 2),
+    'SGD': ('S$', 2)
+}
+
+# 보조 단위 (런던 거래소는 펜스 단위로 호가)
+SUBUNITS = {'GBp': ('GBP', 0.01)}
+
+# Yahoo Finance 티커 접미사 -> 통화
+SUFFIX_CURRENCY = {
+    '.KS': 'KRW', '.KQ': 'KRW',
+    '.T': 'JPY',
+    '.HK': 'HKD',
+    '.SS': 'CNY', '.SZ': 'CNY',
+    '.TW': 'TWD', '.TWO': 'TWD',
+    '.L': 'GBp',
+    '.DE': 'EUR', '.F': 'EUR', '.PA': 'EUR', '.AS': 'EUR', '.MI': 'EUR', '.MC': 'EUR', '.BR': 'EUR',
+    '.TO': 'CAD', '.V': 'CAD',
+    '.AX': 'AUD',
+    '.SW': 'CHF',
+    '.SI': 'SGD'
+}
+
+# 환율을 받지 못했을 때 쓰는 값 (1단위당 원화)
+DEFAULT_RATES = {
+    'USD': 1350.0, 'JPY': 9.0, 'HKD': 173.0, 'EUR': 1470.0, 'GBP': 1710.0, 'CNY': 187.0,
+    'TWD': 42.0, 'CAD': 990.0, 'AUD': 890.0, 'CHF': 1530.0, 'SGD': 1000.0
+}
+
+def currency_symbol(code):
+    """통화 표시 기호 (모르는 통화는 코드 + 공백)"""
+    return CURRENCIES.get(code, (f'{code} ', 2))[0]
+
+def format_amount(amount, code):
+    """통화 기호와 자릿수를 맞춘 금액 문자열"""
+    symbol, decimals = CURRENCIES.get(code, (f'{code} ', 2))
+    return f"{symbol}{amount:,.{decimals}f}"
+
+class SymbolCurrencies:
+    """
+    종목 -> 통화
+    숫자 코드는 국내 주식(KRW), 그 외는 Yahoo 접미사로 판단하고 접미사가 없으면 USD
+    규칙과 다른 종목(예: 원화 ETF가 아닌 해외 상장 종목)은 파일에 직접 지정
+    """
+
+    def __init__(self, path='symbol_currency.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.overrides = {}
+        self.load()
+
+    def get(self, symbol):
+        with self.lock:
+            code = self.overrides.get(symbol)
+        if code:
+            return code
+        if symbol.isdigit():
+            return BASE_CURRENCY
+        if '.' in symbol:
+            return SUFFIX_CURRENCY.get(symbol[symbol.rindex('.'):].upper(), 'USD')
+        return 'USD'
+
+    def set(self, symbol, code):
+        """종목 통화 직접 지정 (None이면 규칙으로 되돌림)"""
+        with self.lock:
+            if code is None:
+                self.overrides.pop(symbol, None)
+            else:
+                self.overrides[symbol] = code
+        self.save()
+
+    def save(self):
+        try:
+            with self.lock:
+                data = json.dumps(self.overrides, ensure_ascii=False, indent=2, sort_keys=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"종목 통화 저장 오류: {e}")
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.overrides = json.load(f)
+        except:
+            self.overrides = {}
+
+_symbol_currencies = None
+_symbol_currencies_lock = threading.Lock()
+
+def get_symbol_currencies():
+    """프로그램 전체에서 공유하는 종목 통화 정보"""
+    global _symbol_currencies
+    with _symbol_currencies_lock:
+        if _symbol_currencies is None:
+            _symbol_currencies = SymbolCurrencies()
+        return _symbol_currencies
+
+def currency_of(symbol):
+    """종목의 통화 코드"""
+    return get_symbol_currencies().get(symbol)
+
+def _fx_ticker(code):
+    return f"{code}{BASE_CURRENCY}=X"
+
+class FxRates:
+    """
+    환율표 (모든 통화를 기준 통화 1단위당 값으로 보관, 통화 쌍은 두 값의 비율)
+    - 필요한 통화만 추적하고 refresh() 때 한 번의 요청으로 모두 갱신 (max_age보다 오래된 경우만)
+    - 마지막 환율은 파일에 저장해 다음 실행에서 네트워크 없이 바로 사용
+    - history(): 날짜별 환율 (메모리 캐시), convert()/convert_series(): 배열 단위 변환
+    """
+
+    def __init__(self, path='fx_rates.json', max_age=1800, limiter=None):
+        self.path = path
+        self.max_age = max_age  # 초
+        self.limiter = limiter
+        self.lock = threading.RLock()
+        self.rates = {}  # 통화 -> 기준 통화 환율
+        self.updated = {}  # 통화 -> 갱신 시각 (epoch 초)
+        self.tracked = {'USD'}  # 환율을 갱신할 통화
+        self._history = {}  # 통화 -> 날짜별 환율 Series
+        self._fetching = set()  # 백그라운드에서 받고 있는 통화
+        self.load()
+
+    def get_limiter(self):
+        if self.limiter is None:
+            from stock_rate_limiter import get_rate_limiter
+            self.limiter = get_rate_limiter()
+        return self.limiter
+
+    # ------------------------------------------------------------ 환율표
+
+    def track(self, codes, background=False):
+        """
+        환율이 필요한 통화 등록 (처음 보는 통화는 바로 받아 옴)
+        background: 작업 스레드에서 받고 바로 반환 (받는 동안은 저장된 값/기본값 사용, GUI 스레드용)
+        """
+        codes = {SUBUNITS.get(code, (code,))[0] for code in codes} - {BASE_CURRENCY}
+        with self.lock:
+            new = codes - self.tracked
+            self.tracked |= codes
+            new -= set(self.rates)
+        if not new:
+            return
+        if background:
+            self.refresh_async(new, force=True)
+        else:
+            self.refresh(new, force=True)
+
+    def stale(self, codes=None):
+        """갱신이 필요한 통화"""
+        now = time.time()
+        with self.lock:
+            codes = self.tracked if codes is None else codes
+            return {code for code in codes if now - self.updated.get(code, 0) > self.max_age}
+
+    def refresh(self, codes=None, force=False):
+        """추적 중인 통화 환율 갱신 (실패한 통화는 이전 값/기본값 유지), 갱신한 통화 수 반환"""
+        with self.lock:
+            codes = set(self.tracked if codes is None else codes)
+        if not force:
+            codes = self.stale(codes)
+        if not codes:
+            return 0
+        try:
+            rates = self.fetch_rates(sorted(codes))
+        except Exception as e:
+            print(f"환율 조회 오류: {e}")
+            return 0
+        now = time.time()
+        with self.lock:
+            for code, rate in rates.items():
+                self.rates[code] = rate
+                self.updated[code] = now
+        if rates:
+            self.save()
+        return len(rates)
+
+    def refresh_async(self, codes=None, force=False):
+        """refresh()를 작업 스레드에서 실행 (이미 받고 있는 통화는 제외)"""
+        with self.lock:
+            codes = set(self.tracked if codes is None else codes) - self._fetching
+            self._fetching |= codes
+        if not codes:
+            return
+
+        def run():
+            try:
+                self.refresh(codes, force=force)
+            finally:
+                with self.lock:
+                    self._fetching -= codes
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def fetch_rates(self, codes):
+        """Yahoo Finance에서 통화들의 최근 환율을 한 번에 조회 (통화 -> 환율)"""
+        import yfinance as yf
+        tickers = [_fx_ticker(code) for code in codes]
+        data = self.get_limiter().call('yahoo', lambda: yf.download(
+            tickers, period='5d', progress=False, threads=False, auto_adjust=False))
+        if data is None or data.empty:
+            return {}
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+        rates = {}
+        for code, ticker in zip(codes, tickers):
+            if ticker in close.columns:
+                values = close[ticker].dropna()
+                if not values.empty and values.iloc[-1] > 0:
+                    rates[code] = float(values.iloc[-1])
+        return rates
+
+    def set_rates(self, rates):
+        """환율 직접 지정 (통화 -> 기준 통화 환율)"""
+        now = time.time()
+        with self.lock:
+            for code, rate in rates.items():
+                self.rates[code] = float(rate)
+                self.updated[code] = now
+
+    def rate(self, code, to=BASE_CURRENCY):
+        """code 1단위의 to 통화 값 (모르는 통화는 NaN)"""
+        return self._to_base(code) / self._to_base(to)
+
+    def _to_base(self, code):
+        if code in SUBUNITS:
+            parent, scale = SUBUNITS[code]
+            return self._to_base(parent) * scale
+        if code == BASE_CURRENCY:
+            return 1.0
+        with self.lock:
+            rate = self.rates.get(code)
+        if rate is None:
+            rate = DEFAULT_RATES.get(code, np.nan)
+        return rate
+
+    def matrix(self, codes):
+        """통화 쌍 환율 행렬 (m[i, j] = codes[i] 1단위의 codes[j] 값)"""
+        base = np.array([self._to_base(code) for code in codes])
+        return base[:, None] / base[None, :]
+
+    def factors(self, currencies, to=BASE_CURRENCY):
+        """통화 배열 -> 환산 계수 배열 (통화 종류마다 한 번만 조회)"""
+        currencies = np.asarray(currencies, dtype=object)
+        if currencies.ndim == 0:
+            return np.float64(self.rate(currencies.item(), to))
+        # 해시로 통화 종류를 나눔 (문자열 정렬이 필요한 np.unique보다 빠름)
+        # None/NaN은 -1이 되므로 끝에 NaN을 붙여 -1이 마지막 통화가 아닌 NaN을 가리키게 함
+        inverse, codes = pd.factorize(currencies.ravel())
+        rates = np.array([self.rate(code, to) for code in codes] + [np.nan])
+        return rates[inverse].reshape(currencies.shape)
+
+    def convert(self, amounts, currencies, to=BASE_CURRENCY):
+        """
+        금액 배열을 한 번에 환산
+        currencies: 금액별 통화 배열 또는 통화 코드 하나
+        """
+        return np.asarray(amounts, dtype=np.float64) * self.factors(currencies, to)
+
+    # ------------------------------------------------------------ 과거 환율
+
+    def history(self, code, start, end=None):
+        """날짜별 환율 Series (기준 통화, 날짜 인덱스), 이미 받은 기간이면 캐시 사용"""
+        if code in SUBUNITS:
+            parent, scale = SUBUNITS[code]
+            return self.history(parent, start, end) * scale
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        if code == BASE_CURRENCY:
+            return pd.Series(1.0, index=pd.date_range(start, end), name=code)
+        with self.lock:
+            cached = self._history.get(code)
+        if cached is None or cached.index[0] > start + timedelta(days=7) or cached.index[-1] < end - timedelta(days=4):
+            cached = self.fetch_history(code, min(start, cached.index[0]) if cached is not None else start)
+            with self.lock:
+                self._history[code] = cached
+        return cached.loc[start:end]
+
+    def fetch_history(self, code, start):
+        """Yahoo Finance 일별 환율 조회"""
+        import yfinance as yf
+        ticker = _fx_ticker(code)
+        data = self.get_limiter().call('yahoo', lambda: yf.download(
+            ticker, start=start.strftime('%Y-%m-%d'), progress=False, threads=False, auto_adjust=False))
+        if data is None or data.empty:
+            raise ValueError(f"{ticker} 환율 데이터 없음")
+        close = data['Close']
+        if isinstance(close, pd.DataFrame):
+            close = close.iloc[:, 0]
+        index = close.index.tz_localize(None) if close.index.tz is not None else close.index
+        return close.set_axis(index.normalize()).dropna().rename(code)
+
+    def convert_series(self, prices, code, to=BASE_CURRENCY):
+        """
+        날짜 인덱스 가격(Series/DataFrame)을 그날 환율로 한 번에 환산
+        환율이 없는 날(휴장일)은 직전 환율 사용
+        """
+        if code == to:
+            return prices
+        index = prices.index.tz_localize(None) if prices.index.tz is not None else prices.index
+        dates = index.normalize()
+        rates = self.history(code, dates[0], dates[-1])
+        if to != BASE_CURRENCY:
+            rates = rates / self.history(to, dates[0], dates[-1]).reindex(rates.index).ffill()
+        # 조회 시작일 이전 값은 첫 환율로 채움
+        factors = rates.reindex(rates.index.union(dates)).ffill().bfill().reindex(dates).to_numpy()
+        if isinstance(prices, pd.DataFrame):
+            return prices.mul(factors, axis=0)
+        return prices * factors
+
+    # ------------------------------------------------------------ 저장
+
+    def info(self, codes=None):
+        """'1 USD = 1,350 KRW' 형식 문자열 목록"""
+        lines = []
+        with self.lock:
+            codes = sorted(self.tracked if codes is None else codes)
+        for code in codes:
+            rate = self.rate(code)
+            updated = self.updated.get(code)
+            text = f"1 {code} = {rate:,.2f} {BASE_CURRENCY}" if rate < 100 else f"1 {code} = {rate:,.0f} {BASE_CURRENCY}"
+            if updated:
+                text += f" ({datetime.fromtimestamp(updated):%H:%M} 기준)"
+            lines.append(text)
+        return lines
+
+    def save(self):
+        try:
+            with self.lock:
+                data = {'rates': self.rates, 'updated': self.updated, 'tracked': sorted(self.tracked)}
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(temp, self.path)
+        except Exception as e:
+            print(f"환율 저장 오류: {e}")
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.rates = {code: float(rate) for code, rate in data.get('rates', {}).items()}
+            self.updated = {code: float(t) for code, t in data.get('updated', {}).items()}
+            self.tracked |= set(data.get('tracked', []))
+        except:
+            pass
+
+_fx_rates = None
+_fx_rates_lock = threading.Lock()
+
+def get_fx_rates():
+    """프로그램 전체에서 공유하는 환율표"""
+    global _fx_rates
+    with _fx_rates_lock:
+        if _fx_rates is None:
+            _fx_rates = FxRates()
+        return _fx_rates
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="종목 통화/환율 확인")
+    parser.add_argument('symbols', nargs='*', help="통화를 확인할 종목 (예: 7203.T 0700.HK AAPL 005930)")
+    parser.add_argument('--set', nargs=2, metavar=('SYMBOL', 'CODE'), help="종목 통화 직접 지정 (CODE=auto이면 해제)")
+    parser.add_argument('--refresh', action='store_true', help="추적 중인 통화 환율 새로 받기")
+    args = parser.parse_args()
+
+    if args.set:
+        symbol, code = args.set
+        get_symbol_currencies().set(symbol, None if code == 'auto' else code)
+
+    fx = get_fx_rates()
+    codes = {currency_of(symbol) for symbol in args.symbols}
+    fx.track(codes)
+    if args.refresh:
+        fx.refresh(force=True)
+    for symbol in args.symbols:
+        code = currency_of(symbol)
+        print(f"{symbol:12s} {code}  1{currency_symbol(code).strip()} = {fx.rate(code):,.2f} {BASE_CURRENCY}")
+    print("\n".join(fx.info()))
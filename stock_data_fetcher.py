@@ -1,111 +1,266 @@
 import yfinance as yf
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime, date, timedelta
+import os
+import re
 import time
+import json
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from stock_profiler import profiler
+from stock_symbol_resolver import get_symbol_resolver
+from stock_http_cache import get_http_cache
+from stock_rate_limiter import get_rate_limiter, backoff_delay
+from stock_naver_parser import SiseDayRows, parse_sise_day, parse_last_page
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+class SourceMemory:
+    """
+    종목별 데이터 소스 기록 (성공 여부, 응답 시간 지수이동평균)
+    다음 수집 시 가장 빠르고 정확했던 소스를 먼저 시도하도록 순서를 정함.
+    저장은 save_interval초에 한 번만 하고, 그 사이 바뀐 기록은 다음 저장이나 flush()에서 기록
+    """
+    
+    def __init__(self, path='source_memory.json', alpha=0.3, save_interval=5.0):
+        self.path = path
+        self.alpha = alpha  # 응답 시간 EWMA 가중치
+        self.save_interval = save_interval
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # 임시 파일 쓰기/교체를 한 스레드씩
+        self.saved_at = 0.0
+        self.dirty = False
+        self.symbols = {}
+        self.load()
+    
+    def _stats(self, symbol, source):
+        return self.symbols.setdefault(symbol, {}).setdefault(source, {
+            'success': 0,
+            'failure': 0,
+            'latency': None,
+            'last_ok': None
+        })
+    
+    def record_success(self, symbol, source, latency):
+        """정상 응답 기록"""
+        with self.lock:
+            stats = self._stats(symbol, source)
+            stats['success'] += 1
+            stats['last_ok'] = True
+            if stats['latency'] is None:
+                stats['latency'] = latency
+            else:
+                stats['latency'] = self.alpha * latency + (1 - self.alpha) * stats['latency']
+            self.dirty = True
+        self._changed()
+    
+    def record_failure(self, symbol, source):
+        """실패/불완전 응답 기록"""
+        with self.lock:
+            stats = self._stats(symbol, source)
+            stats['failure'] += 1
+            stats['last_ok'] = False
+            self.dirty = True
+        self._changed()
+    
+    def _changed(self):
+        """마지막 저장 후 save_interval초가 지났으면 저장"""
+        if time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+    
+    def order(self, symbol, sources):
+        """
+        시도 순서 결정
+        최근 성공한 소스(응답 시간 순) -> 기록 없는 소스(기본 순서) -> 최근 실패한 소스
+        """
+        with self.lock:
+            known = dict(self.symbols.get(symbol, {}))
+        
+        def key(item):
+            index, source = item
+            stats = known.get(source)
+            if stats is None or stats['last_ok'] is None:
+                return (1, 0, index)
+            if stats['last_ok']:
+                return (0, stats['latency'] or 0, index)
+            return (2, 0, index)
+        
+        return [source for _, source in sorted(enumerate(sources), key=key)]
+    
+    def preferred(self, symbol):
+        """가장 먼저 시도할 소스 (기록이 없으면 None)"""
+        with self.lock:
+            known = self.symbols.get(symbol, {})
+            ok = [(s['latency'] or 0, name) for name, s in known.items() if s['last_ok']]
+        return min(ok)[1] if ok else None
+    
+    def flush(self):
+        """저장하지 않은 기록이 있으면 저장 (프로그램 종료 시)"""
+        if self.dirty:
+            self.save()
+    
+    def save(self):
+        """기록 저장 (임시 파일에 쓴 뒤 교체, 동시에 저장해도 파일이 잘리지 않음)"""
+        with self.save_lock:
+            try:
+                with self.lock:
+                    data = json.dumps(self.symbols, ensure_ascii=False, indent=2)
+                    self.dirty = False
+                temp = self.path + '.tmp'
+                with open(temp, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp, self.path)
+                self.saved_at = time.monotonic()
+            except Exception as e:
+                self.dirty = True
+                print(f"소스 기록 저장 오류: {e}")
+    
+    def load(self):
+        """기록 로드"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.symbols = json.load(f)
+        except:
+            self.symbols = {}
+
+_source_memory = None
+_source_memory_lock = threading.Lock()
+
+def get_source_memory():
+    """프로그램 전체에서 공유하는 소스 기록"""
+    global _source_memory
+    with _source_memory_lock:
+        if _source_memory is None:
+            _source_memory = SourceMemory()
+            atexit.register(_source_memory.flush)  # 저장 간격 안에 남은 기록
+        return _source_memory
 
 class StockDataFetcher:
     """실시간 주가 데이터를 가져오는 클래스"""
     
-    def __init__(self):
+    SOURCES = ('yahoo', 'naver', 'krx')
+    SOURCE_NAMES = {'yahoo': 'Yahoo Finance', 'naver': '네이버 금융', 'krx': 'KRX'}
+    CURRENT_TTL = 300  # 당일 데이터가 포함된 응답의 재검증 주기(초)
+    CLOSED_TTL = 86400  # 지난 KRX 구간의 재검증 주기(초) - 수정주가는 분할/배당 후 과거 값도 바뀜
+    KRX_WORKERS = 4  # KRX 구간 동시 요청 수
+    KRX_RETRIES = 3  # KRX 구간별 재시도 횟수 (5xx, 잘못된 응답 형식)
+    INTRADAY_PERIODS = {'1m': '5d', '5m': '60d'}  # 분봉 간격별 기본 조회 기간
+    CANCEL_POLL = 0.2  # 헤지 수집 중 외부 취소 확인 주기(초)
+    
+    def __init__(self, hedge_delay=2.0, source_memory=None, symbol_resolver=None, http_cache=None,
+                 rate_limiter=None):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        self.hedge_delay = hedge_delay  # 다음 소스를 추가로 시작하기까지 대기 시간(초)
+        self.source_memory = source_memory
+        self.symbol_resolver = symbol_resolver
+        self.http_cache = http_cache
+        self.rate_limiter = rate_limiter
     
     def fetch_from_yahoo(self, symbol, period='1y'):
         """Yahoo Finance에서 데이터 가져오기"""
         try:
-            # 한국 주식은 .KS, .KQ 접미사 사용
-            if symbol.isdigit():  # 한국 종목코드인 경우
-                ticker_symbol = f"{symbol}.KS"
-                ticker = yf.Ticker(ticker_symbol)
-                
-                # KOSDAQ 종목인 경우 .KQ로 재시도
-                hist = ticker.history(period=period)
-                if hist.empty:
-                    ticker_symbol = f"{symbol}.KQ"
-                    ticker = yf.Ticker(ticker_symbol)
-                    hist = ticker.history(period=period)
-            else:
-                ticker = yf.Ticker(symbol)
-                hist = ticker.history(period=period)
-            
-            if not hist.empty:
-                # 컬럼명 변경
-                hist = hist.rename(columns={
-                    'Open': 'open',
-                    'High': 'high',
-                    'Low': 'low',
-                    'Close': 'close',
-                    'Volume': 'volume'
-                })
-                return hist[['open', 'high', 'low', 'close', 'volume']]
-            else:
-                return None
-                
+            return self.yahoo_history(symbol, period=period)
         except Exception as e:
             print(f"Yahoo Finance 오류: {e}")
             return None
     
-    def fetch_from_naver(self, symbol, years=1):
-        """네이버 금융에서 데이터 가져오기"""
+    def fetch_intraday_from_yahoo(self, symbol, interval='1m', period=None):
+        """Yahoo Finance 분봉 가져오기 (1m은 최근 7일, 5m은 최근 60일까지 제공)"""
+        if interval not in self.INTRADAY_PERIODS:
+            raise ValueError(f"지원하지 않는 분봉 간격: {interval}")
+        try:
+            return self.yahoo_history(symbol, period=period or self.INTRADAY_PERIODS[interval],
+                                      interval=interval)
+        except Exception as e:
+            print(f"Yahoo Finance 분봉 오류: {e}")
+            return None
+    
+    def yahoo_history(self, symbol, **kwargs):
+        """Yahoo Finance history 조회 후 OHLCV 컬럼만 반환 (데이터 없으면 None)"""
+        # 한국 주식은 .KS, .KQ 접미사 사용
+        if symbol.isdigit():  # 한국 종목코드인 경우
+            resolver = self.get_resolver()
+            
+            # 기억된 접미사만 시도 (모르는 코드는 .KS -> .KQ 순서로 한 번만 확인)
+            # 기억된 접미사의 빈 응답은 대개 휴장/빈 구간이므로, 기간(period) 전체 조회가 빈 경우에만
+            # 다른 접미사를 확인하고 찾으면 바꿔 기억 (시장 이전)
+            recheck = 'period' in kwargs and 'interval' not in kwargs
+            for i, ticker_symbol in enumerate(resolver.candidates(symbol, recheck)):
+                ticker = yf.Ticker(ticker_symbol)
+                span_name = 'yahoo.history' if i == 0 else 'yahoo.history.suffix_retry'
+                with profiler.span(span_name, 'fetch', ticker=ticker_symbol):
+                    hist = self.get_limiter().call('yahoo', lambda: ticker.history(**kwargs))
+                if not hist.empty:
+                    resolver.remember_ticker(ticker_symbol)
+                    break
+        else:
+            ticker = yf.Ticker(symbol)
+            with profiler.span('yahoo.history', 'fetch', ticker=symbol):
+                hist = self.get_limiter().call('yahoo', lambda: ticker.history(**kwargs))
+        
+        if hist.empty:
+            return None
+        
+        # 컬럼명 변경
+        hist = hist.rename(columns={
+            'Open': 'open',
+            'High': 'high',
+            'Low': 'low',
+            'Close': 'close',
+            'Volume': 'volume'
+        })
+        return hist[['open', 'high', 'low', 'close', 'volume']]
+    
+    def fetch_from_naver(self, symbol, years=1, cancel_event=None, start_date=None):
+        """
+        네이버 금융에서 데이터 가져오기 (cancel_event가 설정되면 페이지 사이에서 중단)
+        start_date를 주면 years 대신 그 날짜까지만 페이지를 읽음
+        """
         try:
-            # 전체 페이지 수 확인
-            url = f"https://finance.naver.com/item/sise_day.nhn?code={symbol}"
-            response = requests.get(url, headers=self.headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            http = self.get_http()
+            
+            # 첫 페이지로 전체 페이지 수 확인 (당일 시세 포함 -> TTL 후 재검증)
+            url = f"https://finance.naver.com/item/sise_day.nhn?code={symbol}&page=1"
+            with profiler.span('naver.page', 'fetch', page=1):
+                first_response = http.get(url, headers=self.headers, ttl=self.CURRENT_TTL)
+            
+            # 2페이지 이후는 최신 거래일이 같으면 내용이 변하지 않으므로 최신 거래일 기준으로 영구 보관
+            anchor = re.search(rb'\d{4}\.\d{2}\.\d{2}', first_response.content)
+            anchor = anchor.group(0).decode() if anchor else None
             
             # 페이지 수 계산
-            pg_last = soup.find('td', class_='pgRR')
-            if pg_last:
-                last_page = int(pg_last.find('a')['href'].split('=')[-1])
-            else:
-                last_page = 1
+            last_page = parse_last_page(first_response.content)
             
-            # 데이터 수집
-            df_list = []
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=365 * years)
+            # 데이터 수집 (파싱한 값을 숫자 배열에 바로 기록)
+            rows = SiseDayRows()
+            if start_date is None:
+                start_date = datetime.now() - timedelta(days=365 * years)
             
             for page in range(1, min(last_page + 1, 100)):  # 최대 100페이지
-                url = f"https://finance.naver.com/item/sise_day.nhn?code={symbol}&page={page}"
-                response = requests.get(url, headers=self.headers)
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
                 
-                # pandas로 테이블 파싱
-                tables = pd.read_html(response.text, encoding='cp949')
-                if tables:
-                    df = tables[0].dropna()
-                    df_list.append(df)
+                if page == 1:
+                    response = first_response
+                else:
+                    url = f"https://finance.naver.com/item/sise_day.nhn?code={symbol}&page={page}"
+                    with profiler.span('naver.page', 'fetch', page=page):
+                        response = http.get(url, headers=self.headers, immutable=anchor is not None,
+                                            key_extra=anchor, ttl=self.CURRENT_TTL)
                 
-                time.sleep(0.1)  # 요청 간격 조절
+                # 시세 표 행 추출 (시작일 이전 행을 만나면 그 자리에서 중단)
+                with profiler.span('naver.parse', 'parse', page=page):
+                    added, reached_start = parse_sise_day(response.content, rows, start_date)
                 
-                # 날짜 확인
-                if not df.empty:
-                    last_date = pd.to_datetime(df.iloc[-1]['날짜'])
-                    if last_date < start_date:
-                        break
-            
-            if df_list:
-                # 전체 데이터 결합
-                all_data = pd.concat(df_list, ignore_index=True)
-                all_data['날짜'] = pd.to_datetime(all_data['날짜'])
-                all_data = all_data.set_index('날짜')
-                all_data = all_data.sort_index()
-                
-                # 컬럼명 변경
-                all_data = all_data.rename(columns={
-                    '종가': 'close',
-                    '시가': 'open',
-                    '고가': 'high',
-                    '저가': 'low',
-                    '거래량': 'volume'
-                })
-                
-                # 필요한 기간만 필터링
-                all_data = all_data[all_data.index >= start_date]
-                
-                return all_data[['open', 'high', 'low', 'close', 'volume']]
+                if reached_start or added == 0:
+                    break
+            
+            if rows.size:
+                return rows.to_frame()
             
             return None
             
@@ -113,64 +268,134 @@ class StockDataFetcher:
             print(f"네이버 금융 오류: {e}")
             return None
     
+    def krx_chunks(self, start_date, end_date):
+        """
+        요청 기간을 연 단위 구간으로 분할
+        지난 연도는 1/1~12/31 전체를 요청해 캐시 키를 고정하고, 올해 구간만 오늘까지 요청
+        반환값: [(구간 시작, 구간 끝, 지난 구간 여부), ...]
+        """
+        today = datetime.now().date()
+        chunks = []
+        for year in range(start_date.year, end_date.year + 1):
+            chunk_start = date(year, 1, 1)
+            if chunk_start > today:
+                break
+            chunk_end = min(date(year, 12, 31), today)
+            chunks.append((chunk_start, chunk_end, chunk_end < today))
+        return chunks
+    
+    def fetch_krx_chunk(self, symbol, chunk_start, chunk_end, closed, refresh=False):
+        """KRX 한 구간 요청 (수정주가라 지난 구간도 하루 단위로, 올해 구간은 CURRENT_TTL마다 재검증)"""
+        # KRX API 엔드포인트
+        url = "http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
+        
+        # 요청 파라미터
+        params = {
+            'bld': 'dbms/MDC/STAT/standard/MDCSTAT01701',
+            'locale': 'ko_KR',
+            'isuCd': symbol,
+            'isuCd2': symbol,
+            'strtDd': chunk_start.strftime('%Y%m%d'),
+            'endDd': chunk_end.strftime('%Y%m%d'),
+            'adjStkPrc_check': 'Y',
+            'adjStkPrc': '2',
+            'share': '1',
+            'money': '1',
+            'csvxls_isNo': 'false'
+        }
+        
+        with profiler.span('krx.request', 'fetch', symbol=symbol, year=chunk_start.year):
+            response = self.get_http().post(url, data=params, headers=self.headers,
+                                            ttl=self.CLOSED_TTL if closed else self.CURRENT_TTL,
+                                            refresh=refresh)
+        response.raise_for_status()
+        
+        output = response.json().get('output')
+        if output is None:
+            raise ValueError(f"KRX 응답 형식 오류 ({chunk_start.year})")
+        return output
+    
+    @staticmethod
+    def parse_krx_output(output):
+        """KRX 응답 행을 OHLCV DataFrame으로 변환 (문자열 숫자를 배열로 바로 변환)"""
+        def to_int(text):
+            text = text.replace(',', '')
+            return int(text) if text and text != '-' else 0
+        
+        n = len(output)
+        columns = {
+            'open': 'TDD_OPNPRC',
+            'high': 'TDD_HGPRC',
+            'low': 'TDD_LWPRC',
+            'close': 'TDD_CLSPRC',
+            'volume': 'ACC_TRDVOL'
+        }
+        data = {}
+        for col, key in columns.items():
+            values = np.fromiter((to_int(row[key]) for row in output), dtype=np.int64, count=n)
+            data[col] = values if col == 'volume' else values.astype(np.float64)
+        
+        index = pd.to_datetime([row['TRD_DD'] for row in output], format='%Y/%m/%d')
+        return pd.DataFrame(data, index=index.rename('TRD_DD'))
+    
     def fetch_from_krx(self, symbol, start_date, end_date):
-        """한국거래소(KRX)에서 데이터 가져오기"""
+        """
+        한국거래소(KRX)에서 데이터 가져오기
+        긴 기간은 연 단위 구간으로 나눠 동시에 요청 (구간별 캐시)
+        속도 제한/연결 오류는 요청 제한기가, 5xx와 잘못된 응답 형식은 구간별로 KRX_RETRIES번 재시도
+        """
         try:
-            # KRX API 엔드포인트
-            url = "http://data.krx.co.kr/comm/bldAttendant/getJsonData.cmd"
-            
-            # 요청 파라미터
-            params = {
-                'bld': 'dbms/MDC/STAT/standard/MDCSTAT01701',
-                'locale': 'ko_KR',
-                'isuCd': symbol,
-                'isuCd2': symbol,
-                'strtDd': start_date.strftime('%Y%m%d'),
-                'endDd': end_date.strftime('%Y%m%d'),
-                'adjStkPrc_check': 'Y',
-                'adjStkPrc': '2',
-                'share': '1',
-                'money': '1',
-                'csvxls_isNo': 'false'
-            }
-            
-            response = requests.post(url, data=params, headers=self.headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'output' in data:
-                    df = pd.DataFrame(data['output'])
-                    df['TRD_DD'] = pd.to_datetime(df['TRD_DD'])
-                    df = df.set_index('TRD_DD')
-                    
-                    # 컬럼명 변경
-                    df = df.rename(columns={
-                        'TDD_OPNPRC': 'open',
-                        'TDD_HGPRC': 'high',
-                        'TDD_LWPRC': 'low',
-                        'TDD_CLSPRC': 'close',
-                        'ACC_TRDVOL': 'volume'
-                    })
-                    
-                    # 숫자 형식으로 변환
-                    for col in ['open', 'high', 'low', 'close', 'volume']:
-                        df[col] = pd.to_numeric(df[col].str.replace(',', ''))
-                    
-                    return df[['open', 'high', 'low', 'close', 'volume']]
+            chunks = self.krx_chunks(start_date, end_date)
+            if not chunks:
+                return None
             
-            return None
+            def fetch(chunk):
+                for attempt in range(self.KRX_RETRIES):
+                    try:
+                        # 재시도 때는 캐시에 남은 잘못된 응답을 건너뜀
+                        return self.fetch_krx_chunk(symbol, *chunk, refresh=attempt > 0)
+                    except Exception as e:
+                        print(f"KRX API 오류 ({chunk[0].year}년 구간, {attempt + 1}/{self.KRX_RETRIES}): {e}")
+                        if attempt + 1 < self.KRX_RETRIES:
+                            time.sleep(backoff_delay(attempt))
+                return None
+            
+            with ThreadPoolExecutor(max_workers=min(self.KRX_WORKERS, len(chunks))) as executor:
+                outputs = list(executor.map(fetch, chunks))
+            
+            # 한 구간이라도 실패하면 중간이 빈 데이터가 되므로 실패로 보고 다음 소스를 시도
+            if any(output is None for output in outputs):
+                return None
+            
+            rows = [row for output in outputs for row in output]
+            if not rows:
+                return None
+            
+            df = self.parse_krx_output(rows)
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+            
+            # 요청 기간만 남김 (구간은 연 단위로 넓게 요청)
+            start = pd.Timestamp(start_date).normalize()
+            end = pd.Timestamp(end_date).normalize()
+            df = df[(df.index >= start) & (df.index <= end)]
+            
+            return df if not df.empty else None
             
         except Exception as e:
             print(f"KRX API 오류: {e}")
             return None
     
-    def get_stock_data(self, symbol, years=1):
+    def get_stock_data(self, symbol, years=1, hedged=False, cancel_event=None):
         """
         여러 소스에서 주가 데이터 가져오기
         우선순위: Yahoo Finance -> 네이버 금융 -> KRX
+        hedged=True이면 소스 기록 순서로 병렬 헤지 수집 (cancel_event가 설정되면 중단 후 None)
         """
         print(f"{symbol} 데이터 수집 중...")
         
+        if hedged:
+            return self.get_stock_data_hedged(symbol, years, cancel_event)
+        
         # 1. Yahoo Finance 시도
         data = self.fetch_from_yahoo(symbol, f"{years}y")
         if data is not None and not data.empty:
@@ -194,6 +419,162 @@ class StockDataFetcher:
         print("데이터 수집 실패")
         return None
     
+    def get_http(self):
+        """HTTP 캐시 (지정하지 않으면 공유 캐시 사용)"""
+        if self.http_cache is None:
+            self.http_cache = get_http_cache()
+        return self.http_cache
+    
+    def get_resolver(self):
+        """접미사 캐시 (지정하지 않으면 공유 캐시 사용)"""
+        if self.symbol_resolver is None:
+            self.symbol_resolver = get_symbol_resolver()
+        return self.symbol_resolver
+    
+    def get_limiter(self):
+        """요청 제한기 (지정하지 않으면 공유 제한기 사용)"""
+        if self.rate_limiter is None:
+            self.rate_limiter = get_rate_limiter()
+        return self.rate_limiter
+    
+    def get_memory(self):
+        """소스 기록 (지정하지 않으면 공유 기록 사용)"""
+        if self.source_memory is None:
+            self.source_memory = get_source_memory()
+        return self.source_memory
+    
+    def candidate_sources(self, symbol):
+        """종목에 사용할 수 있는 소스 (네이버/KRX는 한국 종목만)"""
+        if symbol.isdigit():
+            return list(self.SOURCES)
+        return ['yahoo']
+    
+    def fetch_from_source(self, source, symbol, years, cancel_event=None):
+        """소스 이름으로 데이터 가져오기"""
+        if source == 'yahoo':
+            return self.fetch_from_yahoo(symbol, f"{years}y")
+        if source == 'naver':
+            return self.fetch_from_naver(symbol, years, cancel_event=cancel_event)
+        if source == 'krx':
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=365 * years)
+            return self.fetch_from_krx(symbol, start_date, end_date)
+        raise ValueError(f"알 수 없는 소스: {source}")
+    
+    def fetch_range(self, source, symbol, start_date, end_date, cancel_event=None):
+        """
+        소스 이름으로 start_date~end_date(포함) 구간 가져오기 (증분 갱신용, 구간 밖 행이 섞일 수 있음)
+        Yahoo는 구간에 봉이 없으면 빈 DataFrame (휴장일뿐 아니라 숨겨진 오류/미상장도 포함), 예외가 나면 None
+        """
+        if source == 'yahoo':
+            try:
+                # Yahoo의 end는 해당 날짜를 포함하지 않음
+                data = self.yahoo_history(symbol, start=start_date.strftime('%Y-%m-%d'),
+                                          end=(end_date + timedelta(days=1)).strftime('%Y-%m-%d'))
+                return data if data is not None else pd.DataFrame(columns=PRICE_COLUMNS)
+            except Exception as e:
+                print(f"Yahoo Finance 오류: {e}")
+                return None
+        if source == 'naver':
+            return self.fetch_from_naver(symbol, cancel_event=cancel_event, start_date=start_date)
+        if source == 'krx':
+            return self.fetch_from_krx(symbol, start_date, end_date)
+        raise ValueError(f"알 수 없는 소스: {source}")
+    
+    @staticmethod
+    def is_valid_data(data):
+        """OHLCV 컬럼이 있고 종가가 유효한 데이터인지 확인"""
+        if data is None or data.empty:
+            return False
+        if any(col not in data.columns for col in PRICE_COLUMNS):
+            return False
+        close = data['close']
+        return bool(close.notna().all() and (close > 0).all())
+    
+    @staticmethod
+    def is_complete_data(data, years):
+        """요청 기간을 대부분 포함하는지 확인 (시작일 기준 45일 이내)"""
+        start_date = datetime.now() - timedelta(days=365 * years)
+        first = data.index[0]
+        if getattr(first, 'tzinfo', None) is not None:
+            first = first.tz_localize(None)
+        return first <= start_date + timedelta(days=45)
+    
+    def get_stock_data_hedged(self, symbol, years=1, stop_event=None):
+        """
+        헤지 방식 수집
+        가장 빨랐던 소스부터 시작하고, hedge_delay 안에 응답이 없거나 실패하면 다음 소스를 함께 시작.
+        처음 도착한 완전한 결과를 사용하고 나머지는 취소(결과 폐기)
+        stop_event: 외부 취소 신호 (설정되면 진행 중인 소스를 취소하고 None 반환)
+        """
+        memory = self.get_memory()
+        order = memory.order(symbol, self.candidate_sources(symbol))
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(order))
+        pending = {}
+        partial = None  # 기간이 부족한 결과와 응답 시간 (상장 기간이 짧은 종목 대비)
+        
+        def run(source):
+            with profiler.span(f'hedge.{source}', 'fetch', symbol=symbol):
+                return self.fetch_from_source(source, symbol, years, cancel_event)
+        
+        def launch():
+            source = order.pop(0)
+            now = time.perf_counter()
+            pending[executor.submit(run, source)] = (source, now)
+            return now + self.hedge_delay  # 다음 소스 시작 시각
+        
+        try:
+            deadline = launch()
+            while pending:
+                if stop_event is not None and stop_event.is_set():
+                    print(f"{symbol} 데이터 수집 취소")
+                    return None
+                
+                timeout = max(0.0, deadline - time.perf_counter()) if order else None
+                if stop_event is not None:
+                    timeout = self.CANCEL_POLL if timeout is None else min(timeout, self.CANCEL_POLL)
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    # 응답 지연 -> 다음 소스 추가 시작
+                    if order and time.perf_counter() >= deadline:
+                        deadline = launch()
+                    continue
+                
+                for future in done:
+                    source, started = pending.pop(future)
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print(f"{self.SOURCE_NAMES[source]} 오류: {e}")
+                        data = None
+                    
+                    if not self.is_valid_data(data):
+                        memory.record_failure(symbol, source)
+                    elif self.is_complete_data(data, years):
+                        memory.record_success(symbol, source, time.perf_counter() - started)
+                        print(f"{self.SOURCE_NAMES[source]}에서 데이터 수집 완료")
+                        return data
+                    elif partial is None or len(data) > len(partial[1]):
+                        partial = (source, data, time.perf_counter() - started)
+                
+                # 완전한 결과 없이 끝난 소스가 있으면 기다리지 않고 바로 다음 소스 시작
+                if order:
+                    deadline = launch()
+            
+            if partial is not None:
+                source, data, latency = partial
+                memory.record_success(symbol, source, latency)
+                print(f"{self.SOURCE_NAMES[source]}에서 데이터 수집 완료 (일부 기간)")
+                return data
+            
+            print("데이터 수집 실패")
+            return None
+        finally:
+            cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+    
     def save_to_mysql(self, data, symbol, connection):
         """MySQL 데이터베이스에 저장"""
         cursor = connection.cursor()
@@ -227,7 +608,40 @@ class StockDataFetcher:
             connection.rollback()
             print(f"저장 오류: {e}")
             raise
-
+    
+    def save_intraday_to_mysql(self, data, symbol, interval, connection):
+        """분봉을 stock_prices_intraday에 저장 (폴링마다 겹치는 구간은 갱신)"""
+        if data is None or data.empty:
+            return 0
+        
+        # 봉 시작 시각은 UTC로 저장
+        index = data.index.tz_convert('UTC').tz_localize(None) if data.index.tz is not None else data.index
+        rows = [
+            (symbol, interval, ts.to_pydatetime(), float(o), float(h), float(l), float(c), int(v))
+            for ts, o, h, l, c, v in zip(index, data['open'], data['high'], data['low'],
+                                         data['close'], data['volume'])
+        ]
+        
+        cursor = connection.cursor()
+        try:
+            cursor.executemany("""
+            INSERT INTO stock_prices_intraday
+            (symbol, bar_interval, ts, open_price, high_price, low_price, close_price, volume)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                high_price = VALUES(high_price),
+                low_price = VALUES(low_price),
+                close_price = VALUES(close_price),
+                volume = VALUES(volume)
+            """, rows)
+            connection.commit()
+            return len(rows)
+        except Exception as e:
+            connection.rollback()
+            print(f"분봉 저장 오류: {e}")
+            raise
+        finally:
+            cursor.close()
 
 # 사용 예시
 if __name__ == "__main__":
@@ -248,4 +662,4 @@ if __name__ == "__main__":
         data['MA22'] = data['close'].rolling(window=22).mean()
         
         print("\n이동평균 포함:")
-        print(data[['close', 'MA9', 'MA22']].tail())
\ No newline at end of file
+        print(data[['close', 'MA9', 'MA22']].tail())
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import os
+import pandas as pd
+
+# MySQL 연결 설정 (GUI와 배치 도구 공통, 환경변수로 변경 가능)
+DB_CONFIG = {
+    'host': os.environ.get('STOCK_DB_HOST', 'localhost'),
+    'user': os.environ.get('STOCK_DB_USER', 'root'),
+    'password': os.environ.get('STOCK_DB_PASSWORD', 'your_password'),
+    'database': os.environ.get('STOCK_DB_NAME', 'stock_db'),
+    'auth_plugin': 'mysql_native_password'  # 인증 플러그인 명시
+}
+
+def connect(**overrides):
+    """DB 연결 (overrides로 일부 설정 변경)"""
+    import mysql.connector
+    config = dict(DB_CONFIG)
+    config.update(overrides)
+    return mysql.connector.connect(**config)
+
+def load_symbols(connection, market=None):
+    """stocks 테이블의 종목 코드 목록 (market을 주면 해당 시장만)"""
+    cursor = connection.cursor()
+    try:
+        if market:
+            cursor.execute("SELECT symbol FROM stocks WHERE market = %s ORDER BY symbol", (market,))
+        else:
+            cursor.execute("SELECT symbol FROM stocks ORDER BY symbol")
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def load_last_dates(connection):
+    """stock_prices에 저장된 종목별 마지막 날짜 (종목 -> date)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT symbol, MAX(date) FROM stock_prices GROUP BY symbol")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+def load_prices(connection, symbols, start_date=None):
+    """
+    stock_prices의 여러 종목 일봉을 한 번의 쿼리로 조회
+    반환값: 종목 -> OHLCV DataFrame (날짜 인덱스, 데이터가 없는 종목은 제외)
+    """
+    if not symbols:
+        return {}
+    placeholders = ', '.join(['%s'] * len(symbols))
+    query = (f"SELECT symbol, date, open_price, high_price, low_price, close_price, volume "
+             f"FROM stock_prices WHERE symbol IN ({placeholders})")
+    params = list(symbols)
+    if start_date is not None:
+        query += " AND date >= %s"
+        params.append(start_date)
+    query += " ORDER BY symbol, date"
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not rows:
+        return {}
+
+    df = pd.DataFrame(rows, columns=['symbol', 'date', 'open', 'high', 'low', 'close', 'volume'])
+    df['date'] = pd.to_datetime(df['date'])
+    for column in ('open', 'high', 'low', 'close'):
+        df[column] = df[column].astype(float)  # DECIMAL -> float
+    df['volume'] = df['volume'].fillna(0).astype('int64')
+    return {symbol: group.drop(columns='symbol').set_index('date')
+            for symbol, group in df.groupby('symbol', sort=False)}
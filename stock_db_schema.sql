@@ -30,6 +30,20 @@ CREATE TABLE IF NOT EXISTS stock_prices (
     FOREIGN KEY (symbol) REFERENCES stocks(symbol) ON DELETE CASCADE
 );
 
+-- 분봉 데이터 테이블 (ts는 봉 시작 시각, UTC)
+CREATE TABLE IF NOT EXISTS stock_prices_intraday (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    symbol VARCHAR(20) NOT NULL,
+    bar_interval VARCHAR(4) NOT NULL,
+    ts DATETIME NOT NULL,
+    open_price DECIMAL(10, 2),
+    high_price DECIMAL(10, 2),
+    low_price DECIMAL(10, 2),
+    close_price DECIMAL(10, 2) NOT NULL,
+    volume BIGINT,
+    UNIQUE KEY unique_symbol_interval_ts (symbol, bar_interval, ts)
+);
+
 -- 이동평균 데이터 저장 테이블 (선택사항)
 CREATE TABLE IF NOT EXISTS moving_averages (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import os
+import gzip
+import time
+import argparse
+from datetime import datetime, timedelta
+import numpy as np
+from stock_indicators import calculate_all
+from stock_resample import OHLCV_COLUMNS
+
+# 내보내기 컬럼 (지표 컬럼명은 GUI/calculate_all과 동일)
+INDICATOR_COLUMNS = ['ma9', 'ma22', 'change_pct', 'rsi', 'macd', 'macd_signal', 'macd_histogram',
+                     'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d']
+EXPORT_FORMATS = ('parquet', 'csv')
+PARQUET_COMPRESSIONS = ('zstd', 'snappy', 'gzip', 'none')
+
+def export_columns(indicators=True):
+    """내보내기 파일의 컬럼 순서"""
+    return ['symbol', 'date'] + list(OHLCV_COLUMNS) + (INDICATOR_COLUMNS if indicators else [])
+
+def export_frame(symbol, df, indicators=True, params=None):
+    """
+    종목 하나의 내보내기용 DataFrame (symbol/date 컬럼 + 가격 + 지표)
+    모든 종목이 같은 컬럼/자료형을 갖도록 맞춤 (Parquet 스키마 고정)
+    """
+    frame = df[OHLCV_COLUMNS].astype(np.float64)
+    if indicators:
+        frame = calculate_all(frame, params)
+    index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    frame = frame.set_axis(index.normalize()).rename_axis('date').reset_index()
+    frame['volume'] = frame['volume'].fillna(0).astype(np.int64)
+    frame.insert(0, 'symbol', symbol)
+    return frame.reindex(columns=export_columns(indicators))
+
+class _ParquetSink:
+    """Parquet 파일 쓰기 (종목 하나 = 행 그룹 하나, 종목별 읽기/필터가 빠름)"""
+
+    def __init__(self, path, columns, compression='zstd'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        fields = [pa.field('symbol', pa.string()), pa.field('date', pa.date32())]
+        for column in columns[2:]:
+            fields.append(pa.field(column, pa.int64() if column == 'volume' else pa.float64()))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema,
+                                       compression=None if compression == 'none' else compression,
+                                       use_dictionary=['symbol'])
+
+    def write(self, frame):
+        table = self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table, row_group_size=max(1, len(frame)))
+
+    def close(self):
+        self.writer.close()
+
+class _CsvSink:
+    """CSV 파일 쓰기 (헤더는 한 번만, 종목마다 이어 쓰기 / compress=True이면 gzip)"""
+
+    def __init__(self, path, columns, float_format=None, compress=False):
+        if compress:
+            self.handle = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        else:
+            self.handle = open(path, 'w', encoding='utf-8', newline='')
+        self.float_format = float_format
+        self.handle.write(','.join(columns) + '\n')
+
+    def write(self, frame):
+        frame.to_csv(self.handle, header=False, index=False, date_format='%Y-%m-%d',
+                     float_format=self.float_format, lineterminator='\n')
+
+    def close(self):
+        self.handle.close()
+
+class StreamingExporter:
+    """
+    가격/지표 스트리밍 내보내기
+    종목 단위로 지표를 계산해 바로 파일에 쓰므로 전체 결과를 메모리에 모으지 않음
+    CSV는 경로가 .gz로 끝나면 gzip 압축
+    쓰는 동안은 임시 파일(.part)에 기록하고 close() 때 최종 경로로 교체 (중단되면 이전 파일 유지)
+    """
+
+    def __init__(self, path, fmt=None, indicators=True, params=None, compression='zstd', float_format=None):
+        self.path = path
+        self.fmt = fmt or ('csv' if '.csv' in os.path.basename(path) else 'parquet')
+        self.indicators = indicators
+        self.params = params
+        self.columns = export_columns(indicators)
+        self.symbols = 0
+        self.rows = 0
+        self._temp = path + '.part'
+        if self.fmt == 'parquet':
+            self.sink = _ParquetSink(self._temp, self.columns, compression)
+        else:
+            self.sink = _CsvSink(self._temp, self.columns, float_format, path.endswith('.gz'))
+
+    def write(self, symbol, df):
+        """종목 하나 기록 (비어 있으면 건너뜀), 기록한 행 수 반환"""
+        if df is None or df.empty:
+            return 0
+        frame = export_frame(symbol, df, self.indicators, self.params)
+        self.sink.write(frame)
+        self.symbols += 1
+        self.rows += len(frame)
+        return len(frame)
+
+    def close(self, discard=False):
+        """파일 마무리 (discard=True이면 임시 파일 삭제)"""
+        if self.sink is None:
+            return
+        self.sink.close()
+        self.sink = None
+        if discard:
+            os.remove(self._temp)
+        else:
+            os.replace(self._temp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=exc_type is not None)
+        return False
+
+def iter_price_batches(symbols, source='fetch', years=1, batch_size=50, connection=None, workers=8):
+    """
+    가격 데이터를 batch_size 종목씩 읽어 (종목, DataFrame) 순서대로 생성
+    메모리에는 한 묶음만 유지 (db: 묶음마다 쿼리 한 번 / fetch: 묶음 안에서 동시 수집)
+    """
+    start_date = (datetime.now() - timedelta(days=365 * years)).date()
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        if source == 'db':
+            from stock_db import load_prices
+            price_data = load_prices(connection, batch, start_date)
+        else:
+            from stock_batch_report import load_price_data
+            price_data = load_price_data(batch, years, workers)
+        for symbol in batch:
+            if symbol in price_data:
+                yield symbol, price_data.pop(symbol)
+
+def export_prices(price_batches, path, fmt=None, indicators=True, params=None, compression='zstd',
+                  progress=None):
+    """
+    (종목, DataFrame) 목록/제너레이터를 파일 하나로 내보내기
+    progress(symbol, rows): 종목 하나를 기록할 때마다 호출
+    반환값: (종목 수, 행 수)
+    """
+    with StreamingExporter(path, fmt, indicators, params, compression) as exporter:
+        for symbol, df in price_batches:
+            rows = exporter.write(symbol, df)
+            if progress is not None:
+                progress(symbol, rows)
+    return exporter.symbols, exporter.rows
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가격/지표 데이터 일괄 내보내기 (Parquet/CSV)")
+    parser.add_argument('symbols', nargs='*', help="종목 코드 목록 (생략하면 stocks 테이블 전체)")
+    parser.add_argument('--market', default=None, help="stocks 테이블에서 이 시장만 선택 (예: KOSPI)")
+    parser.add_argument('--years', type=int, default=1, help="기간 (년)")
+    parser.add_argument('--source', choices=['fetch', 'db'], default='db',
+                        help="가격 데이터: stock_prices 테이블 또는 수집(HTTP 캐시 사용)")
+    parser.add_argument('--output', required=True, help="출력 파일 (.parquet, .csv, .csv.gz)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default=None, help="생략하면 확장자로 판단")
+    parser.add_argument('--compression', choices=PARQUET_COMPRESSIONS, default='zstd', help="Parquet 압축")
+    parser.add_argument('--no-indicators', action='store_true', help="가격만 내보내기")
+    parser.add_argument('--batch-size', type=int, default=50, help="한 번에 읽는 종목 수")
+    parser.add_argument('--fetch-workers', type=int, default=8, help="동시 수집 수")
+    args = parser.parse_args()
+
+    connection = None
+    symbols = args.symbols
+    if not symbols or args.source == 'db':
+        from stock_db import connect, load_symbols
+        connection = connect()
+    try:
+        if not symbols:
+            symbols = load_symbols(connection, args.market)
+
+        started = time.perf_counter()
+        batches = iter_price_batches(symbols, args.source, args.years, args.batch_size, connection,
+                                     args.fetch_workers)
+        done = []
+        count, rows = export_prices(batches, args.output, args.format, not args.no_indicators,
+                                    compression=args.compression,
+                                    progress=lambda symbol, n: done.append(symbol) or print(
+                                        f"[{len(done)}/{len(symbols)}] {symbol} {n}행"))
+    finally:
+        if connection is not None:
+            connection.close()
+
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(args.output) / 1024 / 1024
+    print(f"{count}종목 {rows}행 내보내기 완료 - {args.output} ({size:.1f}MB, {elapsed:.1f}s, "
+          f"초당 {rows / max(elapsed, 1e-9):,.0f}행)")
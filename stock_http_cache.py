@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import requests
+from stock_rate_limiter import get_rate_limiter, source_for_url
+
+# 캐시 동작 방식
+#   normal : 신선한 캐시는 그대로, 만료된 캐시는 조건부 요청(ETag/Last-Modified)으로 재검증
+#   record : 항상 네트워크 요청 후 응답을 저장 (오프라인 재생용 녹화)
+#   replay : 네트워크 없이 저장된 응답만 사용 (없으면 CacheMiss)
+#   off    : 캐시 사용 안 함
+CACHE_MODES = ('normal', 'record', 'replay', 'off')
+
+class CacheMiss(requests.exceptions.ConnectionError):
+    """replay 모드에서 저장된 응답이 없을 때"""
+
+class CachedResponse:
+    """requests.Response와 같은 방식으로 쓰는 캐시 응답"""
+
+    def __init__(self, status_code, content, headers, url, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.url = url
+        self.from_cache = from_cache
+        self.encoding = requests.utils.get_encoding_from_headers(self.headers) or 'utf-8'
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.content.decode(self.encoding, errors='replace')
+        return self._text
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}: {self.url}")
+
+class HttpCache:
+    """
+    디스크 HTTP 응답 캐시 (SQLite 한 파일, 본문은 zlib 압축)
+    immutable=True 응답(이미 지난 날짜의 데이터)은 만료 없이 보관하고,
+    ttl 응답(당일 데이터)은 만료 후 조건부 요청으로 재검증
+    실제 네트워크 요청만 소스별 요청 제한기를 거침 (캐시 응답은 제한 없음)
+    """
+
+    def __init__(self, path='http_cache.sqlite', mode=None, default_ttl=300, session=None, rate_limiter=None):
+        mode = mode or os.environ.get('STOCK_HTTP_CACHE_MODE', 'normal')
+        if mode not in CACHE_MODES:
+            raise ValueError(f"알 수 없는 캐시 모드: {mode}")
+        self.path = path
+        self.mode = mode
+        self.default_ttl = default_ttl
+        self.session = session or requests.Session()
+        self.rate_limiter = rate_limiter
+        self.stats = {'hit': 0, 'miss': 0, 'revalidated': 0, 'stored': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.mode != 'off':
+            self._init_db()
+
+    # ------------------------------------------------------------ 저장소
+
+    def _conn(self):
+        """스레드별 SQLite 연결"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT,
+                body BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    @staticmethod
+    def make_key(method, url, params=None, data=None, key_extra=None):
+        """요청을 식별하는 캐시 키 (파라미터 순서 무관)"""
+        parts = [method.upper(), url,
+                 json.dumps(params or {}, sort_keys=True, default=str),
+                 json.dumps(data or {}, sort_keys=True, default=str),
+                 str(key_extra or '')]
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def _load(self, key):
+        row = self._conn().execute(
+            "SELECT url, status, headers, body, etag, last_modified, expires_at, last_access "
+            "FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body, etag, last_modified, expires_at, last_access = row
+        return {
+            'url': url,
+            'status': status,
+            'headers': json.loads(headers or '{}'),
+            'body': zlib.decompress(body) if body is not None else b'',
+            'etag': etag,
+            'last_modified': last_modified,
+            'expires_at': expires_at,
+            'last_access': last_access
+        }
+
+    def _store(self, key, response, expires_at):
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() in ('content-type', 'etag', 'last-modified', 'date')}
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            conn.execute("""
+                INSERT OR REPLACE INTO responses
+                (key, url, status, headers, body, etag, last_modified, fetched_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key, response.url, response.status_code, json.dumps(headers),
+                  zlib.compress(response.content, 6), response.headers.get('ETag'),
+                  response.headers.get('Last-Modified'), now, expires_at, now))
+            conn.commit()
+        self.stats['stored'] += 1
+
+    def _touch(self, key, expires_at=None, refresh_expiry=False):
+        with self._lock:
+            conn = self._conn()
+            if refresh_expiry:
+                conn.execute("UPDATE responses SET last_access = ?, expires_at = ?, fetched_at = ? WHERE key = ?",
+                             (time.time(), expires_at, time.time(), key))
+            else:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+
+    # ------------------------------------------------------------ 요청
+
+    def _send(self, method, url, params=None, data=None, headers=None, timeout=15):
+        """네트워크 요청 (소스별 제한 + 속도 제한/연결 오류 시 백오프 재시도)"""
+        def send():
+            return self.session.request(method, url, params=params, data=data,
+                                        headers=headers, timeout=timeout)
+
+        source = source_for_url(url)
+        if source is None:
+            return send()
+        if self.rate_limiter is None:
+            self.rate_limiter = get_rate_limiter()
+        return self.rate_limiter.call(source, send)
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                ttl=None, immutable=False, key_extra=None, timeout=15, refresh=False):
+        """
+        캐시를 거치는 HTTP 요청
+        immutable: 만료 없이 보관 (지난 날짜 데이터)
+        ttl: 만료 시간(초), 지정하지 않으면 default_ttl
+        key_extra: 같은 URL이라도 내용이 달라지는 기준값 (예: 네이버 최신 거래일)
+        refresh: 저장된 응답을 건너뛰고 다시 요청 (저장된 응답이 잘못된 형식일 때 재시도용)
+        """
+        if self.mode == 'off':
+            return self._send(method, url, params=params, data=data, headers=headers, timeout=timeout)
+
+        key = self.make_key(method, url, params, data, key_extra)
+        cached = self._load(key)
+        now = time.time()
+        expires_at = None if immutable else now + (self.default_ttl if ttl is None else ttl)
+
+        if self.mode == 'replay':
+            if cached is None:
+                self.stats['miss'] += 1
+                raise CacheMiss(f"재생할 응답 없음: {method} {url} {params or data or ''}")
+            self.stats['hit'] += 1
+            return CachedResponse(cached['status'], cached['body'], cached['headers'], cached['url'], True)
+
+        if self.mode == 'normal' and cached is not None and not refresh:
+            if cached['expires_at'] is None or cached['expires_at'] > now:
+                self.stats['hit'] += 1
+                if now - cached['last_access'] > 3600:  # 정리(prune) 기준용이므로 1시간 단위로만 갱신
+                    self._touch(key)
+                return CachedResponse(cached['status'], cached['body'], cached['headers'], cached['url'], True)
+
+            # 만료 -> 조건부 요청으로 재검증
+            conditional = dict(headers or {})
+            if cached['etag']:
+                conditional['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                conditional['If-Modified-Since'] = cached['last_modified']
+            if len(conditional) > len(headers or {}):
+                response = self._send(method, url, params=params, data=data,
+                                      headers=conditional, timeout=timeout)
+                if response.status_code == 304:
+                    self.stats['revalidated'] += 1
+                    self._touch(key, expires_at, refresh_expiry=True)
+                    return CachedResponse(cached['status'], cached['body'], cached['headers'], cached['url'], True)
+                self.stats['miss'] += 1
+                if response.status_code == 200:
+                    self._store(key, response, expires_at)
+                return response
+
+        self.stats['miss'] += 1
+        response = self._send(method, url, params=params, data=data, headers=headers, timeout=timeout)
+        if response.status_code == 200:
+            self._store(key, response, expires_at)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    # ------------------------------------------------------------ 관리
+
+    def prune(self, max_idle_days=30):
+        """오래 사용하지 않은 항목과 만료된 지 하루 넘은 항목 삭제"""
+        if self.mode == 'off':
+            return 0
+        now = time.time()
+        with self._lock:
+            conn = self._conn()
+            cursor = conn.execute(
+                "DELETE FROM responses WHERE last_access < ? OR (expires_at IS NOT NULL AND expires_at < ?)",
+                (now - max_idle_days * 86400, now - 86400)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        if self.mode == 'off':
+            return
+        with self._lock:
+            conn = self._conn()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def size_info(self):
+        """항목 수와 압축 저장 크기(bytes)"""
+        if self.mode == 'off':
+            return {'entries': 0, 'bytes': 0}
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+        ).fetchone()
+        return {'entries': entries, 'bytes': size}
+
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache():
+    """프로그램 전체에서 공유하는 HTTP 캐시"""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+            try:
+                _http_cache.prune()
+            except Exception as e:
+                print(f"HTTP 캐시 정리 오류: {e}")
+        return _http_cache
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+# 기본 지표 설정값 (GUI 및 최적화 기준값)
+DEFAULT_INDICATOR_PARAMS = {
+    'ma_short': 9,
+    'ma_long': 22,
+    'rsi_period': 14,
+    'macd_fast': 12,
+    'macd_slow': 26,
+    'macd_signal': 9,
+    'bb_period': 20,
+    'bb_std': 2,
+    'stoch_period': 14,
+    'stoch_smooth_k': 3,
+    'stoch_smooth_d': 3
+}
+
+class TechnicalIndicators:
+    """기술적 지표 계산 클래스"""
+
+    @staticmethod
+    def calculate_rsi(data, period=14):
+        """RSI (상대강도지수) 계산"""
+        delta = data.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        rs = gain / loss
+        rsi = 100 - (100 / (1 + rs))
+        return rsi
+
+    @staticmethod
+    def calculate_macd(data, fast=12, slow=26, signal=9):
+        """MACD 계산"""
+        ema_fast = data.ewm(span=fast).mean()
+        ema_slow = data.ewm(span=slow).mean()
+        macd_line = ema_fast - ema_slow
+        signal_line = macd_line.ewm(span=signal).mean()
+        histogram = macd_line - signal_line
+        return macd_line, signal_line, histogram
+
+    @staticmethod
+    def calculate_bollinger_bands(data, period=20, std_dev=2):
+        """볼린저 밴드 계산"""
+        middle_band = data.rolling(window=period).mean()
+        std = data.rolling(window=period).std()
+        upper_band = middle_band + (std * std_dev)
+        lower_band = middle_band - (std * std_dev)
+        return upper_band, middle_band, lower_band
+
+    @staticmethod
+    def calculate_stochastic(high, low, close, period=14, smooth_k=3, smooth_d=3):
+        """스토캐스틱 계산"""
+        lowest_low = low.rolling(window=period).min()
+        highest_high = high.rolling(window=period).max()
+        k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
+        k_percent = k_percent.rolling(window=smooth_k).mean()
+        d_percent = k_percent.rolling(window=smooth_d).mean()
+        return k_percent, d_percent
+
+def calculate_all(df, params=None):
+    """
+    이동평균과 모든 기술적 지표를 DataFrame에 추가
+    컬럼명은 GUI와 동일하게 유지 (ma9/ma22 등은 설정값과 무관하게 고정)
+    """
+    p = dict(DEFAULT_INDICATOR_PARAMS)
+    if params:
+        p.update(params)
+
+    close = df['close']
+
+    # 이동평균
+    df['ma9'] = close.rolling(window=p['ma_short']).mean()
+    df['ma22'] = close.rolling(window=p['ma_long']).mean()
+
+    # 변동률
+    df['change_pct'] = close.pct_change() * 100
+
+    # RSI
+    df['rsi'] = TechnicalIndicators.calculate_rsi(close, p['rsi_period'])
+
+    # MACD
+    macd, signal, histogram = TechnicalIndicators.calculate_macd(
+        close, p['macd_fast'], p['macd_slow'], p['macd_signal']
+    )
+    df['macd'] = macd
+    df['macd_signal'] = signal
+    df['macd_histogram'] = histogram
+
+    # 볼린저 밴드
+    upper, middle, lower = TechnicalIndicators.calculate_bollinger_bands(
+        close, p['bb_period'], p['bb_std']
+    )
+    df['bb_upper'] = upper
+    df['bb_middle'] = middle
+    df['bb_lower'] = lower
+
+    # 스토캐스틱 (high, low 데이터가 있는 경우)
+    if 'high' in df.columns and 'low' in df.columns:
+        k, d = TechnicalIndicators.calculate_stochastic(
+            df['high'], df['low'], close,
+            p['stoch_period'], p['stoch_smooth_k'], p['stoch_smooth_d']
+        )
+        df['stoch_k'] = k
+        df['stoch_d'] = d
+
+    return df
+
+
+class IncrementalIndicators:
+    """
+    실시간 갱신용 지표 계산기
+    마지막 행만 바뀔 때 전체 이력 대신 꼬리 구간(rolling 지표)과 EMA 상태(MACD)로 마지막 행을 다시 계산
+    calculate_all과 같은 값을 내며, 갱신 비용은 이력 길이와 무관
+    """
+
+    def __init__(self, df, params=None):
+        p = dict(DEFAULT_INDICATOR_PARAMS)
+        if params:
+            p.update(params)
+        self.params = p
+        # 마지막 행 계산에 필요한 꼬리 길이
+        self.window = max(p['ma_short'], p['ma_long'], p['bb_period'], p['rsi_period'] + 1,
+                          p['stoch_period'] + p['stoch_smooth_k'] + p['stoch_smooth_d'] - 2) + 1
+        self._init_ema_state(df)
+
+    @staticmethod
+    def _alpha(span):
+        return 2.0 / (span + 1.0)
+
+    def _init_ema_state(self, df):
+        """마지막 직전 행까지의 EMA 값과 가중치 합 (pandas ewm(adjust=True)와 동일한 재귀식용)"""
+        p = self.params
+        committed = df['close'].iloc[:-1]
+        n = len(committed)
+        self.ema = {}
+        if n == 0:
+            return
+        fast = committed.ewm(span=p['macd_fast']).mean()
+        slow = committed.ewm(span=p['macd_slow']).mean()
+        signal = (fast - slow).ewm(span=p['macd_signal']).mean()
+        for key, series, span in (('fast', fast, p['macd_fast']), ('slow', slow, p['macd_slow']),
+                                  ('signal', signal, p['macd_signal'])):
+            a = self._alpha(span)
+            self.ema[key] = [float(series.iloc[-1]), (1 - (1 - a) ** n) / a]
+
+    def _ema_next(self, key, span, x, commit=False):
+        """EMA 상태에 x를 한 번 더 반영한 값"""
+        if key not in self.ema:
+            value, weight = x, 1.0
+        else:
+            prev, prev_weight = self.ema[key]
+            decay = 1 - self._alpha(span)
+            weight = 1 + decay * prev_weight
+            value = (x + decay * prev_weight * prev) / weight
+        if commit:
+            self.ema[key] = [value, weight]
+        return value
+
+    def _macd(self, close, commit=False):
+        p = self.params
+        fast = self._ema_next('fast', p['macd_fast'], close, commit)
+        slow = self._ema_next('slow', p['macd_slow'], close, commit)
+        macd = fast - slow
+        signal = self._ema_next('signal', p['macd_signal'], macd, commit)
+        return macd, signal
+
+    def commit(self, close):
+        """마지막 행이 확정될 때 (새 행 추가 직전) EMA 상태 전진"""
+        self._macd(close, commit=True)
+
+    def update_last(self, df):
+        """df 마지막 행의 지표 컬럼을 다시 계산해 기록"""
+        p = self.params
+        tail = df.iloc[-self.window:]
+        close = tail['close']
+
+        values = {
+            'ma9': close.iloc[-p['ma_short']:].mean() if len(close) >= p['ma_short'] else float('nan'),
+            'ma22': close.iloc[-p['ma_long']:].mean() if len(close) >= p['ma_long'] else float('nan'),
+            'change_pct': (close.iloc[-1] / close.iloc[-2] - 1) * 100 if len(close) >= 2 else float('nan'),
+            'rsi': TechnicalIndicators.calculate_rsi(close, p['rsi_period']).iloc[-1]
+        }
+
+        macd, signal = self._macd(float(close.iloc[-1]))
+        values['macd'] = macd
+        values['macd_signal'] = signal
+        values['macd_histogram'] = macd - signal
+
+        upper, middle, lower = TechnicalIndicators.calculate_bollinger_bands(close, p['bb_period'], p['bb_std'])
+        values['bb_upper'] = upper.iloc[-1]
+        values['bb_middle'] = middle.iloc[-1]
+        values['bb_lower'] = lower.iloc[-1]
+
+        if 'stoch_k' in df.columns:
+            k, d = TechnicalIndicators.calculate_stochastic(
+                tail['high'], tail['low'], close,
+                p['stoch_period'], p['stoch_smooth_k'], p['stoch_smooth_d']
+            )
+            values['stoch_k'] = k.iloc[-1]
+            values['stoch_d'] = d.iloc[-1]
+
+        columns = [c for c in values if c in df.columns]
+        df.iloc[-1, [df.columns.get_loc(c) for c in columns]] = [values[c] for c in columns]
+        return values
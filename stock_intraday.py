@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+# 분봉 간격(초)
+INTERVAL_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '60m': 3600
+}
+
+class BarRingBuffer:
+    """
+    고정 크기 분봉 링 버퍼 (NumPy 배열)
+    가득 차면 가장 오래된 봉을 덮어쓰므로 장중 내내 메모리가 일정하게 유지됨
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)  # 봉 시작 시각 (epoch 초)
+        self.ohlc = np.zeros((capacity, 4), dtype=np.float64)  # open, high, low, close
+        self.volume = np.zeros(capacity, dtype=np.int64)
+        self.head = 0  # 다음에 쓸 위치
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _last_index(self):
+        return (self.head - 1) % self.capacity
+
+    def append(self, ts, open_, high, low, close, volume):
+        """새 봉 추가 (O(1))"""
+        i = self.head
+        self.ts[i] = ts
+        row = self.ohlc[i]
+        row[0] = open_
+        row[1] = high
+        row[2] = low
+        row[3] = close
+        self.volume[i] = volume
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def update_last(self, high, low, close, volume):
+        """마지막 봉 갱신 (형성 중인 봉, O(1))"""
+        i = self._last_index()
+        row = self.ohlc[i]
+        row[1] = high
+        row[2] = low
+        row[3] = close
+        self.volume[i] = volume
+
+    def last(self):
+        """마지막 봉 (ts, open, high, low, close, volume)"""
+        if self.count == 0:
+            return None
+        i = self._last_index()
+        return (int(self.ts[i]), *self.ohlc[i].tolist(), int(self.volume[i]))
+
+    def last_ts(self):
+        return int(self.ts[self._last_index()]) if self.count else None
+
+    def _order(self):
+        """오래된 순서의 인덱스"""
+        start = (self.head - self.count) % self.capacity
+        return (start + np.arange(self.count)) % self.capacity
+
+    def closes(self, n=None):
+        """최근 n개 종가 (오래된 순)"""
+        order = self._order()
+        if n is not None:
+            order = order[-n:]
+        return self.ohlc[order, 3]
+
+    def to_frame(self, tz='Asia/Seoul'):
+        """오래된 순서의 OHLCV DataFrame"""
+        order = self._order()
+        index = pd.to_datetime(self.ts[order], unit='s', utc=True).tz_convert(tz)
+        ohlc = self.ohlc[order]
+        return pd.DataFrame({
+            'open': ohlc[:, 0],
+            'high': ohlc[:, 1],
+            'low': ohlc[:, 2],
+            'close': ohlc[:, 3],
+            'volume': self.volume[order]
+        }, index=index)
+
+    def nbytes(self):
+        return self.ts.nbytes + self.ohlc.nbytes + self.volume.nbytes
+
+class BarAggregator:
+    """
+    기준 분봉을 상위 분봉(5분/15분/60분 등)으로 누적
+    새 봉마다 현재 구간만 갱신하므로 O(1), 같은 시각 봉이 다시 들어오면(형성 중인 봉) 차이만 반영
+    """
+
+    def __init__(self, interval, capacity=512):
+        self.interval = interval
+        self.seconds = INTERVAL_SECONDS[interval]
+        self.bars = BarRingBuffer(capacity)
+        self.bucket = None
+        self._last_base_ts = None
+        self._last_base_volume = 0
+
+    def on_bar(self, ts, open_, high, low, close, volume):
+        bucket = ts - ts % self.seconds
+
+        if bucket != self.bucket:
+            # 새 구간 시작
+            self.bucket = bucket
+            self.bars.append(bucket, open_, high, low, close, volume)
+        else:
+            _, _, cur_high, cur_low, _, cur_volume = self.bars.last()
+            if ts == self._last_base_ts:
+                cur_volume -= self._last_base_volume  # 같은 기준 봉 재수신 -> 이전 거래량 제거
+            self.bars.update_last(max(cur_high, high), min(cur_low, low), close, cur_volume + volume)
+
+        self._last_base_ts = ts
+        self._last_base_volume = volume
+
+class IntradaySession:
+    """
+    장중 분봉 세션
+    기준 분봉 링 버퍼와 상위 분봉 누적기를 함께 관리
+    """
+
+    def __init__(self, symbol, base_interval='1m', timeframes=('5m', '15m', '60m'),
+                 capacity=1024, aggregate_capacity=512):
+        self.symbol = symbol
+        self.base_interval = base_interval
+        self.bars = BarRingBuffer(capacity)
+        self.aggregators = {
+            tf: BarAggregator(tf, aggregate_capacity)
+            for tf in timeframes
+            if INTERVAL_SECONDS[tf] > INTERVAL_SECONDS[base_interval]
+        }
+
+    def on_bar(self, ts, open_, high, low, close, volume):
+        """
+        기준 분봉 수신 (O(1))
+        같은 시각 봉은 갱신, 이전 시각 봉은 무시 (폴링 중복 대비)
+        반환값: 새 봉이면 True
+        """
+        last_ts = self.bars.last_ts()
+        if last_ts is not None and ts < last_ts:
+            return False
+
+        is_new = ts != last_ts
+        if is_new:
+            self.bars.append(ts, open_, high, low, close, volume)
+        else:
+            self.bars.update_last(high, low, close, volume)
+
+        for aggregator in self.aggregators.values():
+            aggregator.on_bar(ts, open_, high, low, close, volume)
+        return is_new
+
+    def load_frame(self, df):
+        """DataFrame(분봉)을 순서대로 반영, 추가된 새 봉 수 반환"""
+        if df is None or df.empty:
+            return 0
+        index = df.index if df.index.tz is None else df.index.tz_convert('UTC')
+        ts = index.as_unit('s').asi8  # epoch 초
+        values = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+        volumes = df['volume'].to_numpy(dtype=np.int64)
+        added = 0
+        for i in range(len(ts)):
+            o, h, l, c = values[i]
+            if self.on_bar(int(ts[i]), o, h, l, c, int(volumes[i])):
+                added += 1
+        return added
+
+    def frame(self, timeframe=None):
+        """분봉 DataFrame (timeframe이 없으면 기준 분봉)"""
+        if timeframe is None or timeframe == self.base_interval:
+            return self.bars.to_frame()
+        return self.aggregators[timeframe].bars.to_frame()
+
+    def nbytes(self):
+        """세션 전체 메모리 사용량 (고정)"""
+        return self.bars.nbytes() + sum(a.bars.nbytes() for a in self.aggregators.values())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from stock_profiler import profiler
+from stock_data_fetcher import StockDataFetcher
+
+# 작업 우선순위 (클수록 먼저 실행)
+PRIORITY_INTERACTIVE = 10  # 사용자가 직접 요청한 분석
+PRIORITY_BACKGROUND = 0  # 포트폴리오 현재가 갱신 등
+
+class _JobSignals(QObject):
+    """작업 스레드 -> GUI 스레드 전달용 시그널"""
+    finished = pyqtSignal(object, object)  # job, data
+    failed = pyqtSignal(object, str)  # job, 오류 메시지
+    progress = pyqtSignal(object, str)  # job, 진행 메시지
+
+class FetchJob(QRunnable):
+    """(종목, 기간) 하나를 수집하는 작업 (같은 요청의 대기자들이 결과를 공유)"""
+
+    def __init__(self, key, priority, fetcher, run_id=None):
+        super().__init__()
+        self.setAutoDelete(False)  # 스케줄러가 참조를 관리
+        self.key = key
+        self.priority = priority
+        self.fetcher = fetcher
+        self.run_id = run_id  # 계측 실행 ID (처음 요청한 쪽 기준)
+        self.tickets = []
+        self.cancel_event = threading.Event()
+        self.started = False
+        self.signals = _JobSignals()
+
+    def run(self):
+        self.started = True
+        if self.cancel_event.is_set():
+            self.signals.failed.emit(self, "취소됨")
+            return
+
+        symbol, years = self.key
+        try:
+            # 가장 빨랐던 소스부터 시작하고, 지연/실패 시 다음 소스를 병렬로 시도
+            preferred = self.fetcher.get_memory().preferred(symbol) or 'yahoo'
+            self.signals.progress.emit(self, f"{StockDataFetcher.SOURCE_NAMES[preferred]}에서 데이터 수집 중...")
+            with profiler.use_run(self.run_id), profiler.span('fetch', 'fetch', symbol=symbol,
+                                                              waiters=len(self.tickets)):
+                data = self.fetcher.get_stock_data(symbol, years, hedged=True, cancel_event=self.cancel_event)
+
+            if self.cancel_event.is_set():
+                self.signals.failed.emit(self, "취소됨")
+            elif data is not None and not data.empty:
+                self.signals.finished.emit(self, data)
+            else:
+                self.signals.failed.emit(self, "데이터를 가져올 수 없습니다.")
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+
+class FetchTicket:
+    """submit() 결과 - 요청 하나 (cancel()로 결과 수신 취소)"""
+
+    def __init__(self, scheduler, job, on_finished, on_error=None, on_progress=None, group=None):
+        self.scheduler = scheduler
+        self.job = job
+        self.on_finished = on_finished
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.group = group
+        self.cancelled = False
+        self.done = False
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+class FetchScheduler(QObject):
+    """
+    주가 수집 작업 스케줄러
+    - 워커 수가 제한된 QThreadPool에서 우선순위 순으로 실행
+    - 같은 (종목, 기간) 요청이 진행 중이면 새로 수집하지 않고 결과를 함께 받음 (single-flight)
+    - 같은 group의 새 요청은 이전 요청을 대체 (아무도 기다리지 않는 작업은 취소)
+    콜백은 모두 GUI 스레드에서 호출됨
+    """
+
+    def __init__(self, max_workers=4, fetcher=None):
+        super().__init__()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_workers)
+        self.fetcher = fetcher or StockDataFetcher()
+        self.inflight = {}  # (종목, 기간) -> 진행 중인 작업
+        self.jobs = set()  # 풀에 등록된 모든 작업 (실행이 끝날 때까지 참조 유지, 취소된 작업 포함)
+        self.groups = {}  # group -> 마지막 요청
+        self.stats = {'submitted': 0, 'coalesced': 0, 'cancelled': 0, 'completed': 0}
+
+    def submit(self, symbol, years, on_finished, on_error=None, on_progress=None,
+               priority=PRIORITY_BACKGROUND, group=None, run_id=None):
+        """수집 요청 (FetchTicket 반환)"""
+        self.stats['submitted'] += 1
+        previous = self.groups.get(group) if group is not None else None
+
+        key = (symbol, years)
+        job = self.inflight.get(key)
+        if job is None:
+            job = FetchJob(key, priority, self.fetcher, run_id)
+            job.signals.finished.connect(self._on_finished)
+            job.signals.failed.connect(self._on_failed)
+            job.signals.progress.connect(self._on_progress)
+            self.inflight[key] = job
+            self.jobs.add(job)
+            self.pool.start(job, priority)
+        else:
+            self.stats['coalesced'] += 1
+            # 아직 대기 중인 작업이면 더 높은 우선순위로 다시 등록
+            if priority > job.priority and self.pool.tryTake(job):
+                job.priority = priority
+                self.pool.start(job, priority)
+
+        ticket = FetchTicket(self, job, on_finished, on_error, on_progress, group)
+        job.tickets.append(ticket)
+        if group is not None:
+            self.groups[group] = ticket
+        # 이전 요청은 새 요청을 등록한 뒤에 취소 (같은 작업이면 새 요청이 기다리고 있으므로 작업은 계속됨)
+        if previous is not None:
+            self.cancel(previous)
+        return ticket
+
+    def cancel(self, ticket):
+        """요청 취소 (같은 작업을 기다리는 다른 요청이 없으면 작업도 취소)"""
+        if ticket.cancelled or ticket.done:
+            return
+        ticket.cancelled = True
+        self._release_group(ticket)
+
+        job = ticket.job
+        if all(t.cancelled for t in job.tickets):
+            job.cancel_event.set()
+            if self.inflight.get(job.key) is job:
+                del self.inflight[job.key]
+            if self.pool.tryTake(job):  # 대기 중이면 큐에서 제거
+                self.jobs.discard(job)
+            self.stats['cancelled'] += 1
+
+    def cancel_group(self, group):
+        if group in self.groups:
+            self.cancel(self.groups[group])
+
+    def is_pending(self, group):
+        """group의 요청이 아직 진행 중인지"""
+        return group in self.groups
+
+    def shutdown(self, wait_ms=2000):
+        """모든 작업 취소 후 실행 중인 작업 종료 대기"""
+        for job in list(self.inflight.values()):
+            for ticket in list(job.tickets):
+                self.cancel(ticket)
+        self.pool.clear()
+        self.pool.waitForDone(wait_ms)
+
+    def _release_group(self, ticket):
+        if ticket.group is not None and self.groups.get(ticket.group) is ticket:
+            del self.groups[ticket.group]
+
+    def _finish(self, job):
+        """완료된 작업 정리 후 결과를 받을 요청 목록 반환"""
+        self.jobs.discard(job)
+        if self.inflight.get(job.key) is job:
+            del self.inflight[job.key]
+        tickets = [t for t in job.tickets if not t.cancelled]
+        for ticket in tickets:
+            ticket.done = True
+            self._release_group(ticket)
+        return tickets
+
+    def _on_finished(self, job, data):
+        self.stats['completed'] += 1
+        for ticket in self._finish(job):
+            ticket.on_finished(data)
+
+    def _on_failed(self, job, message):
+        for ticket in self._finish(job):
+            if ticket.on_error is not None:
+                ticket.on_error(message)
+
+    def _on_progress(self, job, message):
+        for ticket in job.tickets:
+            if not ticket.cancelled and ticket.on_progress is not None:
+                ticket.on_progress(message)
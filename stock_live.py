@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import threading
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from stock_data_fetcher import StockDataFetcher
+from stock_intraday import IntradaySession
+from stock_chart_artists import autoscale_y
+
+class QuotePoller(QThread):
+    """
+    현재 종목의 1분봉을 주기적으로 가져와 당일 시세가 바뀌었을 때만 전달
+    변화 없는 조회가 이어지면(장 마감/휴장) 조회 주기를 늘려 CPU/네트워크 사용을 줄임
+    """
+    quote = pyqtSignal(str, object)  # 종목코드, 당일 시세 dict
+    error = pyqtSignal(str)
+
+    def __init__(self, symbol, interval=15, idle_interval=120, idle_after=4, fetcher=None):
+        super().__init__()
+        self.symbol = symbol
+        self.interval = interval  # 장중 조회 주기(초)
+        self.idle_interval = idle_interval  # 변화 없을 때 조회 주기(초)
+        self.idle_after = idle_after  # 이 횟수만큼 변화가 없으면 idle_interval 사용
+        self.fetcher = fetcher or StockDataFetcher()
+        self.session = IntradaySession(symbol, timeframes=())
+        self._stop = threading.Event()
+
+    def stop(self):
+        """조회 중단 (대기 중이면 즉시 깨움)"""
+        self._stop.set()
+
+    def run(self):
+        unchanged = 0
+        while not self._stop.is_set():
+            try:
+                changed = self.poll()
+            except Exception as e:
+                self.error.emit(str(e))
+                changed = False
+            unchanged = 0 if changed else unchanged + 1
+            self._stop.wait(self.idle_interval if unchanged >= self.idle_after else self.interval)
+
+    def poll(self):
+        """한 번 조회, 당일 시세가 바뀌었으면 quote 시그널 발생"""
+        bars = self.fetcher.fetch_intraday_from_yahoo(self.symbol, '1m', period='1d')
+        if bars is None or bars.empty:
+            return False
+
+        before = self.session.bars.last()
+        self.session.load_frame(bars)
+        if self.session.bars.last() == before:
+            return False
+
+        # 최근 거래일 분봉을 일봉 한 개로 요약
+        day = bars.index[-1].date()
+        today = bars[bars.index.date == day]
+        self.quote.emit(self.symbol, {
+            'date': pd.Timestamp(day),
+            'time': bars.index[-1],
+            'open': float(today['open'].iloc[0]),
+            'high': float(today['high'].max()),
+            'low': float(today['low'].min()),
+            'close': float(today['close'].iloc[-1]),
+            'volume': int(today['volume'].sum())
+        })
+        return True
+
+def live_artists(lines, series):
+    """실시간 모드에서 갱신하는 선과 캔들/막대 컬렉션"""
+    artists = [line for line in lines.values() if line is not None]
+    for item in series.values():
+        if item is not None:
+            artists.extend(item.artists())
+    return artists
+
+class LiveChart(QObject):
+    """
+    실시간 차트 갱신기
+    마지막 값이 바뀐 선/봉만 데이터를 고치고, 나머지 정적 배경은 캐시해 블리팅으로 다시 그림
+    화면 갱신은 초당 fps회로 제한하며, 바뀐 내용이 없으면 타이머도 멈춤
+    """
+
+    def __init__(self, canvas, fps=4):
+        super().__init__()
+        self.canvas = canvas
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / fps))
+        self.timer.timeout.connect(self._on_frame)
+        self.lines = {}  # 컬럼명 -> Line2D
+        self.series = {}  # 이름 -> 캔들/막대 묶음 (stock_chart_artists)
+        self.background = None
+        self.running = False
+        self.dirty = False
+        self.full_redraw = False
+        self._draw_cid = None
+
+    def _artists(self):
+        return live_artists(self.lines, self.series)
+
+    def start(self, lines, series=None, redraw=True, background=None):
+        """
+        갱신할 선/캔들/막대 지정 후 실시간 모드 시작
+        background: 렌더링 스레드에서 미리 캐시한 정적 배경 (있으면 다시 그리지 않고 바로 블리팅)
+        """
+        self.stop(redraw=False)
+        self.lines = {column: line for column, line in lines.items() if line is not None}
+        self.series = {name: item for name, item in (series or {}).items() if item is not None}
+        for line in self.lines.values():
+            # 마지막 값만 바꿀 수 있도록 자체 float 배열로 교체
+            line.set_ydata(np.asarray(line.get_ydata(), dtype=float).copy())
+        for artist in self._artists():
+            artist.set_animated(True)
+        self._draw_cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.background = background
+        self.running = True
+        if redraw:
+            self.request_frame(full=True)
+
+    def stop(self, redraw=True):
+        """실시간 모드 종료 (선은 일반 그리기로 복귀)"""
+        self.timer.stop()
+        if self._draw_cid is not None:
+            self.canvas.mpl_disconnect(self._draw_cid)
+            self._draw_cid = None
+        for artist in self._artists():
+            artist.set_animated(False)
+        was_running = self.running
+        self.lines = {}
+        self.series = {}
+        self.background = None
+        self.running = False
+        self.dirty = False
+        if redraw and was_running:
+            self.canvas.draw_idle()
+
+    def update_last(self, values):
+        """마지막 값 반영 (실제 그리기는 다음 프레임)"""
+        if not self.running:
+            return
+        for column, line in self.lines.items():
+            value = values.get(column)
+            if value is None:
+                continue
+            y = line.get_ydata()
+            y[-1] = value
+            line.set_ydata(y)
+            # 축 범위를 벗어나면 배경(눈금)까지 다시 그림
+            low, high = line.axes.get_ylim()
+            if not np.isnan(value) and not low <= value <= high:
+                autoscale_y(line.axes, self.series.values())
+                self.full_redraw = True
+        for item in self.series.values():
+            if item.update_last(values):
+                autoscale_y(item.axes, self.series.values())
+                self.full_redraw = True
+        self.request_frame()
+
+    def request_frame(self, full=False):
+        self.dirty = True
+        self.full_redraw = self.full_redraw or full
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def _on_draw(self, event):
+        """전체 그리기 직후 정적 배경 캐시 (크기 변경 포함)"""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self._artists():
+            artist.axes.draw_artist(artist)
+
+    def _on_frame(self):
+        if not self.dirty:
+            self.timer.stop()  # 변경 없으면 깨어나지 않음
+            return
+        self.dirty = False
+        if self.full_redraw or self.background is None:
+            self.full_redraw = False
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
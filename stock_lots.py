@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, datetime, time, timedelta
+
+# 매도 시 매칭할 매수 묶음(로트) 순서: 먼저 산 것부터 / 나중에 산 것부터 / 직접 지정 /
+# 평균 단가 (남은 로트 원가를 모두 평균 단가로 맞춘 뒤 먼저 산 것부터, 이전 평균 단가 방식 매도 재현용)
+LOT_METHODS = ('fifo', 'lifo', 'specific', 'average')
+DEFAULT_LOT_METHOD = os.environ.get('STOCK_LOT_METHOD', 'fifo')
+
+def to_datetime(value):
+    """datetime/date/ISO 문자열 -> datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    return datetime.fromisoformat(value)
+
+def _date_bounds(start=None, end=None):
+    """조회 구간 (end가 날짜만 있으면 그날 전체 포함)"""
+    lower = to_datetime(start) if start is not None else None
+    upper = None
+    if end is not None:
+        upper = to_datetime(end)
+        if not isinstance(end, datetime) and upper.time() == time():
+            upper += timedelta(days=1) - timedelta(microseconds=1)
+    return lower, upper
+
+class Lot:
+    """매수 한 건 (남은 수량만 줄어듦)"""
+    __slots__ = ('id', 'symbol', 'date', 'price', 'quantity', 'remaining')
+
+    def __init__(self, lot_id, symbol, date, price, quantity):
+        self.id = lot_id
+        self.symbol = symbol
+        self.date = date
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity
+
+    def to_dict(self):
+        return {'id': self.id, 'symbol': self.symbol, 'date': self.date.isoformat(), 'price': self.price,
+                'quantity': self.quantity, 'remaining': self.remaining}
+
+class RealizedIndex:
+    """
+    실현 손익 기록 (매도일 순) + 손익 누적합
+    날짜 구간 조회는 이분 탐색, 구간 합계는 누적합 두 값의 차이 (기록 수와 무관하게 즉시 계산)
+    """
+
+    def __init__(self):
+        self.dates = []
+        self.records = []
+        self.cumulative = [0.0]
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        when = record['date']
+        if not self.dates or when >= self.dates[-1]:
+            self.dates.append(when)
+            self.records.append(record)
+            self.cumulative.append(self.cumulative[-1] + record['pnl'])
+            return
+        # 과거 날짜 매도 (드묾): 제자리에 넣고 그 뒤 누적합만 다시 계산
+        i = bisect_right(self.dates, when)
+        self.dates.insert(i, when)
+        self.records.insert(i, record)
+        del self.cumulative[i + 1:]
+        for r in self.records[i:]:
+            self.cumulative.append(self.cumulative[-1] + r['pnl'])
+
+    def _slice(self, start=None, end=None):
+        lower, upper = _date_bounds(start, end)
+        lo = bisect_left(self.dates, lower) if lower is not None else 0
+        hi = bisect_right(self.dates, upper) if upper is not None else len(self.dates)
+        return lo, max(lo, hi)
+
+    def between(self, start=None, end=None):
+        lo, hi = self._slice(start, end)
+        return self.records[lo:hi]
+
+    def pnl(self, start=None, end=None):
+        lo, hi = self._slice(start, end)
+        return self.cumulative[hi] - self.cumulative[lo]
+
+class LotBook:
+    """
+    로트 단위 포지션 관리
+    - 종목별 미청산 로트 큐: FIFO는 앞에서, LIFO는 뒤에서 꺼내고, 직접 지정은 로트 번호로 찾음
+    - 매매마다 보유 수량/원가와 실현 손익을 바로 갱신 (전체 거래 내역을 다시 훑지 않음)
+    - 실현 손익은 종목별/전체 RealizedIndex로 날짜 구간 조회
+    """
+
+    def __init__(self, method=None):
+        method = method or DEFAULT_LOT_METHOD
+        if method not in LOT_METHODS:
+            raise ValueError(f"지원하지 않는 로트 매칭 방식: {method} ({', '.join(LOT_METHODS)})")
+        self.method = method
+        self.queues = {}  # 종목 -> deque[Lot] (다 팔린 로트는 꺼낼 때 정리)
+        self.lots = {}  # 로트 번호 -> Lot (미청산)
+        self.positions = {}  # 종목 -> [수량, 원가]
+        self.paid = {}  # 종목 -> 매수 금액 합계 (원가 검증용)
+        self.realized = {}  # 종목 -> RealizedIndex
+        self.all_realized = RealizedIndex()
+        self.next_id = 1
+
+    # ------------------------------------------------------------ 매매
+
+    def buy(self, symbol, quantity, price, date=None, lot_id=None):
+        """매수 (새 로트), 로트 번호 반환"""
+        if quantity <= 0:
+            raise ValueError("매수 수량은 0보다 커야 합니다")
+        if lot_id is None:
+            lot_id = self.next_id
+        if lot_id in self.lots:
+            raise ValueError(f"이미 있는 로트 번호: {lot_id}")
+        if isinstance(lot_id, int):
+            self.next_id = max(self.next_id, lot_id + 1)
+        lot = Lot(lot_id, symbol, to_datetime(date or datetime.now()), price, quantity)
+        self.queues.setdefault(symbol, deque()).append(lot)
+        self.lots[lot_id] = lot
+        position = self.positions.setdefault(symbol, [0, 0.0])
+        position[0] += quantity
+        position[1] += quantity * price
+        self.paid[symbol] = self.paid.get(symbol, 0.0) + quantity * price
+        return lot_id
+
+    def sell(self, symbol, quantity, price, date=None, method=None, lot_ids=None):
+        """
+        매도 (로트 매칭 후 실현 손익 기록), 실현 기록 목록 반환
+        method: 생략하면 장부 기본 방식, 'specific'이면 lot_ids 순서대로 매칭,
+                'average'이면 남은 로트 원가를 평균 단가로 맞춘 뒤 먼저 산 것부터 매칭
+        lot_ids: 로트 번호 목록 또는 (로트 번호, 수량) 목록
+        보유 수량이 모자라거나 로트 지정이 잘못되면 ValueError (장부는 바뀌지 않음)
+        """
+        method = method or ('specific' if lot_ids else self.method)
+        if quantity <= 0:
+            raise ValueError("매도 수량은 0보다 커야 합니다")
+        held = self.positions.get(symbol, [0, 0.0])[0]
+        if held < quantity:
+            raise ValueError(f"{symbol} 보유 수량 부족 (보유 {held}, 매도 {quantity})")
+
+        plan = self._plan(symbol, quantity, method, lot_ids)
+        when = to_datetime(date or datetime.now())
+        records = []
+        position = self.positions[symbol]
+        if method == 'average':
+            # 평균 단가 방식: 모든 로트가 같은 원가를 가지므로 원가 합계는 그대로
+            average = position[1] / position[0]
+            for lot in self.open_lots(symbol):
+                lot.price = average
+        index = self.realized.setdefault(symbol, RealizedIndex())
+        for lot, matched in plan:
+            lot.remaining -= matched
+            position[0] -= matched
+            position[1] -= matched * lot.price
+            record = {
+                'date': when,
+                'symbol': symbol,
+                'lot_id': lot.id,
+                'buy_date': lot.date,
+                'quantity': matched,
+                'buy_price': lot.price,
+                'sell_price': price,
+                'pnl': matched * (price - lot.price)
+            }
+            index.add(record)
+            self.all_realized.add(record)
+            records.append(record)
+            if lot.remaining == 0:
+                del self.lots[lot.id]
+        if position[0] == 0:
+            position[1] = 0.0  # 부동소수점 잔여 제거
+        self._compact(symbol)
+        return records
+
+    def _plan(self, symbol, quantity, method, lot_ids):
+        """매칭할 (로트, 수량) 목록 (장부는 바꾸지 않음)"""
+        plan = []
+        if method == 'specific':
+            if not lot_ids:
+                raise ValueError("직접 지정 매도에는 로트 번호가 필요합니다")
+            left = quantity
+            used = {}  # 같은 로트를 두 번 지정한 경우 대비
+            for item in lot_ids:
+                lot_id, wanted = item if isinstance(item, (tuple, list)) else (item, None)
+                lot = self.lots.get(lot_id)
+                if lot is None or lot.symbol != symbol:
+                    raise ValueError(f"{symbol}의 미청산 로트가 아님: {lot_id}")
+                available = lot.remaining - used.get(lot_id, 0)
+                if wanted is not None and wanted > available:
+                    raise ValueError(f"로트 {lot_id} 남은 수량 부족 (남은 {available}, 지정 {wanted})")
+                matched = min(available, left if wanted is None else min(wanted, left))
+                if matched > 0:
+                    plan.append((lot, matched))
+                    used[lot_id] = used.get(lot_id, 0) + matched
+                    left -= matched
+            if left > 0:
+                raise ValueError(f"지정한 로트의 수량이 매도 수량보다 적습니다 ({quantity - left}/{quantity})")
+            return plan
+        if method not in LOT_METHODS:
+            raise ValueError(f"지원하지 않는 로트 매칭 방식: {method}")
+
+        queue = self.queues[symbol]
+        lots = reversed(queue) if method == 'lifo' else queue
+        left = quantity
+        for lot in lots:
+            if lot.remaining == 0:
+                continue
+            matched = min(lot.remaining, left)
+            plan.append((lot, matched))
+            left -= matched
+            if left == 0:
+                break
+        return plan
+
+    def _compact(self, symbol):
+        """큐 양 끝의 다 팔린 로트 제거 (중간 로트는 직접 지정 매도 때만 생기고, 끝에 닿으면 정리)"""
+        queue = self.queues[symbol]
+        while queue and queue[0].remaining == 0:
+            queue.popleft()
+        while queue and queue[-1].remaining == 0:
+            queue.pop()
+        if not queue:
+            del self.queues[symbol]
+
+    # ------------------------------------------------------------ 조회
+
+    def position(self, symbol):
+        """(보유 수량, 원가 합계, 평균 단가)"""
+        quantity, cost = self.positions.get(symbol, (0, 0.0))
+        return quantity, cost, cost / quantity if quantity else 0.0
+
+    def open_lots(self, symbol):
+        """미청산 로트 (매수 순서)"""
+        return [lot for lot in self.queues.get(symbol, ()) if lot.remaining > 0]
+
+    def unrealized(self, current_prices):
+        """종목 -> 평가 손익 (현재가가 있는 보유 종목만)"""
+        return {symbol: quantity * current_prices[symbol] - cost
+                for symbol, (quantity, cost) in self.positions.items()
+                if quantity and symbol in current_prices}
+
+    def realized_records(self, symbol=None, start=None, end=None):
+        """실현 기록 (매도일 구간, 종목 생략하면 전체)"""
+        index = self.all_realized if symbol is None else self.realized.get(symbol)
+        return index.between(start, end) if index is not None else []
+
+    def realized_pnl(self, symbol=None, start=None, end=None):
+        """실현 손익 합계 (매도일 구간, 종목 생략하면 전체)"""
+        index = self.all_realized if symbol is None else self.realized.get(symbol)
+        return index.pnl(start, end) if index is not None else 0.0
+
+    def check_balance(self, tolerance=1e-6):
+        """
+        종목마다 (매도된 수량의 원가 + 보유 원가) == 매수 금액 합계인지 확인
+        맞지 않는 종목이 있으면 ValueError
+        """
+        mismatched = []
+        for symbol, paid in self.paid.items():
+            sold = sum(record['quantity'] * record['buy_price'] for record in self.realized_records(symbol))
+            held = self.positions.get(symbol, (0, 0.0))[1]
+            if abs(sold + held - paid) > tolerance * max(1.0, abs(paid)):
+                mismatched.append(f"{symbol} (매수 {paid:,.2f}, 매도 원가 {sold:,.2f} + 보유 원가 {held:,.2f})")
+        if mismatched:
+            raise ValueError("원가 합계 불일치: " + ", ".join(mismatched))
+
+    # ------------------------------------------------------------ 거래 내역
+
+    @classmethod
+    def from_transactions(cls, transactions, method=None, strict=False):
+        """
+        Portfolio 거래 내역(buy/sell 딕셔너리 목록)으로 장부 재구성
+        strict=False이면 보유 수량을 넘는 매도 등 맞지 않는 거래는 경고만 출력하고 건너뜀
+        """
+        book = cls(method)
+        for transaction in transactions:
+            try:
+                book.apply(transaction)
+            except ValueError as e:
+                if strict:
+                    raise
+                print(f"거래 내역 적용 오류 ({transaction.get('date')} {transaction.get('symbol')}): {e}")
+        return book
+
+    def apply(self, transaction):
+        """거래 내역 한 건 적용"""
+        if transaction['type'] == 'buy':
+            return self.buy(transaction['symbol'], transaction['quantity'], transaction['price'],
+                            transaction['date'], transaction.get('lot_id'))
+        return self.sell(transaction['symbol'], transaction['quantity'], transaction['price'],
+                         transaction['date'], transaction.get('method'), transaction.get('lot_ids'))
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="portfolio.json 거래 내역의 로트별 실현/보유 현황")
+    parser.add_argument('symbol', nargs='?', help="종목 (생략하면 전체)")
+    parser.add_argument('--path', default='portfolio.json', help="포트폴리오 파일")
+    parser.add_argument('--method', choices=LOT_METHODS[:2], default=None, help="매칭 방식 (기본: STOCK_LOT_METHOD)")
+    parser.add_argument('--start', default=None, help="실현 손익 시작일 (YYYY-MM-DD)")
+    parser.add_argument('--end', default=None, help="실현 손익 종료일 (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        transactions = json.load(f).get('transactions', [])
+    book = LotBook.from_transactions(transactions, args.method)
+
+    symbols = [args.symbol] if args.symbol else sorted(set(book.positions) | set(book.realized))
+    for symbol in symbols:
+        quantity, cost, avg_price = book.position(symbol)
+        print(f"{symbol}: 보유 {quantity:,}주 (평균 {avg_price:,.2f}), "
+              f"실현 손익 {book.realized_pnl(symbol, args.start, args.end):,.2f}")
+        for lot in book.open_lots(symbol):
+            print(f"  로트 {lot.id}: {lot.date:%Y-%m-%d} {lot.remaining:,}/{lot.quantity:,}주 @ {lot.price:,.2f}")
+    print(f"전체 실현 손익: {book.realized_pnl(None, args.start, args.end):,.2f} "
+          f"({len(book.realized_records(None, args.start, args.end))}건)")
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import re
+from io import BytesIO
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+# 일별 시세 표 컬럼 순서: 날짜, 종가, 전일비, 시가, 고가, 저가, 거래량
+_LAST_PAGE_RE = re.compile(rb'class="pgRR".*?page=(\d+)', re.S)
+
+class SiseDayRows:
+    """
+    네이버 일별 시세 행 누적 버퍼
+    파싱한 값을 숫자 배열에 바로 기록 (페이지별 DataFrame 생성/결합 없음)
+    """
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.dates = np.empty(capacity, dtype='datetime64[D]')
+        self.values = np.empty((capacity, 5), dtype=np.int64)  # open, high, low, close, volume
+
+    def _grow(self):
+        capacity = len(self.dates) * 2
+        self.dates = np.resize(self.dates, capacity)
+        self.values = np.resize(self.values, (capacity, 5))
+
+    def append(self, date, open_, high, low, close, volume):
+        if self.size == len(self.dates):
+            self._grow()
+        self.dates[self.size] = date
+        row = self.values[self.size]
+        row[0] = open_
+        row[1] = high
+        row[2] = low
+        row[3] = close
+        row[4] = volume
+        self.size += 1
+
+    def to_frame(self):
+        """날짜 오름차순 OHLCV DataFrame (페이지는 최신순이므로 뒤집어서 반환)"""
+        dates = self.dates[:self.size][::-1]
+        values = self.values[:self.size][::-1]
+        df = pd.DataFrame({
+            'open': values[:, 0].astype(np.float64),
+            'high': values[:, 1].astype(np.float64),
+            'low': values[:, 2].astype(np.float64),
+            'close': values[:, 3].astype(np.float64),
+            'volume': values[:, 4]
+        }, index=pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='날짜'))
+        # 페이지 경계에서 중복된 날짜 제거
+        return df[~df.index.duplicated(keep='last')]
+
+def _to_int(text):
+    return int(text.replace(',', '').strip() or 0)
+
+def parse_last_page(content):
+    """페이지 네비게이션의 '맨뒤' 링크에서 마지막 페이지 번호 추출"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    match = _LAST_PAGE_RE.search(content)
+    return int(match.group(1)) if match else 1
+
+def parse_sise_day(content, rows, start_date=None, encoding='cp949'):
+    """
+    sise_day 페이지의 시세 행을 rows에 추가
+    start_date(YYYY.MM.DD 문자열 또는 datetime)보다 오래된 행을 만나면 즉시 중단
+    반환값: (추가한 행 수, 시작일 이전 도달 여부)
+    """
+    if isinstance(content, str):
+        content = content.encode(encoding, errors='replace')
+    if start_date is not None and not isinstance(start_date, str):
+        start_date = start_date.strftime('%Y.%m.%d')
+
+    added = 0
+    reached_start = False
+    for _, tr in etree.iterparse(BytesIO(content), events=('end',), tag='tr',
+                                 html=True, encoding=encoding):
+        spans = [span.text for span in tr.iterfind('td/span')]
+        tr.clear()
+        if len(spans) != 7 or not spans[0]:
+            continue
+
+        date = spans[0].strip()
+        if start_date is not None and date < start_date:
+            reached_start = True
+            break
+
+        try:
+            rows.append(date.replace('.', '-'), _to_int(spans[3]), _to_int(spans[4]),
+                        _to_int(spans[5]), _to_int(spans[1]), _to_int(spans[6]))
+        except (ValueError, AttributeError):
+            continue  # 빈 칸이 있는 행은 건너뜀
+        added += 1
+    return added, reached_start
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import itertools
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from stock_indicators import TechnicalIndicators, DEFAULT_INDICATOR_PARAMS
+
+# 기본 탐색 공간 (각 지표 설정값 후보)
+DEFAULT_PARAM_SPACE = {
+    'ma_short': [5, 9, 12, 20],
+    'ma_long': [22, 40, 60, 120],
+    'rsi_period': [9, 14, 21],
+    'macd_fast': [8, 12],
+    'macd_slow': [21, 26],
+    'macd_signal': [9],
+    'bb_period': [20],
+    'bb_std': [2, 2.5],
+    'stoch_period': [14],
+    'stoch_smooth_k': [3],
+    'stoch_smooth_d': [3]
+}
+
+PRICE_FIELDS = ('close', 'high', 'low')
+TRADING_DAYS = 252
+
+def is_valid_params(params):
+    """서로 모순되는 설정 조합 제외 (단기 >= 장기 등)"""
+    if params['ma_short'] >= params['ma_long']:
+        return False
+    if params['macd_fast'] >= params['macd_slow']:
+        return False
+    return True
+
+def generate_grid(space=None):
+    """탐색 공간의 모든 조합 생성"""
+    space = space or DEFAULT_PARAM_SPACE
+    keys = list(space.keys())
+    combos = []
+    for values in itertools.product(*(space[k] for k in keys)):
+        params = dict(DEFAULT_INDICATOR_PARAMS)
+        params.update(zip(keys, values))
+        if is_valid_params(params):
+            combos.append(params)
+    return combos
+
+def generate_random(n, space=None, seed=None):
+    """탐색 공간에서 무작위 조합 n개 추출 (중복 제외)"""
+    space = space or DEFAULT_PARAM_SPACE
+    rng = random.Random(seed)
+    keys = list(space.keys())
+    seen = set()
+    combos = []
+    max_tries = n * 20
+    tries = 0
+    while len(combos) < n and tries < max_tries:
+        tries += 1
+        params = dict(DEFAULT_INDICATOR_PARAMS)
+        params.update({k: rng.choice(space[k]) for k in keys})
+        key = tuple(params[k] for k in keys)
+        if key in seen or not is_valid_params(params):
+            continue
+        seen.add(key)
+        combos.append(params)
+    return combos
+
+class SharedPriceStore:
+    """종목별 가격 배열을 하나의 공유 메모리 블록에 적재 (fields 순서의 float64 행)"""
+
+    def __init__(self, price_data, fields=PRICE_FIELDS):
+        self.fields = tuple(fields)
+        self.offsets = {}
+        total = 0
+        for symbol, df in price_data.items():
+            self.offsets[symbol] = (total, total + len(df))
+            total += len(df)
+        self.total = total
+
+        size = max(len(self.fields) * total * 8, 8)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        arr = np.ndarray((len(self.fields), total), dtype=np.float64, buffer=self.shm.buf)
+        for symbol, df in price_data.items():
+            start, end = self.offsets[symbol]
+            for i, field in enumerate(self.fields):
+                column = field if field in df.columns else 'close'
+                arr[i, start:end] = df[column].to_numpy(dtype=np.float64)
+        del arr
+
+    def descriptor(self):
+        """워커 초기화에 넘길 정보 (이름/크기/오프셋만 전달)"""
+        return self.shm.name, self.total, self.offsets
+
+    @staticmethod
+    def attach(shm_name, total, fields=PRICE_FIELDS):
+        """워커에서 공유 메모리에 연결 (공유 메모리 객체, 배열 뷰 반환)"""
+        shm = shared_memory.SharedMemory(name=shm_name)
+        return shm, np.ndarray((len(fields), total), dtype=np.float64, buffer=shm.buf)
+
+    def close(self):
+        """공유 메모리 해제"""
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+# 워커 프로세스 전역 상태
+_worker_shm = None
+_worker_prices = None
+_worker_offsets = None
+
+def _init_worker(shm_name, total, offsets):
+    """워커 시작 시 공유 메모리에 한 번만 연결"""
+    global _worker_shm, _worker_prices, _worker_offsets
+    _worker_shm, _worker_prices = SharedPriceStore.attach(shm_name, total)
+    _worker_offsets = offsets
+    # 워커 프로세스는 os._exit로 끝나 atexit가 호출되지 않으므로 multiprocessing 종료 처리에 등록
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker():
+    """워커 종료 시 공유 메모리 연결 해제 (삭제는 부모 프로세스의 SharedPriceStore.close())"""
+    global _worker_prices
+    _worker_prices = None  # 버퍼를 참조하는 배열이 남아 있으면 close()가 실패함
+    if _worker_shm is not None:
+        try:
+            _worker_shm.close()
+        except BufferError:
+            pass
+
+def _cached(cache, key, func):
+    """같은 청크 안에서 동일 설정의 지표는 한 번만 계산"""
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
+
+def backtest(close, high, low, params, fee=0.00015, cache=None, cache_key=''):
+    """
+    지표 투표 전략 백테스트
+    MA/MACD/RSI/볼린저/스토캐스틱 중 3개 이상이 매수 신호일 때 다음 봉에 보유
+    """
+    if cache is None:
+        cache = {}
+    p = params
+
+    ma_short = _cached(cache, (cache_key, 'ma', p['ma_short']),
+                       lambda: close.rolling(window=p['ma_short']).mean().to_numpy())
+    ma_long = _cached(cache, (cache_key, 'ma', p['ma_long']),
+                      lambda: close.rolling(window=p['ma_long']).mean().to_numpy())
+    rsi = _cached(cache, (cache_key, 'rsi', p['rsi_period']),
+                  lambda: TechnicalIndicators.calculate_rsi(close, p['rsi_period']).to_numpy())
+    macd_key = (cache_key, 'macd', p['macd_fast'], p['macd_slow'], p['macd_signal'])
+    macd, signal, _ = _cached(cache, macd_key, lambda: tuple(
+        s.to_numpy() for s in TechnicalIndicators.calculate_macd(
+            close, p['macd_fast'], p['macd_slow'], p['macd_signal'])))
+    bb_key = (cache_key, 'bb', p['bb_period'], p['bb_std'])
+    bb_upper, _, bb_lower = _cached(cache, bb_key, lambda: tuple(
+        s.to_numpy() for s in TechnicalIndicators.calculate_bollinger_bands(
+            close, p['bb_period'], p['bb_std'])))
+    stoch_key = (cache_key, 'stoch', p['stoch_period'], p['stoch_smooth_k'], p['stoch_smooth_d'])
+    stoch_k, stoch_d = _cached(cache, stoch_key, lambda: tuple(
+        s.to_numpy() for s in TechnicalIndicators.calculate_stochastic(
+            high, low, close, p['stoch_period'], p['stoch_smooth_k'], p['stoch_smooth_d'])))
+
+    prices = close.to_numpy()
+    with np.errstate(invalid='ignore'):
+        votes = ((ma_short > ma_long).astype(np.int8)
+                 + (macd > signal)
+                 + (rsi < 70)
+                 + (prices < bb_upper)
+                 + (stoch_k > stoch_d))
+
+    # 신호 다음 봉부터 보유 (미래 참조 방지)
+    position = np.zeros(len(prices))
+    position[1:] = (votes[:-1] >= 3)
+
+    returns = np.zeros(len(prices))
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    returns = np.nan_to_num(returns)
+
+    trades = np.abs(np.diff(position, prepend=0))
+    strategy = position * returns - trades * fee
+
+    equity = np.cumprod(1 + strategy)
+    peak = np.maximum.accumulate(equity)
+    drawdown = (equity / peak - 1).min() if len(equity) else 0.0
+    std = strategy.std()
+    sharpe = (strategy.mean() / std) * np.sqrt(TRADING_DAYS) if std > 0 else 0.0
+
+    return {
+        'total_return': float(equity[-1] - 1) * 100 if len(equity) else 0.0,
+        'sharpe': float(sharpe),
+        'max_drawdown': float(drawdown) * 100,
+        'trades': int(trades.sum()),
+        'exposure': float(position.mean()) * 100 if len(position) else 0.0
+    }
+
+def _evaluate_chunk(param_chunk):
+    """워커: 설정 조합 묶음을 모든 종목에 대해 평가"""
+    cache = {}
+    series = {}
+    for symbol, (start, end) in _worker_offsets.items():
+        # 공유 메모리 뷰를 그대로 감싸므로 복사 없음
+        series[symbol] = [pd.Series(_worker_prices[i, start:end], copy=False)
+                          for i in range(len(PRICE_FIELDS))]
+
+    results = []
+    for params in param_chunk:
+        metrics = []
+        for symbol, (close, high, low) in series.items():
+            if len(close) < params['ma_long'] + 1:
+                continue
+            metrics.append(backtest(close, high, low, params, cache=cache, cache_key=symbol))
+        if not metrics:
+            continue
+        row = dict(params)
+        for key in metrics[0]:
+            row[key] = float(np.mean([m[key] for m in metrics]))
+        row['symbols'] = len(metrics)
+        results.append(row)
+    return results
+
+class ParameterOptimizer:
+    """지표 설정값 탐색기 (프로세스 풀 + 공유 메모리)"""
+
+    def __init__(self, price_data, workers=None, score_key='sharpe'):
+        self.price_data = {s: df for s, df in price_data.items() if df is not None and not df.empty}
+        self.workers = workers or os.cpu_count() or 1
+        self.score_key = score_key
+
+    def _make_chunks(self, combos):
+        """조합을 워커 수의 4배 정도로 분할 (부하 균형)"""
+        chunk_size = max(1, len(combos) // (self.workers * 4))
+        return [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    def run(self, combos):
+        """설정 조합 목록 평가 후 점수순 DataFrame 반환"""
+        if not combos or not self.price_data:
+            return pd.DataFrame()
+
+        store = SharedPriceStore(self.price_data)
+        results = []
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     initializer=_init_worker,
+                                     initargs=store.descriptor()) as executor:
+                for chunk_result in executor.map(_evaluate_chunk, self._make_chunks(combos)):
+                    results.extend(chunk_result)
+        finally:
+            store.close()
+
+        if not results:
+            return pd.DataFrame()
+        return pd.DataFrame(results).sort_values(self.score_key, ascending=False).reset_index(drop=True)
+
+    def grid_search(self, space=None):
+        """그리드 탐색"""
+        return self.run(generate_grid(space))
+
+    def random_search(self, n, space=None, seed=None):
+        """무작위 탐색"""
+        return self.run(generate_random(n, space, seed))
+
+def load_price_data(symbols, years=3):
+    """여러 종목의 가격 데이터 수집"""
+    from stock_data_fetcher import StockDataFetcher
+    fetcher = StockDataFetcher()
+    price_data = {}
+    for symbol in symbols:
+        data = fetcher.get_stock_data(symbol, years)
+        if data is not None and not data.empty:
+            price_data[symbol] = data
+    return price_data
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기술적 지표 설정값 최적화")
+    parser.add_argument('symbols', nargs='+', help="종목 코드 목록 (예: 005930 000660)")
+    parser.add_argument('--years', type=int, default=3, help="백테스트 기간 (년)")
+    parser.add_argument('--random', type=int, default=0, help="무작위 탐색 조합 수 (0이면 그리드 탐색)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    price_data = load_price_data(args.symbols, args.years)
+    optimizer = ParameterOptimizer(price_data, workers=args.workers)
+
+    if args.random > 0:
+        result = optimizer.random_search(args.random, seed=args.seed)
+    else:
+        result = optimizer.grid_search()
+
+    print(result.head(args.top).to_string())
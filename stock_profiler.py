@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+
+class Profiler:
+    """
+    경량 구간 계측기
+    span()으로 감싼 구간의 시작/소요 시간을 기록하고, 실행(run) 단위로 묶어 요약하거나
+    Chrome Trace(JSON) 형식으로 내보낸다 (chrome://tracing, Perfetto에서 열람)
+    """
+
+    def __init__(self, max_events=20000, max_runs=50):
+        self.origin = time.perf_counter()
+        self.events = deque(maxlen=max_events)
+        self.runs = deque(maxlen=max_runs)
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run_ids = itertools.count(1)
+        self._thread_names = {}
+
+    # ------------------------------------------------------------ 실행(run) 관리
+
+    def begin_run(self, name):
+        """새 실행 시작 (실행 ID 반환, 구간은 use_run()으로 감싼 범위에서만 이 실행에 연결됨)"""
+        run = {
+            'id': next(self._run_ids),
+            'name': name,
+            'start': time.perf_counter(),
+            'end': None
+        }
+        with self._lock:
+            self.runs.append(run)
+        return run['id']
+
+    def end_run(self, run_id):
+        """실행 종료 후 구간별 요약 반환"""
+        run = self.get_run(run_id)
+        if run is None:
+            return {}
+        run['end'] = time.perf_counter()
+        return self.summary(run_id)
+
+    def get_run(self, run_id):
+        """실행 정보 조회"""
+        with self._lock:
+            for run in self.runs:
+                if run['id'] == run_id:
+                    return run
+        return None
+
+    def current_run(self):
+        """현재 스레드에서 기록 중인 실행 ID (없으면 None)"""
+        return getattr(self._local, 'run_id', None)
+
+    @contextmanager
+    def use_run(self, run_id):
+        """with 범위 안에서 현재 스레드가 기록하는 구간을 특정 실행에 연결 (끝나면 이전 실행으로 복원)"""
+        previous = getattr(self._local, 'run_id', None)
+        self._local.run_id = run_id
+        try:
+            yield
+        finally:
+            self._local.run_id = previous
+
+    # ------------------------------------------------------------ 구간 기록
+
+    @contextmanager
+    def span(self, name, category='analysis', **args):
+        """구간 계측 컨텍스트"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, category, args)
+
+    def record(self, name, start, duration, category='analysis', args=None):
+        """완료된 구간 직접 기록"""
+        thread = threading.current_thread()
+        event = {
+            'name': name,
+            'cat': category,
+            'start': start,
+            'dur': duration,
+            'tid': thread.ident,
+            'thread': thread.name,
+            'run': getattr(self._local, 'run_id', None),
+            'args': args or {}
+        }
+        with self._lock:
+            self._thread_names[thread.ident] = thread.name
+            self.events.append(event)
+
+    # ------------------------------------------------------------ 조회/내보내기
+
+    def run_events(self, run_id):
+        """실행에 속한 구간 목록 (시작 순)"""
+        with self._lock:
+            events = [e for e in self.events if e['run'] == run_id]
+        return sorted(events, key=lambda e: e['start'])
+
+    def summary(self, run_id):
+        """구간 이름별 합계(ms)와 전체 경과 시간"""
+        totals = {}
+        for event in self.run_events(run_id):
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] * 1000
+        run = self.get_run(run_id)
+        if run is not None and run['end'] is not None:
+            totals['total'] = (run['end'] - run['start']) * 1000
+        return totals
+
+    def format_summary(self, run_id, names=None, labels=None):
+        """상태바 표시용 한 줄 요약"""
+        totals = self.summary(run_id)
+        labels = labels or {}
+        parts = []
+        for name in (names or [n for n in totals if n != 'total']):
+            if name in totals:
+                parts.append(f"{labels.get(name, name)} {totals[name]:,.0f}ms")
+        text = ' · '.join(parts)
+        if 'total' in totals:
+            text += f" (총 {totals['total'] / 1000:,.2f}s)"
+        return text
+
+    def clear(self):
+        """기록 초기화"""
+        with self._lock:
+            self.events.clear()
+            self.runs.clear()
+
+    def to_chrome_trace(self):
+        """Chrome Trace Event 형식 dict 생성"""
+        pid = os.getpid()
+        trace = []
+        with self._lock:
+            events = list(self.events)
+            runs = list(self.runs)
+            thread_names = dict(self._thread_names)
+
+        for tid, thread_name in thread_names.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                          'args': {'name': thread_name}})
+
+        run_names = {run['id']: run['name'] for run in runs}
+        for event in events:
+            args = dict(event['args'])
+            if event['run'] is not None:
+                args['run'] = run_names.get(event['run'], event['run'])
+            trace.append({
+                'name': event['name'],
+                'cat': event['cat'],
+                'ph': 'X',
+                'ts': (event['start'] - self.origin) * 1e6,
+                'dur': event['dur'] * 1e6,
+                'pid': pid,
+                'tid': event['tid'],
+                'args': {k: str(v) for k, v in args.items()}
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """Chrome Trace JSON 파일로 저장"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+        return path
+
+# 프로그램 전체에서 공유하는 계측기
+profiler = Profiler()
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import random
+import sqlite3
+import argparse
+import threading
+from urllib.parse import urlparse
+import requests
+
+# 소스별 요청 속도 (초당 요청 수: 시작값/최소/최대, 버스트: 한 번에 쓸 수 있는 토큰 수)
+SOURCE_RATES = {
+    'yahoo': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 8.0, 'burst': 4},
+    'naver': {'rate': 5.0, 'min_rate': 0.5, 'max_rate': 20.0, 'burst': 5},
+    'krx': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 6.0, 'burst': 4}
+}
+
+# HTTP 캐시를 거치는 요청의 호스트 -> 소스
+HOST_SOURCES = {
+    'finance.naver.com': 'naver',
+    'data.krx.co.kr': 'krx'
+}
+
+# 속도 제한 응답으로 보는 상태 코드
+THROTTLE_STATUS = (429, 503)
+
+def source_for_url(url):
+    """URL의 소스 이름 (제한 대상이 아니면 None)"""
+    return HOST_SOURCES.get(urlparse(url).hostname or '')
+
+def is_throttled(error):
+    """속도 제한 예외인지 (HTTP 429/503, yfinance YFRateLimitError 등)"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) in THROTTLE_STATUS:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return 'ratelimit' in text or 'rate limit' in text or 'too many requests' in text
+
+def is_retryable(error):
+    """다시 시도할 만한 예외인지 (속도 제한, 연결 오류, 시간 초과)"""
+    return is_throttled(error) or isinstance(error, (requests.exceptions.ConnectionError,
+                                                     requests.exceptions.Timeout))
+
+def retry_after(response):
+    """Retry-After 헤더(초), 없거나 날짜 형식이면 None"""
+    value = getattr(response, 'headers', {}).get('Retry-After')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """지수 백오프 + full jitter (동시에 실패한 요청들이 한꺼번에 재시도하지 않도록)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class RateLimiter:
+    """
+    소스별 토큰 버킷 요청 제한기
+    - 버킷 상태를 SQLite 한 파일에 두고 매 요청마다 트랜잭션으로 갱신하므로 스레드/프로세스 사이에서 공유됨
+    - 속도 제한 응답을 받으면 속도를 절반으로 줄이고(Retry-After 동안 대기),
+      연속 성공이 increase_after번 쌓이면 속도를 조금씩 올림 (AIMD, 최대 max_rate)
+    """
+
+    def __init__(self, path='rate_limits.sqlite', sources=None, enabled=None, increase_after=20, increase=0.1):
+        if enabled is None:
+            enabled = os.environ.get('STOCK_RATE_LIMIT', 'on') != 'off'
+        self.path = path
+        self.sources = sources or SOURCE_RATES
+        self.enabled = enabled
+        self.increase_after = increase_after  # 속도를 올리기 전 연속 성공 수
+        self.increase = increase  # 한 번에 올리는 양 (시작 속도 대비 비율)
+        self.stats = {source: {'requests': 0, 'waited': 0.0, 'throttled': 0, 'retries': 0}
+                      for source in self.sources}
+        self._successes = {source: 0 for source in self.sources}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if self.enabled:
+            self._init_db()
+
+    # ------------------------------------------------------------ 저장소
+
+    def _conn(self):
+        """스레드별 SQLite 연결 (fork된 프로세스에서는 새로 연결)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                source TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                rate REAL NOT NULL,
+                cooldown_until REAL NOT NULL DEFAULT 0
+            )
+        """)
+        now = time.time()
+        for source, config in self.sources.items():
+            conn.execute("INSERT OR IGNORE INTO buckets (source, tokens, updated, rate) VALUES (?, ?, ?, ?)",
+                         (source, config['burst'], now, config['rate']))
+
+    def _transaction(self, source, update):
+        """버킷 행 하나를 잠그고 update(tokens, rate, cooldown_until, now) -> (새 값들, 반환값) 적용"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated, rate, cooldown_until = conn.execute(
+                "SELECT tokens, updated, rate, cooldown_until FROM buckets WHERE source = ?", (source,)
+            ).fetchone()
+            now = time.time()
+            # 지난 시간만큼 토큰 보충 (버스트 크기까지)
+            tokens = min(self.sources[source]['burst'], tokens + max(0.0, now - updated) * rate)
+            (tokens, rate, cooldown_until), result = update(tokens, rate, cooldown_until, now)
+            conn.execute("UPDATE buckets SET tokens = ?, updated = ?, rate = ?, cooldown_until = ? WHERE source = ?",
+                         (tokens, now, rate, cooldown_until, source))
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ------------------------------------------------------------ 제한
+
+    def acquire(self, source):
+        """토큰 하나를 얻을 때까지 대기, 기다린 시간(초) 반환"""
+        if not self.enabled or source not in self.sources:
+            return 0.0
+
+        def take(tokens, rate, cooldown_until, now):
+            if now < cooldown_until:
+                return (tokens, rate, cooldown_until), cooldown_until - now
+            if tokens >= 1:
+                return (tokens - 1, rate, cooldown_until), 0.0
+            return (tokens, rate, cooldown_until), (1 - tokens) / rate
+
+        waited = 0.0
+        while True:
+            wait = self._transaction(source, take)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+        with self._lock:
+            self.stats[source]['requests'] += 1
+            self.stats[source]['waited'] += waited
+        return waited
+
+    def on_success(self, source):
+        """정상 응답 (연속 성공이 쌓이면 속도를 올림)"""
+        if not self.enabled or source not in self.sources:
+            return
+        with self._lock:
+            self._successes[source] += 1
+            if self._successes[source] < self.increase_after:
+                return
+            self._successes[source] = 0
+        config = self.sources[source]
+        step = config['rate'] * self.increase
+        self._transaction(source, lambda tokens, rate, cooldown_until, now: (
+            (tokens, min(config['max_rate'], rate + step), cooldown_until), None))
+
+    def on_throttle(self, source, retry_after=None):
+        """속도 제한 응답 (속도 절반, 남은 토큰 버림, Retry-After가 있으면 그동안 모든 요청 대기)"""
+        if not self.enabled or source not in self.sources:
+            return
+        with self._lock:
+            self._successes[source] = 0
+            self.stats[source]['throttled'] += 1
+        config = self.sources[source]
+        self._transaction(source, lambda tokens, rate, cooldown_until, now: (
+            (0.0, max(config['min_rate'], rate / 2),
+             max(cooldown_until, now + retry_after) if retry_after else cooldown_until), None))
+
+    def call(self, source, func, retries=3):
+        """
+        제한을 지켜 func() 실행
+        속도 제한(HTTP 429/503 응답 또는 예외)과 연결 오류는 지터 지수 백오프 후 최대 retries번 재시도
+        """
+        for attempt in range(retries + 1):
+            self.acquire(source)
+            try:
+                result = func()
+            except Exception as e:
+                if attempt == retries or not is_retryable(e):
+                    raise
+                if is_throttled(e):
+                    self.on_throttle(source, retry_after(getattr(e, 'response', None)))
+                self._count_retry(source)
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if getattr(result, 'status_code', None) in THROTTLE_STATUS:
+                wait = retry_after(result)
+                self.on_throttle(source, wait)
+                if attempt == retries:
+                    return result
+                self._count_retry(source)
+                time.sleep(max(backoff_delay(attempt), wait or 0.0))
+                continue
+            self.on_success(source)
+            return result
+
+    def _count_retry(self, source):
+        if source in self.stats:
+            with self._lock:
+                self.stats[source]['retries'] += 1
+
+    # ------------------------------------------------------------ 관리
+
+    def state(self):
+        """소스별 현재 속도/토큰/대기 종료 시각 (모든 프로세스 공통)"""
+        if not self.enabled:
+            return {}
+        rows = self._conn().execute("SELECT source, tokens, rate, cooldown_until FROM buckets").fetchall()
+        return {source: {'tokens': tokens, 'rate': rate, 'cooldown': max(0.0, cooldown_until - time.time())}
+                for source, tokens, rate, cooldown_until in rows}
+
+    def reset(self):
+        """모든 소스를 시작 속도로 초기화"""
+        if not self.enabled:
+            return
+        conn = self._conn()
+        conn.execute("DELETE FROM buckets")
+        self._init_db()
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """프로그램 전체에서 공유하는 요청 제한기"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter()
+        return _rate_limiter
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="소스별 요청 속도 상태 확인")
+    parser.add_argument('--reset', action='store_true', help="학습한 속도를 시작값으로 초기화")
+    args = parser.parse_args()
+
+    limiter = get_rate_limiter()
+    if args.reset:
+        limiter.reset()
+    for source, state in sorted(limiter.state().items()):
+        config = limiter.sources.get(source, {})
+        print(f"{source:6s} 초당 {state['rate']:.2f}회 (범위 {config.get('min_rate')}~{config.get('max_rate')}), "
+              f"토큰 {state['tokens']:.1f}" + (f", {state['cooldown']:.0f}초 대기 중" if state['cooldown'] else ""))
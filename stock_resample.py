@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+from stock_indicators import calculate_all
+
+# 봉 주기: 일봉(D), 주봉(W), 월봉(M)
+LEVELS = ('D', 'W', 'M')
+LEVEL_NAMES = {'D': '일봉', 'W': '주봉', 'M': '월봉'}
+LEVEL_UNITS = {'D': '일', 'W': '주', 'M': '개월'}
+
+# 자동 선택 시 차트에 그릴 최대 봉 수
+MAX_CHART_POINTS = 800
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def period_keys(index, level):
+    """날짜별 주/월 구간 번호 (같은 주/월이면 같은 값)"""
+    if index.tz is not None:
+        index = index.tz_localize(None)  # 현지 날짜 기준
+    if level == 'W':
+        days = index.values.astype('datetime64[D]').astype(np.int64)
+        return (days + 3) // 7  # 1970-01-01(목) 기준, 월요일에 시작하는 주
+    return index.year.to_numpy() * 12 + index.month.to_numpy() - 1
+
+def _aggregate(index, values, level):
+    """OHLCV 배열(n x 5)을 주/월 구간별로 집계 -> (봉 날짜, 배열)"""
+    keys = period_keys(index, level)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    bars = np.empty((len(starts), 5), dtype=np.float64)
+    bars[:, 0] = values[starts, 0]
+    bars[:, 1] = np.fmax.reduceat(values[:, 1], starts)
+    bars[:, 2] = np.fmin.reduceat(values[:, 2], starts)
+    bars[:, 3] = values[ends, 3]
+    bars[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return index[ends], bars
+
+def _ohlcv_values(daily):
+    values = daily[OHLCV_COLUMNS].to_numpy(dtype=np.float64, copy=True)  # 읽기 전용 뷰일 수 있으므로 복사
+    values[:, 4] = np.nan_to_num(values[:, 4])
+    return values
+
+def resample_ohlcv(daily, level):
+    """
+    일봉 -> 주봉/월봉 OHLCV
+    봉 날짜는 구간의 마지막 거래일 (진행 중인 주/월은 최근 거래일)
+    """
+    if level == 'D' or daily.empty:
+        return daily[OHLCV_COLUMNS].copy()
+    index, bars = _aggregate(daily.index, _ohlcv_values(daily), level)
+    return _to_frame(index, bars)
+
+def _to_frame(index, bars):
+    df = pd.DataFrame(bars[:, :4], index=index, columns=OHLCV_COLUMNS[:4])
+    df['volume'] = bars[:, 4].astype(np.int64)
+    return df
+
+def choose_level(rows, max_points=MAX_CHART_POINTS):
+    """일봉 rows개를 그릴 때 봉 수가 max_points 이하가 되는 가장 세밀한 주기"""
+    if rows <= max_points:
+        return 'D'
+    if rows / 5 <= max_points:
+        return 'W'
+    return 'M'
+
+class ResamplePyramid:
+    """
+    종목별 주봉/월봉 피라미드
+    일봉으로 한 번 만들어 두고, 일봉이 바뀌면 바뀐 날짜가 속한 주/월부터만 다시 집계
+    (기간 창이 밀려 앞쪽 일봉이 빠지면 첫 주/월도 다시 집계).
+    지표는 주기별 봉으로 따로 계산하며 처음 필요할 때까지 미룸
+    """
+
+    def __init__(self, daily, params=None):
+        self.params = params  # 지표 설정값 (GUI와 같은 dict 공유)
+        self.levels = {}  # 주기 -> (봉 날짜, OHLCV 배열)
+        self.analyzed = {}  # 주기 -> 지표까지 계산된 프레임
+        self.rebuild(daily)
+
+    def rebuild(self, daily):
+        """전체 다시 집계"""
+        values = _ohlcv_values(daily)
+        self.levels = {level: _aggregate(daily.index, values, level) for level in LEVELS[1:]}
+        self.head_date = daily.index[0] if len(daily) else None  # 집계에 쓴 첫 일봉 날짜
+        self.analyzed.clear()
+
+    def _trim_head(self, daily):
+        """앞쪽 일봉이 빠졌을 때 daily의 첫 주/월만 다시 집계하고 그보다 앞선 봉은 버림"""
+        for level, (index, bars) in self.levels.items():
+            keys = period_keys(daily.index[:31], level)
+            count = int(np.count_nonzero(keys == keys[0]))
+            head_index, head = _aggregate(daily.index[:count], _ohlcv_values(daily.iloc[:count]), level)
+            drop = int(index.searchsorted(head_index[0]))
+            self.levels[level] = (head_index.append(index[drop + 1:]), np.concatenate([head, bars[drop + 1:]]))
+        self.head_date = daily.index[0]
+
+    def update(self, daily, start):
+        """
+        daily의 start 위치 이후가 바뀌었을 때(새 일봉 추가/당일 봉 갱신) 해당 구간만 다시 집계
+        기간 창이 밀려 daily가 더 늦은 날짜에서 시작하면 첫 주/월도 다시 집계 (봉 위치가 모두 밀림)
+        반환값: 주기별로 처음 바뀐 봉 위치
+        """
+        if start <= 0 or len(daily) == 0:
+            self.rebuild(daily)
+            return {level: 0 for level in self.levels}
+
+        shifted = daily.index[0] != self.head_date
+        if shifted:
+            self._trim_head(daily)
+
+        start = min(start, len(daily) - 1)
+        # 한 달은 31행 안에 들어가므로 그 이후 일봉만 사용
+        lookback = max(0, start - 31)
+        recent = daily.iloc[lookback:]
+        values = _ohlcv_values(recent)
+        changes = {}
+        for level, (index, bars) in self.levels.items():
+            # start가 속한 주/월의 첫 거래일부터 다시 집계
+            keys = period_keys(recent.index[:start - lookback + 1], level)
+            first = start - lookback - int(np.count_nonzero(keys == keys[-1])) + 1
+
+            keep = int(index.searchsorted(recent.index[first]))
+            tail_index, tail = _aggregate(recent.index[first:], values[first:], level)
+            self.levels[level] = (index[:keep].append(tail_index), np.concatenate([bars[:keep], tail]))
+            self.analyzed.pop(level, None)
+            changes[level] = 0 if shifted else keep
+        return changes
+
+    def bars(self, level):
+        """주기별 OHLCV DataFrame"""
+        return _to_frame(*self.levels[level])
+
+    def frame(self, level):
+        """지표까지 계산된 주기별 프레임 (주기별 봉 기준 지표)"""
+        df = self.analyzed.get(level)
+        if df is None:
+            df = calculate_all(self.bars(level), self.params)
+            self.analyzed[level] = df
+        return df
+
+    def clear_indicators(self):
+        """지표 설정값이 바뀌었을 때 계산된 지표 삭제"""
+        self.analyzed.clear()
+
+    def nbytes(self):
+        size = sum(index.nbytes + bars.nbytes for index, bars in self.levels.values())
+        return size + sum(int(df.memory_usage(index=True).sum()) for df in self.analyzed.values())
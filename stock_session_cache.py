@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from stock_indicators import DEFAULT_INDICATOR_PARAMS, calculate_all
+
+# 시세 컬럼 (가격은 float32, 거래량은 int64로 보관)
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+FLOAT_PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# 보관하는 지표 컬럼 (calculate_all 결과)
+INDICATOR_COLUMNS = ['ma9', 'ma22', 'change_pct', 'rsi', 'macd', 'macd_signal', 'macd_histogram',
+                     'bb_upper', 'bb_middle', 'bb_lower', 'stoch_k', 'stoch_d']
+
+class CachedFrame:
+    """
+    종목 하나의 캐시 항목
+    시세는 float32/int64 배열로 보관하고, 지표는 calculate_all 결과를 float32로 보관
+    (지표 없이 저장된 항목이나 설정값이 바뀐 항목은 처음 표시할 때 calculate_all로 한 번에 계산)
+    """
+
+    def __init__(self, data, params=None):
+        self.index = data.index
+        self.prices = {c: data[c].to_numpy(dtype=np.float32) for c in FLOAT_PRICE_COLUMNS}
+        self.prices['volume'] = data['volume'].fillna(0).to_numpy(dtype=np.int64)
+        self.params = params if params is not None else dict(DEFAULT_INDICATOR_PARAMS)
+        self.indicators = {}  # 컬럼명 -> float32 배열
+        self.pyramid = None  # 주봉/월봉 피라미드 (장기 차트를 그릴 때 생성)
+        self.fetched_at = time.time()
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def nbytes(self):
+        """보관 중인 배열 크기(bytes)"""
+        size = self.index.nbytes
+        size += sum(a.nbytes for a in self.prices.values())
+        size += sum(a.nbytes for a in self.indicators.values())
+        if self.pyramid is not None:
+            size += self.pyramid.nbytes()
+        return size
+
+    def adopt(self, df):
+        """이미 계산된 지표 컬럼을 float32로 보관 (다시 계산하지 않도록)"""
+        for column in INDICATOR_COLUMNS:
+            if column in df.columns:
+                self.indicators[column] = df[column].to_numpy(dtype=np.float32)
+
+    def clear_indicators(self):
+        """지표 설정값이 바뀌었을 때 계산된 지표 삭제"""
+        self.indicators.clear()
+        if self.pyramid is not None:
+            self.pyramid.clear_indicators()
+
+    def price_frame(self):
+        """OHLCV DataFrame (float64)"""
+        data = {c: self.prices[c].astype(np.float64) for c in FLOAT_PRICE_COLUMNS}
+        data['volume'] = self.prices['volume']
+        return pd.DataFrame(data, index=self.index)
+
+    def frame(self):
+        """표시용 DataFrame (시세 + 지표, float64, 지표가 없으면 calculate_all로 계산해 보관)"""
+        df = self.price_frame()
+        if any(column not in self.indicators for column in INDICATOR_COLUMNS):
+            self.adopt(calculate_all(df, self.params))
+        # 방금 계산한 경우도 보관 정밀도(float32) 값으로 맞춤
+        for column in INDICATOR_COLUMNS:
+            df[column] = self.indicators[column].astype(np.float64)
+        return df
+
+    def changed_from(self, new):
+        """
+        새 시세에서 처음 달라지는 행 위치 (new 기준, 같으면 None, 겹치는 날짜가 없으면 0)
+        기간 창이 밀려 앞쪽 행이 빠진 경우(기간 지정 재조회에 새 거래일이 붙은 경우)는
+        new의 첫 날짜부터 겹치는 구간을 맞춰 비교함.
+        보관 정밀도(float32)로 맞춰 비교하며, 보통 당일 봉만 바뀌므로 마지막 위치가 반환됨
+        """
+        if not len(new):
+            return 0
+        offset = int(self.index.searchsorted(new.index[0]))
+        if offset >= len(self.index) or self.index[offset] != new.index[0]:
+            return 0
+
+        n = min(len(self.index) - offset, len(new))
+        rows = slice(offset, offset + n)
+        same = np.asarray(self.index[rows] == new.index[:n])
+        for column in FLOAT_PRICE_COLUMNS:
+            a = self.prices[column][rows]
+            b = new[column].to_numpy(dtype=np.float32)[:n]
+            same &= (a == b) | (np.isnan(a) & np.isnan(b))
+        same &= self.prices['volume'][rows] == new['volume'].fillna(0).to_numpy(dtype=np.int64)[:n]
+
+        diff = np.flatnonzero(~same)
+        if diff.size:
+            return int(diff[0])
+        return None if offset == 0 and len(self.index) == len(new) else n
+
+class SessionCache:
+    """
+    분석한 종목 캐시 (최근 사용 순)
+    전체 크기가 메모리 예산을 넘으면 가장 오래 사용하지 않은 항목부터 제거.
+    다시 분석할 때 즉시 표시하고, max_age가 지난 항목만 백그라운드에서 재검증
+    """
+
+    def __init__(self, budget_mb=None, max_age=60, params=None):
+        if budget_mb is None:
+            budget_mb = float(os.environ.get('STOCK_SESSION_CACHE_MB', 64))
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.max_age = max_age  # 재검증 없이 그대로 쓰는 시간(초)
+        self.params = params  # 지표 설정값 (GUI와 같은 dict 공유)
+        self.entries = OrderedDict()  # (종목, 기간) -> CachedFrame
+        self.evictions = 0
+
+    def get(self, key):
+        """캐시 항목 (최근 사용으로 갱신, 없으면 None)"""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            entry.hits += 1
+        return entry
+
+    def put(self, key, data, df=None):
+        """시세 저장 (df: 지표까지 계산된 프레임이 있으면 지표도 보관)"""
+        entry = CachedFrame(data, self.params)
+        if df is not None:
+            entry.adopt(df)
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.enforce_budget()
+        return entry
+
+    def frame(self, entry):
+        """표시용 DataFrame (빠진 지표는 계산 후 예산 재확인)"""
+        df = entry.frame()
+        self.enforce_budget()
+        return df
+
+    def enforce_budget(self):
+        """예산을 넘으면 오래된 항목부터 제거 (가장 최근 항목 하나는 유지)"""
+        total = self.total_bytes()
+        while total > self.budget and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last=False)
+            total -= entry.nbytes()
+            self.evictions += 1
+
+    def total_bytes(self):
+        return sum(entry.nbytes() for entry in self.entries.values())
+
+    def is_stale(self, entry):
+        return time.time() - entry.fetched_at > self.max_age
+
+    def touch(self, entry):
+        """재검증 결과 변경이 없을 때 수집 시각만 갱신"""
+        entry.fetched_at = time.time()
+
+    def invalidate_indicators(self):
+        """지표 설정값 변경 시 모든 항목의 지표 삭제 (다음 표시 때 다시 계산)"""
+        for entry in self.entries.values():
+            entry.clear_indicators()
+
+    def remove(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """항목별 크기 정보 (최근 사용 순)"""
+        now = time.time()
+        return [{
+            'symbol': key[0],
+            'years': key[1],
+            'rows': len(entry),
+            'indicators': len(entry.indicators),
+            'bytes': entry.nbytes(),
+            'hits': entry.hits,
+            'age': now - entry.fetched_at
+        } for key, entry in reversed(self.entries.items())]
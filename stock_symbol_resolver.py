@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+# 시장 구분 -> Yahoo Finance 접미사
+MARKET_SUFFIX = {
+    'KOSPI': '.KS',
+    'KOSDAQ': '.KQ'
+}
+SUFFIX_MARKET = {suffix: market for market, suffix in MARKET_SUFFIX.items()}
+
+class SymbolResolver:
+    """
+    한국 종목코드의 거래소 접미사(.KS/.KQ) 캐시
+    stocks.market 컬럼으로 초기화하고, 모르는 코드는 한 번만 확인한 뒤 파일에 기억
+    """
+
+    def __init__(self, path='symbol_suffix_cache.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.suffixes = {}
+        self.load()
+
+    def get_suffix(self, code):
+        """기억된 접미사 (없으면 None)"""
+        with self.lock:
+            return self.suffixes.get(code)
+
+    def candidates(self, code, recheck=False):
+        """
+        시도할 티커 순서
+        기억된 접미사가 있으면 그것만, 없으면 KOSPI -> KOSDAQ
+        recheck: 기억된 접미사 뒤에 다른 접미사도 붙임 (전체 기간 조회가 비었을 때 시장 이전 확인용)
+        """
+        suffix = self.get_suffix(code)
+        if suffix is None:
+            return [f"{code}.KS", f"{code}.KQ"]
+        if not recheck:
+            return [f"{code}{suffix}"]
+        other = '.KQ' if suffix == '.KS' else '.KS'
+        return [f"{code}{suffix}", f"{code}{other}"]
+
+    def remember(self, code, suffix):
+        """확인된 접미사 기억"""
+        with self.lock:
+            if self.suffixes.get(code) == suffix:
+                return
+            self.suffixes[code] = suffix
+        self.save()
+
+    def remember_ticker(self, ticker_symbol):
+        """'005930.KS' 형식의 티커에서 접미사 기억"""
+        code, _, suffix = ticker_symbol.partition('.')
+        if code.isdigit() and f".{suffix}" in SUFFIX_MARKET:
+            self.remember(code, f".{suffix}")
+
+    def get_market(self, code):
+        """기억된 시장 구분 (KOSPI/KOSDAQ)"""
+        return SUFFIX_MARKET.get(self.get_suffix(code))
+
+    def seed_from_db(self, connection):
+        """stocks 테이블의 market 컬럼으로 캐시 초기화"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT symbol, market FROM stocks WHERE market IS NOT NULL")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        added = 0
+        with self.lock:
+            for symbol, market in rows:
+                suffix = MARKET_SUFFIX.get(str(market).upper())
+                if suffix and str(symbol).isdigit() and self.suffixes.get(symbol) != suffix:
+                    self.suffixes[symbol] = suffix
+                    added += 1
+        if added:
+            self.save()
+        return added
+
+    def save(self):
+        """캐시 저장"""
+        try:
+            with self.lock:
+                data = json.dumps(self.suffixes, ensure_ascii=False, indent=2, sort_keys=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"접미사 캐시 저장 오류: {e}")
+
+    def load(self):
+        """캐시 로드"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.suffixes = json.load(f)
+        except:
+            self.suffixes = {}
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_symbol_resolver():
+    """프로그램 전체에서 공유하는 접미사 캐시"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = SymbolResolver()
+        return _resolver
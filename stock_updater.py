@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from stock_data_fetcher import StockDataFetcher
+from stock_bulk_import import BulkImporter, normalize_chunk
+
+# 소스별 동시 수집 종목 수 (요청 속도는 공유 요청 제한기(stock_rate_limiter)가 조절)
+SOURCE_CONCURRENCY = {
+    'yahoo': 4,
+    'naver': 4,
+    'krx': 2
+}
+
+# 한국 종목의 당일 봉을 소스에서 받을 수 있다고 보는 시각 (장 마감 15:30 이후 반영 여유)
+KRX_BARS_READY = (16, 0)
+
+class SourceStats:
+    """소스별 요청 결과 집계 (응답 시간, 수집 행 수, 실패 수)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = {}
+
+    def record(self, source, status, latency, rows=0):
+        """status: ok(새 봉 있음), empty(응답은 정상이지만 새 봉 없음), failed"""
+        with self.lock:
+            stats = self.sources.setdefault(source, {'requests': 0, 'ok': 0, 'empty': 0, 'failed': 0,
+                                                     'rows': 0, 'busy': 0.0, 'latencies': []})
+            stats['requests'] += 1
+            stats[status] += 1
+            stats['rows'] += rows
+            stats['busy'] += latency
+            stats['latencies'].append(round(latency, 3))
+
+    def summary(self):
+        """소스별 요약 (평균/p95/최대 응답 시간, 요청 시간 기준 초당 행 수)"""
+        rows = []
+        with self.lock:
+            for source, stats in sorted(self.sources.items()):
+                latencies = np.asarray(stats['latencies'], dtype=np.float64)
+                busy = stats.get('busy', latencies.sum())  # 이어서 실행하면 이전 실행분도 포함
+                rows.append({
+                    'source': source,
+                    'requests': stats['requests'],
+                    'ok': stats['ok'],
+                    'empty': stats['empty'],
+                    'failed': stats['failed'],
+                    'rows': stats['rows'],
+                    'latency_avg': float(latencies.mean()) if latencies.size else 0.0,
+                    'latency_p95': float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+                    'latency_max': float(latencies.max()) if latencies.size else 0.0,
+                    'rows_per_sec': stats['rows'] / busy if busy > 0 else 0.0
+                })
+        return pd.DataFrame(rows)
+
+    def to_dict(self):
+        """진행 기록용 집계 값 (응답 시간 목록은 메모리에만 두고 저장하지 않음)"""
+        with self.lock:
+            return {source: {key: value for key, value in stats.items() if key != 'latencies'}
+                    for source, stats in self.sources.items()}
+
+    def load(self, sources):
+        """진행 기록의 집계 값으로 이어서 시작 (이전 실행의 응답 시간은 요약에서 빠짐)"""
+        with self.lock:
+            self.sources = {source: dict(stats, latencies=[]) for source, stats in sources.items()}
+
+class UpdaterCheckpoint:
+    """
+    실행 진행 기록 (기준일, 끝난 종목과 결과, 소스별 집계)
+    같은 기준일로 다시 실행하면 끝난 종목은 건너뜀
+    저장은 save_interval초에 한 번만 (중단되면 마지막 저장 이후 종목만 다시 수집, upsert라 중복 없음)
+    """
+
+    def __init__(self, path='updater_checkpoint.json', save_interval=5.0):
+        self.path = path
+        self.save_interval = save_interval
+        self.saved_at = 0.0
+        self.state = {}
+        self.load()
+
+    def begin(self, target):
+        """기준일 실행 시작 (기준일이 바뀌었으면 기록 초기화), 건너뛸 종목 반환 (실패한 종목은 다시 시도)"""
+        if self.state.get('target') != target.isoformat():
+            self.state = {'target': target.isoformat(), 'done': {}, 'sources': {}, 'finished': False}
+        self.state['finished'] = False
+        return {symbol: result for symbol, result in self.state['done'].items() if result['status'] != 'failed'}
+
+    def update(self, symbol, result, sources):
+        self.state['done'][symbol] = result
+        self.state['sources'] = sources
+        if time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+
+    def finish(self):
+        self.state['finished'] = True
+        self.save()
+
+    def save(self):
+        """기록 저장 (임시 파일에 쓴 뒤 교체)"""
+        try:
+            temp = self.path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(temp, self.path)
+            self.saved_at = time.monotonic()
+        except Exception as e:
+            print(f"갱신 기록 저장 오류: {e}")
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        except:
+            self.state = {}
+
+def missing_range(last_date, target, initial_years=1):
+    """
+    새로 받아야 할 구간 (시작일, 종료일), 받을 평일이 없으면 None
+    저장된 데이터가 없으면 initial_years년 전부터
+    """
+    if last_date is None:
+        start = target - timedelta(days=365 * initial_years)
+    else:
+        start = last_date + timedelta(days=1)
+    if start > target or not len(pd.bdate_range(start, target)):
+        return None
+    return start, target
+
+def expects_bars(symbol, start, end, now=None):
+    """
+    start~end 구간에 소스가 이미 갖고 있어야 할 평일이 있는지
+    오늘은 한국 종목이고 KRX_BARS_READY 이후일 때만 포함 (해외 종목의 오늘 봉은 아직 없음)
+    """
+    now = now or datetime.now()
+    last = end
+    if last >= now.date() and not (symbol.isdigit() and (now.hour, now.minute) >= KRX_BARS_READY):
+        last = now.date() - timedelta(days=1)
+    return start <= last and len(pd.bdate_range(start, last)) > 0
+
+def new_bars(data, last_date, target):
+    """소스 응답에서 last_date 이후 ~ target까지의 봉만 (날짜 컬럼 포함, 시간대 제거)"""
+    if data is None or data.empty:
+        return None
+    index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+    days = index.normalize()
+    mask = days <= pd.Timestamp(target)
+    if last_date is not None:
+        mask &= days > pd.Timestamp(last_date)
+    frame = data[np.asarray(mask)]
+    return frame.set_axis(days[np.asarray(mask)]).rename_axis('date').reset_index()
+
+class NightlyUpdater:
+    """
+    stocks 테이블 전체 종목의 증분 갱신
+    - 종목별 마지막 저장일 이후 구간만 수집 (소스 기록 순서대로 시도, 소스별 동시 수집 수 제한)
+    - 새 봉만 stock_prices에 upsert (종목마다 커밋 + 진행 기록, 중단 후 다시 실행하면 이어서 진행)
+    """
+
+    def __init__(self, connect, workers=8, concurrency=None, initial_years=1, checkpoint=None, fetcher=None):
+        self.connect = connect  # 실행마다 새 연결 (야간 대기 중 끊긴 연결을 재사용하지 않음)
+        self.workers = workers
+        self.initial_years = initial_years
+        self.checkpoint = checkpoint
+        self.fetcher = fetcher or StockDataFetcher()
+        self.gates = {source: threading.BoundedSemaphore(limit)
+                      for source, limit in (concurrency or SOURCE_CONCURRENCY).items()}
+        self.stats = SourceStats()
+
+    def fetch_symbol(self, symbol, last_date, start, end):
+        """
+        종목 하나의 새 봉 수집 (작업 스레드)
+        반환값: (새 봉 DataFrame 또는 None, 결과 dict)
+        """
+        memory = self.fetcher.get_memory()
+        expected = expects_bars(symbol, start, end)
+        responded = False
+        empty_sources = []  # 빈 응답을 준 소스 (다른 소스에 봉이 있으면 실패로 기록)
+        for source in memory.order(symbol, self.fetcher.candidate_sources(symbol)):
+            started = time.perf_counter()
+            try:
+                with self.gates[source]:
+                    started = time.perf_counter()  # 응답 시간에서 동시 수집 대기 시간은 제외
+                    data = self.fetcher.fetch_range(source, symbol, start, end)
+            except Exception as e:
+                print(f"{symbol} {StockDataFetcher.SOURCE_NAMES[source]} 오류: {e}")
+                data = None
+            latency = time.perf_counter() - started
+
+            if data is not None and data.empty:
+                # 빈 응답: 받을 평일이 없는 구간이면 정상, 아니면 장애/미상장일 수 있으므로 다음 소스 시도
+                # (Yahoo는 오류도 빈 응답으로 돌려주므로 빈 응답만으로 끝내지 않음)
+                self.stats.record(source, 'empty', latency)
+                if not expected:
+                    responded = True
+                    break
+                empty_sources.append(source)
+                continue
+            if not self.fetcher.is_valid_data(data):
+                self.stats.record(source, 'failed', latency)
+                memory.record_failure(symbol, source)
+                continue
+            memory.record_success(symbol, source, latency)
+            bars = new_bars(data, last_date, end)
+            if bars is None or bars.empty:
+                # 응답은 정상이지만 새 봉 없음 (휴장일 등) -> 다른 소스는 시도하지 않음
+                self.stats.record(source, 'empty', latency)
+                responded = True
+                break
+            self.stats.record(source, 'ok', latency, len(bars))
+            for empty_source in empty_sources:
+                memory.record_failure(symbol, empty_source)
+            return bars, {'status': 'ok', 'source': source}
+        # 모든 소스가 빈 응답이면 실패로 두어 다음 실행에서 다시 시도
+        return None, {'status': 'empty' if responded else 'failed'}
+
+    def run_once(self, target=None, symbols=None, progress=None):
+        """
+        한 번 갱신 (target: 기준일, 기본 오늘)
+        progress(done, total, symbol, result): 종목 하나가 끝날 때마다 호출
+        반환값: (종목별 결과 dict, 소스별 요약 DataFrame)
+        """
+        from stock_db import load_symbols, load_last_dates
+        target = target or datetime.now().date()
+        done = self.checkpoint.begin(target) if self.checkpoint is not None else {}
+        if self.checkpoint is not None:
+            self.stats.load(self.checkpoint.state['sources'])
+
+        connection = self.connect()
+        try:
+            symbols = symbols or load_symbols(connection)
+            last_dates = load_last_dates(connection)
+            importer = BulkImporter(connection)
+
+            results = dict(done)
+            jobs = {}
+            for symbol in symbols:
+                if symbol in done:
+                    continue
+                last_date = last_dates.get(symbol)
+                if isinstance(last_date, datetime):
+                    last_date = last_date.date()
+                span = missing_range(last_date, target, self.initial_years)
+                if span is None:
+                    results[symbol] = {'status': 'current'}
+                    continue
+                jobs[symbol] = (last_date,) + span
+
+            total = len(symbols)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self.fetch_symbol, symbol, *job): symbol for symbol, job in jobs.items()}
+                for future in as_completed(futures):
+                    symbol = futures[future]
+                    try:
+                        bars, result = future.result()
+                        if bars is not None:
+                            # 검증/형 변환 후 새 봉만 upsert (DB 쓰기는 이 스레드에서만)
+                            chunk, rejected = normalize_chunk(bars, symbol)
+                            importer.write_chunk(chunk)
+                            result['rows'] = len(chunk)
+                            if rejected:
+                                result['rejected'] = rejected
+                    except Exception as e:
+                        result = {'status': 'failed', 'error': str(e)}
+                    results[symbol] = result
+                    if self.checkpoint is not None:
+                        self.checkpoint.update(symbol, result, self.stats.to_dict())
+                    if progress is not None:
+                        progress(len(results), total, symbol, result)
+        except BaseException:
+            if self.checkpoint is not None:
+                self.checkpoint.save()  # 중단(Ctrl+C 등)되어도 끝난 종목까지는 기록
+            raise
+        finally:
+            connection.close()
+
+        if self.checkpoint is not None:
+            self.checkpoint.finish()
+        return results, self.stats.summary()
+
+    def run_daemon(self, at='18:30', progress=None, report=None):
+        """매일 at(HH:MM)에 run_once 실행 (Ctrl+C로 종료)"""
+        hour, minute = map(int, at.split(':'))
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            print(f"다음 갱신: {next_run:%Y-%m-%d %H:%M}")
+            while datetime.now() < next_run:
+                time.sleep(min(60.0, max(0.0, (next_run - datetime.now()).total_seconds())))
+
+            self.stats = SourceStats()
+            try:
+                results, summary = self.run_once(progress=progress)
+                if report is not None:
+                    report(results, summary)
+            except Exception as e:
+                print(f"갱신 오류: {e}")
+
+def print_report(results, summary, elapsed=None):
+    """종목 결과 개수와 소스별 요약 출력"""
+    counts = pd.Series([result['status'] for result in results.values()]).value_counts()
+    rows = sum(result.get('rows', 0) for result in results.values())
+    print(f"종목 {len(results)}개: " + ', '.join(f"{status} {count}" for status, count in counts.items())
+          + f" / 새 봉 {rows:,}개" + (f" ({elapsed:.1f}s)" if elapsed is not None else ""))
+    if not summary.empty:
+        print(summary.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+    failed = [symbol for symbol, result in results.items() if result['status'] == 'failed']
+    if failed:
+        print(f"실패 {len(failed)}개: {', '.join(failed[:50])}" + (" ..." if len(failed) > 50 else ""))
+
+# 사용 예시
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stocks 테이블 전체 종목 야간 증분 갱신")
+    parser.add_argument('symbols', nargs='*', help="갱신할 종목 (생략하면 stocks 테이블 전체)")
+    parser.add_argument('--daemon', action='store_true', help="매일 --at 시각에 반복 실행")
+    parser.add_argument('--at', default='18:30', help="데몬 실행 시각 (HH:MM)")
+    parser.add_argument('--workers', type=int, default=8, help="동시 수집 종목 수")
+    parser.add_argument('--initial-years', type=int, default=1, help="저장된 데이터가 없는 종목의 수집 기간 (년)")
+    parser.add_argument('--target', default=None, help="기준일 (YYYY-MM-DD, 기본 오늘)")
+    parser.add_argument('--checkpoint', default='updater_checkpoint.json', help="진행 기록 파일")
+    args = parser.parse_args()
+
+    from stock_db import connect
+    updater = NightlyUpdater(connect, args.workers, initial_years=args.initial_years,
+                             checkpoint=UpdaterCheckpoint(args.checkpoint))
+
+    def progress(done, total, symbol, result):
+        if result['status'] in ('ok', 'failed'):
+            print(f"[{done}/{total}] {symbol} {result['status']} {result.get('source', '')} {result.get('rows', '')}")
+
+    if args.daemon:
+        updater.run_daemon(args.at, progress, print_report)
+    else:
+        started = time.perf_counter()
+        target = date.fromisoformat(args.target) if args.target else None
+        results, summary = updater.run_once(target, args.symbols or None, progress)
+        print_report(results, summary, time.perf_counter() - started)